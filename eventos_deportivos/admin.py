@@ -1,14 +1,36 @@
 from django.contrib import admin
 from .models import *
 
+
+# ----------------------------
+# Eliminacion suave en el admin
+# Borrar desde el admin marca las filas como eliminadas; purgar_eliminados
+# borra despues la cascada. La confirmacion no recorre las filas dependientes.
+# ----------------------------
+class EliminacionSuaveAdmin(admin.ModelAdmin):
+
+    def get_deleted_objects(self, objs, request):
+        eliminadas = [str(obj) for obj in objs]
+        return eliminadas, {self.opts.verbose_name_plural: len(eliminadas)}, set(), []
+
+    def delete_model(self, request, obj):
+        obj.eliminar()
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            obj.eliminar()
+
+
 # Register your models here.
-admin.site.register(Jugador)
-admin.site.register(Equipo)
-admin.site.register(Torneo)
-admin.site.register(Partido)
+admin.site.register(Jugador, EliminacionSuaveAdmin)
+admin.site.register(Equipo, EliminacionSuaveAdmin)
+admin.site.register(Torneo, EliminacionSuaveAdmin)
+admin.site.register(Partido, EliminacionSuaveAdmin)
+admin.site.register(Clasificacion)
+admin.site.register(EventoPartido)
 admin.site.register(Arbitro)
 admin.site.register(Manager)
-admin.site.register(Estadio)
-admin.site.register(Sponsor)
+admin.site.register(Estadio, EliminacionSuaveAdmin)
+admin.site.register(Sponsor, EliminacionSuaveAdmin)
 admin.site.register(Premio)
-admin.site.register(Usuario)
\ No newline at end of file
+admin.site.register(Usuario, EliminacionSuaveAdmin)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class EventosDeportivosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'eventos_deportivos'
+
+    def ready(self):
+        # Registra los receptores de señales
+        from . import signals
@@ -0,0 +1,151 @@
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from threading import Lock
+
+from .models import Jugador, Equipo
+
+# Segundos tras los que el indice se reconstruye entero. Las señales solo
+# actualizan el proceso que hace el cambio; asi el resto de procesos del
+# servidor tampoco se quedan desfasados mucho tiempo.
+REFRESCO = 300
+
+
+def normalizar(texto):
+    # Minusculas y sin tildes: "Cádiz" -> "cadiz"
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower().strip()
+
+
+class IndicePrefijos:
+    """
+    Indice en memoria para autocompletar: una lista ordenada de
+    (clave, id) en la que se busca con bisect, asi cada consulta cuesta
+    O(log n + resultados) sin tocar la base de datos.
+    """
+
+    def __init__(self, filas, claves):
+        self.filas = filas        # devuelve un iterable de (id, texto, ...)
+        self.claves = claves      # convierte una fila en su lista de claves
+        self.lock = Lock()
+        # Solo una peticion reconstruye a la vez
+        self.reconstruyendo = Lock()
+        self.entradas = None      # [(clave, id)] ordenada
+        self.textos = {}          # id -> texto a mostrar
+        self.claves_de = {}       # id -> claves que tiene en entradas
+        self.construido = 0
+
+    def construir(self):
+        entradas = []
+        textos = {}
+        claves_de = {}
+        for fila in self.filas():
+            claves = self.claves(fila)
+            textos[fila[0]] = fila[1]
+            claves_de[fila[0]] = claves
+            entradas.extend((clave, fila[0]) for clave in claves)
+        entradas.sort()
+        with self.lock:
+            self.entradas = entradas
+            self.textos = textos
+            self.claves_de = claves_de
+            self.construido = time.monotonic()
+
+    def refrescar(self):
+        """
+        La primera vez todas las peticiones esperan a que se construya el
+        indice. Despues, cuando caduca, lo reconstruye la primera peticion
+        que consigue el lock y las demas siguen buscando en el actual, que
+        construir() solo sustituye al terminar.
+        """
+        if self.entradas is None:
+            with self.reconstruyendo:
+                if self.entradas is None:
+                    self.construir()
+        elif time.monotonic() - self.construido > REFRESCO and self.reconstruyendo.acquire(blocking=False):
+            try:
+                # Otra peticion puede haberlo reconstruido mientras tanto
+                if time.monotonic() - self.construido > REFRESCO:
+                    self.construir()
+            finally:
+                self.reconstruyendo.release()
+
+    def buscar(self, prefijo, limite):
+        self.refrescar()
+        prefijo = normalizar(prefijo)
+        if not prefijo:
+            return []
+        resultados = []
+        vistos = set()
+        with self.lock:
+            posicion = bisect_left(self.entradas, (prefijo,))
+            while posicion < len(self.entradas) and len(resultados) < limite:
+                clave, pk = self.entradas[posicion]
+                if not clave.startswith(prefijo):
+                    break
+                if pk not in vistos:
+                    vistos.add(pk)
+                    resultados.append((pk, self.textos[pk]))
+                posicion += 1
+        return resultados
+
+    def _quitar(self, pk):
+        # Quita las entradas de un id localizandolas con bisect
+        for clave in self.claves_de.pop(pk, []):
+            posicion = bisect_left(self.entradas, (clave, pk))
+            if posicion < len(self.entradas) and self.entradas[posicion] == (clave, pk):
+                del self.entradas[posicion]
+        self.textos.pop(pk, None)
+
+    def quitar(self, pk):
+        with self.lock:
+            if self.entradas is not None:
+                self._quitar(pk)
+
+    def actualizar(self, fila):
+        # Sustituye las claves de una fila despues de guardarla
+        with self.lock:
+            if self.entradas is None:
+                return
+            pk = fila[0]
+            self._quitar(pk)
+            claves = self.claves(fila)
+            self.textos[pk] = fila[1]
+            self.claves_de[pk] = claves
+            for clave in claves:
+                insort(self.entradas, (clave, pk))
+
+
+# ----------------------------
+# Indices de jugadores y equipos
+# ----------------------------
+def filas_jugadores():
+    for pk, nombre, apellido in Jugador.objects.values_list('id', 'nombre', 'apellido').iterator(chunk_size=5000):
+        yield (pk, f"{nombre} {apellido}", nombre, apellido)
+
+
+def claves_jugador(fila):
+    # Se puede escribir el nombre, el apellido o el nombre completo
+    pk, texto, nombre, apellido = fila
+    return sorted({normalizar(texto), normalizar(apellido)})
+
+
+def filas_equipos():
+    for pk, nombre in Equipo.objects.values_list('id', 'nombre').iterator(chunk_size=5000):
+        yield (pk, nombre)
+
+
+def claves_equipo(fila):
+    return [normalizar(fila[1])]
+
+
+indice_jugadores = IndicePrefijos(filas_jugadores, claves_jugador)
+indice_equipos = IndicePrefijos(filas_equipos, claves_equipo)
+
+
+def fila_jugador(jugador):
+    return (jugador.id, f"{jugador.nombre} {jugador.apellido}", jugador.nombre, jugador.apellido)
+
+
+def fila_equipo(equipo):
+    return (equipo.id, equipo.nombre)
@@ -0,0 +1,15 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .roles import roles_usuario
+
+
+class PermisosCacheBackend(ModelBackend):
+    """
+    ModelBackend que toma los permisos del usuario de la cache de roles
+    (roles.py) en vez de consultarlos en cada peticion.
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        return roles_usuario(user_obj)['permisos']
@@ -0,0 +1,140 @@
+import re
+
+from django.db import connections, router
+from django.db.models import Q
+
+# ----------------------------
+# Busqueda de texto con SQLite FTS5
+# Cada modelo tiene una tabla virtual "<tabla>_fts" de contenido externo
+# (content=<tabla>) que los triggers de la migracion 0004 mantienen al dia.
+# El tokenizador unicode61 con remove_diacritics 2 hace que "Cadiz" encuentre
+# "Cádiz", y cada termino se busca como prefijo ("mes" encuentra "Messi").
+# ----------------------------
+
+# modelo -> columnas indexadas
+COLUMNAS_INDEXADAS = {
+    'jugador': ['nombre', 'apellido'],
+    'equipo': ['nombre', 'ciudad'],
+    'estadio': ['nombre', 'ciudad'],
+    'sponsor': ['nombre', 'pais'],
+    'torneo': ['nombre', 'pais'],
+}
+
+TOKENIZADOR = 'unicode61 remove_diacritics 2'
+
+
+def tabla_fts(modelo):
+    return f'{modelo._meta.db_table}_fts'
+
+
+def sql_crear_indice(tabla, columnas):
+    # Sentencias para crear la tabla FTS, sus triggers y rellenarla
+    fts = f'{tabla}_fts'
+    lista = ', '.join(columnas)
+    nuevos = ', '.join(f'new.{c}' for c in columnas)
+    viejos = ', '.join(f'old.{c}' for c in columnas)
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({lista}, content='{tabla}', content_rowid='id', tokenize='{TOKENIZADOR}')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {tabla} BEGIN "
+        f"INSERT INTO {fts}(rowid, {lista}) VALUES (new.id, {nuevos}); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {tabla} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {lista}) VALUES ('delete', old.id, {viejos}); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {lista} ON {tabla} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {lista}) VALUES ('delete', old.id, {viejos}); "
+        f"INSERT INTO {fts}(rowid, {lista}) VALUES (new.id, {nuevos}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def sql_borrar_indice(tabla):
+    fts = f'{tabla}_fts'
+    return [
+        f"DROP TRIGGER IF EXISTS {fts}_ai",
+        f"DROP TRIGGER IF EXISTS {fts}_ad",
+        f"DROP TRIGGER IF EXISTS {fts}_au",
+        f"DROP TABLE IF EXISTS {fts}",
+    ]
+
+
+# (alias de base de datos, tabla) -> existe el indice; se comprueba una vez por proceso
+_disponibles = {}
+
+
+def indice_disponible(modelo):
+    # Solo se usa el indice si la base de datos es SQLite y la tabla existe
+    alias = router.db_for_read(modelo)
+    clave = (alias, tabla_fts(modelo))
+    if clave not in _disponibles:
+        conexion = connections[alias]
+        existe = False
+        if conexion.vendor == 'sqlite':
+            with conexion.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [clave[1]])
+                existe = cursor.fetchone() is not None
+        _disponibles[clave] = existe
+    return _disponibles[clave]
+
+
+def expresion_fts(terminos):
+    # {'nombre': 'leo mes'} -> 'nombre : "leo"* AND nombre : "mes"*'
+    partes = []
+    for columna, texto in terminos.items():
+        for palabra in re.findall(r'\w+', texto or ''):
+            partes.append(f'{columna} : "{palabra}"*')
+    return ' AND '.join(partes)
+
+
+def buscar_texto(queryset, terminos):
+    """
+    Filtra el queryset por los terminos {columna: texto} usando el indice FTS5
+    y ordena por relevancia (bm25). Si no hay indice (otra base de datos)
+    se usa icontains como antes.
+    """
+    terminos = {columna: texto for columna, texto in terminos.items() if texto}
+    if not terminos:
+        return queryset
+
+    modelo = queryset.model
+    if not indice_disponible(modelo):
+        for columna, texto in terminos.items():
+            queryset = queryset.filter(**{f'{columna}__icontains': texto})
+        return queryset
+
+    return filtrar_fts(queryset, expresion_fts(terminos))
+
+
+def buscar_prefijos(queryset, columnas, texto):
+    """
+    Filtra el queryset a las filas en las que cada palabra de texto es el
+    principio de alguna de las columnas ("leo mes" encuentra "Leo Messi").
+    Usa el indice FTS5 si existe y si no icontains.
+    """
+    palabras = re.findall(r'\w+', texto or '')
+    if not palabras:
+        return queryset
+
+    if not indice_disponible(queryset.model):
+        for palabra in palabras:
+            condicion = Q()
+            for columna in columnas:
+                condicion |= Q(**{f'{columna}__icontains': palabra})
+            queryset = queryset.filter(condicion)
+        return queryset
+
+    # {nombre apellido} : "leo"* -> "leo" como prefijo en cualquiera de las columnas
+    grupo = '{' + ' '.join(columnas) + '}'
+    return filtrar_fts(queryset, ' AND '.join(f'{grupo} : "{palabra}"*' for palabra in palabras))
+
+
+def filtrar_fts(queryset, expresion):
+    # Une la tabla FTS del modelo y ordena por relevancia
+    if not expresion:
+        return queryset.none()
+    modelo = queryset.model
+    fts = tabla_fts(modelo)
+    return queryset.extra(
+        tables=[fts],
+        where=[f'{fts}.rowid = {modelo._meta.db_table}.id', f'{fts} MATCH %s'],
+        params=[expresion],
+        order_by=[f'{fts}.rank'],
+    )
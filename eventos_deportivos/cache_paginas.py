@@ -0,0 +1,184 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.core.checks import Error, Tags, register
+from django.db import transaction
+from django.template.loader import get_template
+from django.views.decorators.http import condition
+
+from .replicas import lectura_en_replica
+
+# ----------------------------
+# Cache de paginas por version de modelo
+# Cada modelo tiene una version en la cache (la hora de su ultimo cambio)
+# que las señales de signals.py renuevan al guardar, borrar o cambiar una
+# relacion ManyToMany. Los fragmentos cacheados ({% cachear %}) incluyen en
+# su clave las versiones de los modelos que muestran, asi una escritura
+# invalida solo las paginas que dependen del modelo cambiado.
+# ----------------------------
+
+# Segundos que se guarda un fragmento aunque no cambie ningun modelo
+TIEMPO_FRAGMENTO = 600
+
+# Se pone en lugar del token CSRF al guardar el fragmento y se sustituye
+# por el token de cada peticion al servirlo
+SENTINELA_CSRF = 'CSRF-CACHEADO'
+
+# Caches que solo ve el proceso que las escribe
+CACHES_DE_PROCESO = ['django.core.cache.backends.locmem.LocMemCache']
+
+# Modelos cuyas escrituras cambian la version (nombres de _meta.model_name)
+MODELOS_VERSIONADOS = [
+    'usuario', 'arbitro', 'estadisticasjugador', 'jugador', 'equipo', 'equipojugador',
+    'estadio', 'torneo', 'partido', 'clasificacion', 'sponsor', 'premio',
+]
+
+
+def clave_version(modelo):
+    return f'version:{modelo}'
+
+
+def versiones(*modelos):
+    """
+    Devuelve las versiones de los modelos indicados. Si alguna no esta en
+    la cache (primer uso o expulsada) se crea con la hora actual.
+    """
+    claves = [clave_version(modelo) for modelo in modelos]
+    valores = cache.get_many(claves)
+    for clave in claves:
+        if clave not in valores:
+            ahora = time.time()
+            # add no pisa la version que haya guardado otro proceso mientras tanto
+            cache.add(clave, ahora, None)
+            valores[clave] = cache.get(clave, ahora)
+    return [valores[clave] for clave in claves]
+
+
+@register(Tags.caches)
+def comprobar_cache_compartida(app_configs, **kwargs):
+    """
+    Con una cache por proceso, subir_version solo invalida la copia del
+    proceso que escribe: los demas seguirian sirviendo fragmentos y 304 de
+    antes del cambio, sin caducar. Fuera de DEBUG es un error de check.
+    """
+    backend = settings.CACHES.get(DEFAULT_CACHE_ALIAS, {}).get('BACKEND')
+    if settings.DEBUG or backend not in CACHES_DE_PROCESO:
+        return []
+    return [Error(
+        f'La cache por defecto ({backend}) no se comparte entre procesos.',
+        hint='Define CACHE_URL con una cache compartida, ej: redis://127.0.0.1:6379/1 o filecache:///var/tmp/django_cache.',
+        id='eventos_deportivos.E001',
+    )]
+
+
+def subir_version(modelo):
+    # Al confirmar la transaccion, para no cachear datos sin guardar
+    transaction.on_commit(lambda: cache.set(clave_version(modelo), time.time(), None))
+
+
+def rol_peticion(request):
+    # Las plantillas cambian segun los grupos (es_manager / es_arbitro)
+    usuario = getattr(request, 'user', None)
+    if usuario is None or not usuario.is_authenticated:
+        return 'anonimo'
+    return 'grupos:' + ','.join(usuario.nombres_grupos())
+
+
+def clave_fragmento(nombre, request, modelos):
+    # URL + parametros GET + rol + versiones de los modelos
+    firma = f'{request.get_full_path()}|{rol_peticion(request)}|{versiones(*modelos)}'
+    return f'fragmento:{nombre}:{hashlib.md5(firma.encode()).hexdigest()}'
+
+
+def fragmentos_guardados(request, plantilla):
+    """
+    True si todos los fragmentos {% cachear %} de la plantilla estan en la
+    cache para esta peticion, es decir, si la vista no necesita consultar
+    sus datos. Lo usan las vistas async, que no cargan datos perezosos.
+    """
+    from .templatetags.cache_paginas import NodoCachear
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    nodos = get_template(plantilla).template.nodelist.get_nodes_by_type(NodoCachear)
+    claves = [clave_fragmento(nodo.nombre, request, nodo.modelos) for nodo in nodos]
+    return bool(claves) and len(cache.get_many(claves)) == len(claves)
+
+
+# ----------------------------
+# Peticiones condicionales (ETag / Last-Modified)
+# Se calculan con las mismas versiones, antes de ejecutar la vista: si el
+# cliente ya tiene la version actual se responde 304 sin consultar nada.
+# ----------------------------
+def identidad_peticion(request):
+    # La cabecera de base.html y los tokens CSRF dependen del usuario y su sesion
+    usuario = getattr(request, 'user', None)
+    sesion = getattr(request, 'session', None)
+    return '|'.join([
+        str(usuario.pk) if usuario is not None and usuario.is_authenticated else '',
+        (sesion.session_key or '') if sesion is not None else '',
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        rol_peticion(request),
+    ])
+
+
+def mensajes_pendientes(request):
+    almacen = getattr(request, '_messages', None)
+    return almacen is not None and len(almacen) > 0
+
+
+def precargar_peticion(request):
+    """
+    Carga el usuario, sus grupos y los mensajes (sesion y base de datos).
+    Las vistas async lo hacen en un hilo antes de calcular el ETag; despues
+    ya estan en memoria y se pueden leer desde el bucle de eventos.
+    """
+    rol_peticion(request)
+    mensajes_pendientes(request)
+
+
+def condicional(*modelos):
+    """
+    Decorador para vistas de lectura. Añade ETag y Last-Modified a partir
+    de las versiones de los modelos indicados y responde 304 si el cliente
+    ya tiene esa version. Tambien acepta una funcion que recibe los
+    argumentos de la URL y devuelve los modelos (o None).
+    Funciona con vistas sincronas y async.
+    """
+    def modelos_de(kwargs):
+        if len(modelos) == 1 and callable(modelos[0]):
+            return modelos[0](**kwargs)
+        return modelos
+
+    def etag(request, *args, **kwargs):
+        lista = modelos_de(kwargs)
+        if not lista or mensajes_pendientes(request) or lectura_en_replica():
+            return None
+        firma = f'{request.get_full_path()}|{identidad_peticion(request)}|{versiones(*lista)}'
+        return hashlib.md5(firma.encode()).hexdigest()
+
+    def ultima_modificacion(request, *args, **kwargs):
+        # Solo para anonimos: con If-Modified-Since sin ETag no se distingue
+        # la copia de otro usuario (ej: la pagina de antes de cerrar sesion)
+        lista = modelos_de(kwargs)
+        if not lista or request.user.is_authenticated or mensajes_pendientes(request) or lectura_en_replica():
+            return None
+        return datetime.fromtimestamp(max(versiones(*lista)), tz=timezone.utc)
+
+    def decorador(vista):
+        vista_condicional = condition(etag_func=etag, last_modified_func=ultima_modificacion)(vista)
+        if not iscoroutinefunction(vista):
+            return vista_condicional
+
+        @wraps(vista)
+        async def vista_async(request, *args, **kwargs):
+            await sync_to_async(precargar_peticion)(request)
+            return await vista_condicional(request, *args, **kwargs)
+        return vista_async
+
+    return decorador
@@ -0,0 +1,153 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Sum, Count, Case, When, IntegerField
+
+from .models import Partido, Clasificacion
+from .cache_paginas import subir_version
+
+PUNTOS_VICTORIA = 3
+PUNTOS_EMPATE = 1
+
+CAMPOS = ['jugados', 'ganados', 'empatados', 'perdidos',
+          'goles_favor', 'goles_contra', 'diferencia_goles', 'puntos']
+
+
+def fila_equipo(favor, contra):
+    # Lo que suma un partido a la fila de un equipo
+    fila = Counter(jugados=1, goles_favor=favor, goles_contra=contra, diferencia_goles=favor - contra)
+    if favor > contra:
+        fila['ganados'] += 1
+        fila['puntos'] += PUNTOS_VICTORIA
+    elif favor == contra:
+        fila['empatados'] += 1
+        fila['puntos'] += PUNTOS_EMPATE
+    else:
+        fila['perdidos'] += 1
+    return fila
+
+
+def contribuciones(partido):
+    # Devuelve {equipo_id: Counter} con lo que aporta el partido a la tabla
+    if partido.goles_local is None or partido.goles_visitante is None:
+        return {}
+    resultado = {}
+    for equipo_id, favor, contra in (
+        (partido.equipo_local_id, partido.goles_local, partido.goles_visitante),
+        (partido.equipo_visitante_id, partido.goles_visitante, partido.goles_local),
+    ):
+        resultado.setdefault(equipo_id, Counter()).update(fila_equipo(favor, contra))
+    return resultado
+
+
+def aplicar_partido(partido, signo=1):
+    """
+    Suma (signo=1) o resta (signo=-1) un partido en la clasificacion de su
+    torneo con UPDATE ... SET campo = campo + n, sin recalcular nada.
+    """
+    filas = contribuciones(partido)
+    if not filas:
+        return
+    if signo > 0:
+        # Crea las filas que falten en una sola sentencia
+        Clasificacion.con_eliminados.bulk_create(
+            [Clasificacion(torneo_id=partido.torneo_id, equipo_id=equipo_id) for equipo_id in filas],
+            ignore_conflicts=True,
+        )
+    for equipo_id, valores in filas.items():
+        Clasificacion.con_eliminados.filter(torneo_id=partido.torneo_id, equipo_id=equipo_id).update(
+            **{campo: F(campo) + signo * valor for campo, valor in valores.items()}
+        )
+    if signo < 0:
+        # Un equipo sin partidos en el torneo deja de aparecer en la tabla
+        Clasificacion.con_eliminados.filter(torneo_id=partido.torneo_id, equipo_id__in=filas, jugados=0).delete()
+
+
+def restar_partidos(partidos):
+    """
+    Resta de la clasificacion todos los partidos de un queryset (los de un
+    equipo o torneo que se elimina). Las filas afectadas se leen una vez:
+    las que se quedan sin partidos se borran y el resto se escribe con un
+    upsert, en lugar de un UPDATE por partido o por fila.
+    """
+    filas = {}
+    for partido in partidos.filter(goles_local__isnull=False, goles_visitante__isnull=False).only(
+        'torneo_id', 'equipo_local_id', 'equipo_visitante_id', 'goles_local', 'goles_visitante'
+    ).iterator():
+        for equipo_id, valores in contribuciones(partido).items():
+            filas.setdefault((partido.torneo_id, equipo_id), Counter()).update(valores)
+    if not filas:
+        return
+
+    actuales = Clasificacion.con_eliminados.select_for_update().filter(
+        torneo_id__in={torneo_id for torneo_id, _ in filas},
+        equipo_id__in={equipo_id for _, equipo_id in filas},
+    ).values_list('id', 'torneo_id', 'equipo_id', *CAMPOS)
+    vacias = []
+    objetos = []
+    for pk, torneo_id, equipo_id, *valores in actuales:
+        resta = filas.get((torneo_id, equipo_id))
+        if resta is None:
+            continue
+        fila = {campo: valor - resta[campo] for campo, valor in zip(CAMPOS, valores)}
+        if fila['jugados'] <= 0:
+            # Un equipo sin partidos en el torneo deja de aparecer en la tabla
+            vacias.append(pk)
+        else:
+            objetos.append(Clasificacion(id=pk, torneo_id=torneo_id, equipo_id=equipo_id, **fila))
+    Clasificacion.con_eliminados.filter(pk__in=vacias).delete()
+    Clasificacion.con_eliminados.bulk_create(objetos, update_conflicts=True, unique_fields=['id'], update_fields=CAMPOS)
+    subir_version('clasificacion')
+
+
+def actualizar_partido(anterior, partido):
+    # Cambia en la clasificacion la version anterior de un partido por la nueva
+    with transaction.atomic():
+        aplicar_partido(anterior, -1)
+        aplicar_partido(partido, 1)
+
+
+def reconstruir_clasificacion(modelo_partido=Partido, modelo_clasificacion=Clasificacion):
+    """
+    Recalcula la clasificacion de todos los torneos desde cero con una
+    consulta agrupada por cada lado (local / visitante).
+    Recibe los modelos para poder usarse tambien desde las migraciones.
+    """
+    filas = {}
+    jugados = modelo_partido.objects.filter(goles_local__isnull=False, goles_visitante__isnull=False)
+    for lado, favor, contra in (
+        ('equipo_local', 'goles_local', 'goles_visitante'),
+        ('equipo_visitante', 'goles_visitante', 'goles_local'),
+    ):
+        def contar(**condicion):
+            return Sum(Case(When(then=1, **condicion), default=0, output_field=IntegerField()))
+
+        grupos = jugados.values('torneo', lado).annotate(
+            jugados=Count('id'),
+            ganados=contar(**{f'{favor}__gt': F(contra)}),
+            empatados=contar(**{favor: F(contra)}),
+            perdidos=contar(**{f'{favor}__lt': F(contra)}),
+            goles_favor=Sum(favor),
+            goles_contra=Sum(contra),
+        ).order_by()
+        for grupo in grupos.iterator():
+            fila = filas.setdefault((grupo['torneo'], grupo[lado]), Counter())
+            fila.update({campo: grupo[campo] for campo in
+                         ('jugados', 'ganados', 'empatados', 'perdidos', 'goles_favor', 'goles_contra')})
+
+    objetos = []
+    for (torneo_id, equipo_id), fila in filas.items():
+        fila['diferencia_goles'] = fila['goles_favor'] - fila['goles_contra']
+        fila['puntos'] = fila['ganados'] * PUNTOS_VICTORIA + fila['empatados'] * PUNTOS_EMPATE
+        objetos.append(modelo_clasificacion(
+            torneo_id=torneo_id, equipo_id=equipo_id, **{campo: fila[campo] for campo in CAMPOS}
+        ))
+
+    with transaction.atomic():
+        # Borrado en una sola sentencia: delete() cargaria cada fila para
+        # enviar su post_delete, y aqui basta con subir la version una vez
+        todas = modelo_clasificacion._base_manager.all()
+        todas._raw_delete(todas.db)
+        modelo_clasificacion._base_manager.bulk_create(objetos, batch_size=1000)
+        subir_version(modelo_clasificacion._meta.model_name)
+    return len(objetos)
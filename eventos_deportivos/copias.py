@@ -0,0 +1,159 @@
+import gzip
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+
+# ----------------------------
+# Copias de seguridad en NDJSON comprimido
+# Un fichero <app>.<modelo>.ndjson.gz por modelo (incluidas las tablas
+# intermedias ManyToMany) con una fila JSON por linea, ordenadas por id,
+# y un manifiesto con el orden de restauracion, las filas y el sha256 de
+# cada fichero.
+# ----------------------------
+
+MANIFIESTO = 'manifiesto.json'
+NIVEL_GZIP = 6          # 9 comprime poco mas y tarda bastante mas
+TAMANO_BLOQUE = 5000    # filas que se leen de la base de datos por bloque
+
+# migrate crea estos modelos con ids que cambian de una base de datos a otra:
+# no se copian y las filas que apuntan a ellos guardan su clave natural
+NATURALES = ['contenttypes.contenttype', 'auth.permission']
+EXCLUIDOS = NATURALES + ['sessions.session']
+
+
+def etiqueta(modelo):
+    return modelo._meta.label_lower
+
+
+def dependencias(modelo):
+    return {etiqueta(campo.related_model) for campo in modelo._meta.concrete_fields if campo.is_relation}
+
+
+def modelos_copia():
+    """
+    Modelos que entran en la copia ordenados por dependencias: cada modelo
+    va despues de los modelos a los que apuntan sus claves ajenas.
+    """
+    pendientes = {
+        etiqueta(modelo): modelo for modelo in apps.get_models(include_auto_created=True)
+        if etiqueta(modelo) not in EXCLUIDOS and modelo._meta.managed and not modelo._meta.proxy
+    }
+    ordenados = []
+    while pendientes:
+        listos = sorted(
+            nombre for nombre, modelo in pendientes.items()
+            if all(d == nombre or d not in pendientes for d in dependencias(modelo))
+        )
+        if not listos:
+            raise ValueError('Dependencias circulares entre ' + ', '.join(sorted(pendientes)))
+        for nombre in listos:
+            ordenados.append(pendientes.pop(nombre))
+    return ordenados
+
+
+def campos_naturales(modelo):
+    return [campo for campo in modelo._meta.concrete_fields
+            if campo.is_relation and etiqueta(campo.related_model) in NATURALES]
+
+
+def claves_naturales(campo, using):
+    # {id: clave natural} del modelo al que apunta el campo (tablas pequeñas)
+    filas = campo.related_model._default_manager.db_manager(using).select_related()
+    return {fila.pk: list(fila.natural_key()) for fila in filas}
+
+
+def suma(ruta):
+    resumen = hashlib.sha256()
+    with open(ruta, 'rb') as fichero:
+        for bloque in iter(lambda: fichero.read(1024 * 1024), b''):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+
+# ----------------------------
+# Instantanea de la base de datos
+# Cada modelo se lee en su propio proceso: sin una instantanea comun, una
+# escritura durante la copia podria dejar filas hijas (un partido nuevo)
+# sin la fila padre (su equipo, ya copiado antes), y restaurar_copia
+# fallaria al comprobar las claves ajenas.
+# ----------------------------
+@contextmanager
+def instantanea(using, directorio):
+    """
+    Devuelve (alias, snapshot) para leer todos los modelos en el mismo
+    estado. SQLite: VACUUM INTO a un fichero temporal, que se registra como
+    otra base de datos y se borra al terminar. PostgreSQL: una transaccion
+    REPEATABLE READ abierta durante toda la copia y pg_export_snapshot(),
+    que cada proceso adopta con SET TRANSACTION SNAPSHOT.
+    Otras bases de datos: (using, None), sin instantanea.
+    """
+    conexion = connections[using]
+    if conexion.vendor == 'sqlite':
+        ruta = os.path.join(directorio, 'instantanea.sqlite3')
+        with conexion.cursor() as cursor:
+            cursor.execute('VACUUM INTO %s', [ruta])
+        alias = f'{using}_instantanea'
+        connections.settings[alias] = {**connections.settings[using], 'NAME': ruta}
+        try:
+            yield alias, None
+        finally:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+            os.remove(ruta)
+    elif conexion.vendor == 'postgresql':
+        # Conexion aparte, fuera de connections: los procesos hijos no la usan
+        exportadora = connections.create_connection(using)
+        try:
+            with exportadora.cursor() as cursor:
+                cursor.execute('BEGIN ISOLATION LEVEL REPEATABLE READ')
+                cursor.execute('SELECT pg_export_snapshot()')
+                yield using, cursor.fetchone()[0]
+        finally:
+            exportadora.close()
+    else:
+        yield using, None
+
+
+def copiar_modelo(tarea):
+    """
+    Escribe un modelo en su fichero. Se ejecuta en los procesos del pool,
+    cada uno con su propia conexion, y lee la tabla con iterator() para no
+    cargarla entera en memoria. Con snapshot (PostgreSQL) la transaccion
+    lee la instantanea comun de la copia.
+    """
+    nombre, directorio, using, snapshot = tarea
+    modelo = apps.get_model(nombre)
+    campos = [campo.attname for campo in modelo._meta.concrete_fields]
+    ruta = os.path.join(directorio, f'{nombre}.ndjson.gz')
+
+    filas = 0
+    with transaction.atomic(using=using):
+        if snapshot:
+            with connections[using].cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+                cursor.execute('SET TRANSACTION SNAPSHOT %s', [snapshot])
+        naturales = {campo.attname: claves_naturales(campo, using) for campo in campos_naturales(modelo)}
+        # _base_manager: todas las filas, aunque el manager por defecto filtre alguna
+        consulta = modelo._base_manager.using(using).order_by('pk').values_list(*campos)
+        with gzip.open(ruta, 'wt', encoding='utf-8', compresslevel=NIVEL_GZIP) as fichero:
+            for valores in consulta.iterator(chunk_size=TAMANO_BLOQUE):
+                fila = dict(zip(campos, valores))
+                for campo, claves in naturales.items():
+                    if fila[campo] is not None:
+                        fila[campo] = claves[fila[campo]]
+                fichero.write(json.dumps(fila, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+                filas += 1
+    return {'modelo': nombre, 'fichero': os.path.basename(ruta), 'filas': filas, 'sha256': suma(ruta)}
+
+
+def leer_modelo(ruta):
+    # Devuelve las filas del fichero una a una
+    with gzip.open(ruta, 'rt', encoding='utf-8') as fichero:
+        for linea in fichero:
+            yield json.loads(linea)
@@ -0,0 +1,216 @@
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Count
+
+from .models import EquipoJugador, EstadisticasJugador, EventoPartido, Partido, filtro_visibles
+from .cache_paginas import subir_version
+from .plantillas import identificador
+from .importar import upsert
+
+# Columna de EstadisticasJugador que suma cada tipo de evento
+CAMPOS = {
+    EventoPartido.ALINEACION: 'partidos_jugados',
+    EventoPartido.GOL: 'goles',
+    EventoPartido.ASISTENCIA: 'asistencias',
+    EventoPartido.TARJETA: 'tarjetas',
+}
+TIPOS = {nombre: tipo for tipo, nombre in EventoPartido.TIPOS}
+# Columna con el historico anterior a las actas de cada total
+BASES = {campo: f'{campo}_base' for campo in CAMPOS.values()}
+MINUTO_MAXIMO = 150
+
+
+class ActaNoValida(Exception):
+    # errores: [{'evento': indice, 'error': texto}]
+    def __init__(self, errores):
+        super().__init__(f'{len(errores)} eventos no validos')
+        self.errores = errores
+
+
+# ----------------------------
+# Totales de EstadisticasJugador a partir de los eventos
+# Igual que la clasificacion: cada cambio del acta suma o resta lo que
+# aporta con UPDATE ... SET campo = campo + n, y reconstruir_estadisticas
+# lo recalcula todo como el historico (_base) mas los eventos. Solo
+# cuentan los partidos visibles.
+# ----------------------------
+def contribuciones(eventos):
+    # eventos: (estadisticas_id, tipo). Devuelve {estadisticas_id: Counter}
+    resultado = {}
+    for estadisticas_id, tipo in eventos:
+        resultado.setdefault(estadisticas_id, Counter())[CAMPOS[tipo]] += 1
+    return resultado
+
+
+def aplicar_contribuciones(filas, signo=1):
+    """
+    Suma (signo=1) o resta (signo=-1) {estadisticas_id: {campo: n}}. Los
+    jugadores con el mismo incremento se actualizan con un solo UPDATE: un
+    acta completa son unas pocas sentencias, no una por evento.
+    """
+    grupos = {}
+    for estadisticas_id, valores in filas.items():
+        incremento = frozenset((campo, n) for campo, n in valores.items() if n)
+        if incremento:
+            grupos.setdefault(incremento, []).append(estadisticas_id)
+    for incremento, ids in grupos.items():
+        EstadisticasJugador.objects.filter(id__in=ids).update(
+            **{campo: F(campo) + signo * n for campo, n in incremento}
+        )
+    if grupos:
+        subir_version('estadisticasjugador')
+
+
+def eventos_partido(partido):
+    # (estadisticas_id, tipo) de los eventos guardados del partido
+    return list(EventoPartido.objects.filter(partido_id=partido.pk).values_list('jugador__estadisticas_id', 'tipo'))
+
+
+def restar_actas(partidos):
+    """
+    Resta de los totales las actas de un queryset de partidos (al
+    eliminarlos). Los eventos se cuentan con una consulta agrupada por
+    jugador y tipo; al ser casi siempre incrementos distintos, los totales
+    se leen bloqueados y se escriben con un upsert, como al reconstruir.
+    """
+    filas = {}
+    grupos = EventoPartido.objects.filter(partido__in=partidos).values(
+        'jugador__estadisticas', 'tipo'
+    ).annotate(n=Count('id')).order_by()
+    for grupo in grupos.iterator():
+        filas.setdefault(grupo['jugador__estadisticas'], Counter())[CAMPOS[grupo['tipo']]] += grupo['n']
+    if not filas:
+        return
+
+    actuales = EstadisticasJugador.objects.select_for_update().filter(id__in=filas).values_list('id', *CAMPOS.values())
+    objetos = []
+    for estadisticas_id, *valores in actuales:
+        resta = filas[estadisticas_id]
+        objetos.append(EstadisticasJugador(id=estadisticas_id, **{
+            campo: valor - resta[campo] for campo, valor in zip(CAMPOS.values(), valores)
+        }))
+    upsert(EstadisticasJugador, objetos, list(CAMPOS.values()))
+    subir_version('estadisticasjugador')
+
+
+# ----------------------------
+# Acta de un partido
+# Cada evento es un dict {jugador, tipo, minuto}; tipo es alineacion, gol,
+# asistencia o tarjeta. El acta sustituye a la anterior del partido y los
+# totales cambian solo en la diferencia.
+# ----------------------------
+def convertir(evento):
+    # Devuelve (jugador, tipo, minuto)
+    if not isinstance(evento, dict):
+        raise ValidationError('El evento no es un objeto')
+    tipo = TIPOS.get(evento.get('tipo'))
+    if tipo is None:
+        raise ValidationError(f"tipo: debe ser {', '.join(TIPOS)}")
+    minuto = evento.get('minuto')
+    if minuto is not None and (isinstance(minuto, bool) or not isinstance(minuto, int)
+                               or not 0 <= minuto <= MINUTO_MAXIMO):
+        raise ValidationError(f'minuto: debe ser un numero entre 0 y {MINUTO_MAXIMO}')
+    return identificador(evento, 'jugador'), tipo, minuto
+
+
+def validar_acta(partido, eventos):
+    errores = []
+    validos = []
+    for numero, evento in enumerate(eventos):
+        try:
+            validos.append((numero, convertir(evento)))
+        except ValidationError as error:
+            errores.append({'evento': numero, 'error': ' '.join(error.messages)})
+
+    # Los jugadores de las plantillas de los dos equipos, en una consulta
+    plantillas = dict(EquipoJugador.objects.filter(
+        jugador_id__in={jugador for _, (jugador, _, _) in validos},
+        equipo_id__in=[partido.equipo_local_id, partido.equipo_visitante_id],
+    ).values_list('jugador_id', 'jugador__estadisticas_id'))
+
+    alineados = {jugador for _, (jugador, tipo, _) in validos if tipo == EventoPartido.ALINEACION}
+    vistos = set()
+    for numero, (jugador, tipo, _) in validos:
+        if jugador not in plantillas:
+            error = f'El jugador {jugador} no esta en la plantilla de ninguno de los dos equipos'
+        elif jugador not in alineados:
+            error = f'El jugador {jugador} no esta alineado en el partido'
+        elif tipo == EventoPartido.ALINEACION and jugador in vistos:
+            error = f'El jugador {jugador} ya esta alineado en el acta'
+        else:
+            if tipo == EventoPartido.ALINEACION:
+                vistos.add(jugador)
+            continue
+        errores.append({'evento': numero, 'error': error})
+
+    if errores:
+        raise ActaNoValida(sorted(errores, key=lambda e: e['evento']))
+    return [(jugador, plantillas[jugador], tipo, minuto) for _, (jugador, tipo, minuto) in validos]
+
+
+def registrar_acta(partido, eventos):
+    """
+    Valida y guarda el acta de un partido en lugar de la que tuviera. Si
+    algun evento no es valido lanza ActaNoValida y no se escribe nada.
+    Devuelve {'eventos': n, 'jugadores': jugadores cuyos totales cambian}.
+    """
+    eventos = validar_acta(partido, eventos)
+
+    with transaction.atomic():
+        # Dos actas del mismo partido a la vez no pueden restar la misma anterior
+        list(Partido._base_manager.select_for_update().filter(pk=partido.pk).values_list('pk'))
+        anteriores = contribuciones(eventos_partido(partido))
+        nuevas = contribuciones((estadisticas, tipo) for _, estadisticas, tipo, _ in eventos)
+
+        # Borrado en una sola sentencia, como en plantillas.py
+        viejos = EventoPartido.objects.filter(partido_id=partido.pk)
+        viejos._raw_delete(viejos.db)
+        EventoPartido.objects.bulk_create([
+            EventoPartido(partido_id=partido.pk, jugador_id=jugador, tipo=tipo, minuto=minuto)
+            for jugador, _, tipo, minuto in eventos
+        ])
+
+        # Solo la diferencia entre el acta anterior y la nueva
+        diferencia = {}
+        for estadisticas_id in anteriores.keys() | nuevas.keys():
+            cambio = nuevas.get(estadisticas_id, Counter())
+            cambio.subtract(anteriores.get(estadisticas_id, Counter()))
+            if any(cambio.values()):
+                diferencia[estadisticas_id] = cambio
+        aplicar_contribuciones(diferencia)
+
+    return {'eventos': len(eventos), 'jugadores': len(diferencia)}
+
+
+def reconstruir_estadisticas():
+    """
+    Recalcula los totales de todos los jugadores: su historico (_base) mas
+    los eventos, contados con una consulta agrupada por cada tipo de
+    evento. Devuelve cuantas filas de estadisticas tienen algun evento.
+    """
+    eventos = EventoPartido.objects.filter(
+        **{f'partido__{campo}': valor for campo, valor in filtro_visibles(Partido).items()}
+    )
+    totales = {}
+    for tipo, campo in CAMPOS.items():
+        grupos = eventos.filter(tipo=tipo).values('jugador__estadisticas').annotate(total=Count('id')).order_by()
+        for grupo in grupos.iterator():
+            totales.setdefault(grupo['jugador__estadisticas'], {})[campo] = grupo['total']
+
+    with transaction.atomic():
+        objetos = []
+        filas = EstadisticasJugador.objects.values_list('id', *BASES.values())
+        for estadisticas_id, *historico in filas.iterator(chunk_size=5000):
+            eventos_fila = totales.get(estadisticas_id, {})
+            valores = {}
+            for (campo, base), previo in zip(BASES.items(), historico):
+                valores[base] = previo
+                valores[campo] = previo + eventos_fila.get(campo, 0)
+            objetos.append(EstadisticasJugador(id=estadisticas_id, **valores))
+        # Todas las filas existen: el upsert es un UPDATE por lotes sin los
+        # CASE WHEN de bulk_update, que cuestan mas en Python que en la base de datos
+        upsert(EstadisticasJugador, objetos, list(CAMPOS.values()))
+        subir_version('estadisticasjugador')
+    return len(totales)
@@ -0,0 +1,113 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import *
+from .forms import *
+from .filtros import *
+
+# Filas que se leen de la base de datos en cada bloque del iterador
+TAMANO_BLOQUE = 2000
+
+# ----------------------------
+# Entidades exportables
+# Cada entrada indica los modelos de los que depende (para el ETag), el
+# queryset base, las columnas (rutas de values_list, que generan los mismos
+# JOIN que los select_related de las listas) y el formulario de busqueda
+# con su filtro.
+# ----------------------------
+EXPORTACIONES = {
+    'jugadores': {
+        'modelos': ['jugador', 'estadisticasjugador'],
+        'queryset': lambda: Jugador.objects.all(),
+        'columnas': [
+            'id', 'nombre', 'apellido', 'fecha_nacimiento', 'posicion',
+            'estadisticas__partidos_jugados', 'estadisticas__goles',
+            'estadisticas__asistencias', 'estadisticas__tarjetas',
+        ],
+        'formulario': BusquedaJugadorForm,
+        'filtro': filtrar_jugadores,
+    },
+    'equipos': {
+        'modelos': ['equipo', 'estadio'],
+        'queryset': lambda: Equipo.objects.all(),
+        'columnas': [
+            'id', 'nombre', 'ciudad', 'fundacion', 'activo',
+            'estadio_principal__nombre',
+        ],
+        'formulario': BusquedaEquipoForm,
+        'filtro': filtrar_equipos,
+    },
+    'partidos': {
+        'modelos': ['partido', 'equipo', 'torneo'],
+        'queryset': lambda: Partido.objects.all(),
+        'columnas': [
+            'id', 'fecha', 'equipo_local__nombre', 'equipo_visitante__nombre',
+            'goles_local', 'goles_visitante', 'torneo__nombre',
+        ],
+        'formulario': BusquedaPartidoForm,
+        'filtro': filtrar_partidos,
+    },
+    'torneos': {
+        'modelos': ['torneo', 'arbitro'],
+        'queryset': lambda: Torneo.objects.all(),
+        'columnas': [
+            'id', 'nombre', 'pais', 'fecha_inicio', 'fecha_fin',
+            'arbitro_principal__licencia',
+        ],
+        'formulario': BusquedaTorneoForm,
+        'filtro': filtrar_torneos,
+    },
+    'sponsors': {
+        'modelos': ['sponsor'],
+        'queryset': lambda: Sponsor.objects.all(),
+        'columnas': ['id', 'nombre', 'monto', 'pais'],
+        'formulario': BusquedaSponsorForm,
+        'filtro': filtrar_sponsors,
+    },
+    'estadios': {
+        'modelos': ['estadio'],
+        'queryset': lambda: Estadio.objects.all(),
+        'columnas': ['id', 'nombre', 'ciudad', 'capacidad', 'cubierto', 'imagen'],
+        'formulario': BusquedaEstadioForm,
+        'filtro': filtrar_estadios,
+    },
+    'premios': {
+        'modelos': ['premio', 'torneo', 'equipo'],
+        'queryset': lambda: Premio.objects.all(),
+        'columnas': ['id', 'nombre', 'monto', 'torneo__nombre', 'ganador__nombre'],
+        'formulario': None,
+        'filtro': None,
+    },
+}
+
+
+class Eco:
+    # Objeto tipo fichero que devuelve lo que se escribe en vez de guardarlo,
+    # asi csv.writer produce cada linea sin acumular nada en memoria.
+    def write(self, valor):
+        return valor
+
+
+def filas(queryset, columnas):
+    # Recorre el queryset por bloques sin cachear los resultados
+    return queryset.values_list(*columnas).order_by('id').iterator(chunk_size=TAMANO_BLOQUE)
+
+
+def generar_csv(queryset, columnas):
+    escritor = csv.writer(Eco())
+    yield escritor.writerow(columnas)
+    for fila in filas(queryset, columnas):
+        yield escritor.writerow(fila)
+
+
+def generar_ndjson(queryset, columnas):
+    for fila in filas(queryset, columnas):
+        yield json.dumps(dict(zip(columnas, fila)), cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+GENERADORES = {
+    'csv': (generar_csv, 'text/csv; charset=utf-8'),
+    'ndjson': (generar_ndjson, 'application/x-ndjson; charset=utf-8'),
+}
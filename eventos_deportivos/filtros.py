@@ -0,0 +1,143 @@
+from django.db.models import Q
+
+from .busqueda import buscar_texto
+
+# ----------------------------
+# Filtros de los formularios Busqueda*Form
+# Se usan en las vistas *_buscar y en las exportaciones para que
+# ambas apliquen exactamente los mismos criterios.
+# Los campos de texto van por el indice FTS5 (ver busqueda.py).
+# ----------------------------
+
+
+def filtrar_jugadores(queryset, datos):
+    # datos = cleaned_data de BusquedaJugadorForm
+    if datos.get('posicionBusqueda'):
+        queryset = queryset.filter(posicion=datos['posicionBusqueda'])
+    return buscar_texto(queryset, {
+        'nombre': datos.get('nombreBusqueda'),
+        'apellido': datos.get('apellidoBusqueda'),
+    })
+
+
+def filtrar_equipos(queryset, datos):
+    # datos = cleaned_data de BusquedaEquipoForm
+    # '---------' es la opcion vacia del desplegable
+    if datos.get('activoBusqueda') in ('True', 'False'):
+        queryset = queryset.filter(activo=datos['activoBusqueda'] == 'True')
+    return buscar_texto(queryset, {
+        'nombre': datos.get('nombreBusqueda'),
+        'ciudad': datos.get('ciudadBusqueda'),
+    })
+
+
+def filtrar_estadios(queryset, datos):
+    # datos = cleaned_data de BusquedaEstadioForm
+    filtros = Q()
+    if datos.get('capacidadBusqueda'):
+        filtros &= Q(capacidad__lte=datos['capacidadBusqueda'])
+    if datos.get('cubiertoBusqueda') in ('True', 'False'):
+        filtros &= Q(cubierto=datos['cubiertoBusqueda'] == 'True')
+    return buscar_texto(queryset.filter(filtros), {
+        'nombre': datos.get('nombreBusqueda'),
+    })
+
+
+def filtrar_sponsors(queryset, datos):
+    # datos = cleaned_data de BusquedaSponsorForm
+    if datos.get('montoBusqueda') is not None:
+        queryset = queryset.filter(monto__lte=datos['montoBusqueda'])
+    return buscar_texto(queryset, {
+        'nombre': datos.get('nombreBusqueda'),
+        'pais': datos.get('paisBusqueda'),
+    })
+
+
+def filtrar_partidos(queryset, datos):
+    # datos = cleaned_data de BusquedaPartidoForm
+    filtros = Q()
+    if datos.get('desdeFechaBusqueda'):
+        filtros &= Q(fecha__gte=datos['desdeFechaBusqueda'])
+    if datos.get('hastaFechaBusqueda'):
+        filtros &= Q(fecha__lte=datos['hastaFechaBusqueda'])
+    if datos.get('torneoBusqueda'):
+        filtros &= Q(torneo=datos['torneoBusqueda'])
+    return queryset.filter(filtros)
+
+
+def filtrar_torneos(queryset, datos):
+    # datos = cleaned_data de BusquedaTorneoForm
+    if datos.get('fechaDesdeBusqueda'):
+        queryset = queryset.filter(fecha_inicio__gte=datos['fechaDesdeBusqueda'])
+    return buscar_texto(queryset, {
+        'nombre': datos.get('nombreBusqueda'),
+        'pais': datos.get('paisBusqueda'),
+    })
+
+
+# ----------------------------
+# Texto con los filtros aplicados que muestran las vistas *_buscar
+# ----------------------------
+
+
+def texto_filtros_jugadores(datos):
+    filtros_aplicados = []
+    if datos.get('nombreBusqueda'):
+        filtros_aplicados.append(f"Nombre contiene '{datos['nombreBusqueda']}'")
+    if datos.get('apellidoBusqueda'):
+        filtros_aplicados.append(f"Apellido contiene '{datos['apellidoBusqueda']}'")
+    filtros_aplicados.append(f"Posicion = '{datos.get('posicionBusqueda')}'")
+    return " | ".join(filtros_aplicados)
+
+
+def texto_filtros_equipos(datos):
+    filtros_aplicados = []
+    if datos.get('nombreBusqueda'):
+        filtros_aplicados.append(f"Nombre contiene '{datos['nombreBusqueda']}'")
+    if datos.get('ciudadBusqueda'):
+        filtros_aplicados.append(f"Ciudad contiene '{datos['ciudadBusqueda']}'")
+    filtros_aplicados.append(f"Activo= '{datos.get('activoBusqueda')}'")
+    return " | ".join(filtros_aplicados)
+
+
+def texto_filtros_estadios(datos):
+    filtros_aplicados = []
+    if datos.get('nombreBusqueda'):
+        filtros_aplicados.append(f"Nombre contiene '{datos['nombreBusqueda']}'")
+    if datos.get('capacidadBusqueda'):
+        filtros_aplicados.append(f"Capacidad contiene '{datos['capacidadBusqueda']}'")
+    filtros_aplicados.append(f"Cubierto= '{datos.get('cubiertoBusqueda')}'")
+    return " | ".join(filtros_aplicados)
+
+
+def texto_filtros_sponsors(datos):
+    filtros_aplicados = []
+    if datos.get('nombreBusqueda'):
+        filtros_aplicados.append(f"Nombre contiene '{datos['nombreBusqueda']}'")
+    if datos.get('montoBusqueda') is not None:
+        filtros_aplicados.append(f"Monto <= '{datos['montoBusqueda']}'")
+    if datos.get('paisBusqueda'):
+        filtros_aplicados.append(f"Pais contiene '{datos['paisBusqueda']}'")
+    return " | ".join(filtros_aplicados)
+
+
+def texto_filtros_partidos(datos):
+    filtros_aplicados = []
+    if datos.get('hastaFechaBusqueda'):
+        filtros_aplicados.append(f"fecha hasta: '{datos['hastaFechaBusqueda']}'")
+    if datos.get('desdeFechaBusqueda'):
+        filtros_aplicados.append(f"fecha desde: '{datos['desdeFechaBusqueda']}'")
+    if datos.get('torneoBusqueda'):
+        filtros_aplicados.append(f"torneo: '{datos['torneoBusqueda']}'")
+    return " | ".join(filtros_aplicados)
+
+
+def texto_filtros_torneos(datos):
+    filtros_aplicados = []
+    if datos.get('paisBusqueda'):
+        filtros_aplicados.append(f"País = '{datos['paisBusqueda']}'")
+    if datos.get('fechaDesdeBusqueda'):
+        filtros_aplicados.append(f"Fecha desde = '{datos['fechaDesdeBusqueda']}'")
+    if datos.get('nombreBusqueda'):
+        filtros_aplicados.append(f"Nombre = '{datos['nombreBusqueda']}'")
+    return " | ".join(filtros_aplicados)
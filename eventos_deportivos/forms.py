@@ -1,28 +1,78 @@
+from contextlib import contextmanager
+
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
+from django.db import IntegrityError, transaction
+from django.urls import reverse_lazy
 from .models import *
+from .widgets import SelectPerezoso, SelectMultiplePerezoso
 
 # Create your forms here.
 
+# ----------------------------
+# Unicidad comprobada por la base de datos
+# Las UniqueConstraint de los modelos no se comprueban con una consulta
+# antes de guardar: el INSERT/UPDATE ya consulta el indice unico. Si falla,
+# el IntegrityError se convierte en los errores de campo del formulario.
+# ----------------------------
+
+
+def restriccion_violada(error, modelo):
+    # Nombre de la restriccion unica que ha fallado o None
+    causa = getattr(getattr(error.__cause__, 'diag', None), 'constraint_name', None)
+    if causa:
+        return causa    # PostgreSQL
+    # SQLite: "UNIQUE constraint failed: index 'nombre'" con expresiones
+    # o "UNIQUE constraint failed: tabla.columna, ..." con campos
+    texto = str(error)
+    for restriccion in modelo._meta.constraints:
+        if f"'{restriccion.name}'" in texto:
+            return restriccion.name
+        columnas = [modelo._meta.get_field(campo).column for campo in restriccion.fields]
+        if columnas and texto.endswith(', '.join(f'{modelo._meta.db_table}.{c}' for c in columnas)):
+            return restriccion.name
+    return None
+
+
+class UnicidadMixin:
+    # nombre de la restriccion -> {campo: mensaje}
+    errores_unicidad = {}
+
+    def _post_clean(self):
+        # full_clean haria un exists() por cada restriccion de errores_unicidad
+        instancia = self.instance
+        todas = instancia.get_constraints
+        instancia.get_constraints = lambda: [
+            (modelo, [r for r in restricciones if r.name not in self.errores_unicidad])
+            for modelo, restricciones in todas()
+        ]
+        try:
+            super()._post_clean()
+        finally:
+            del instancia.get_constraints
+
+    @contextmanager
+    def unicidad(self):
+        """
+        Ejecuta el bloque en una transaccion. Si una restriccion de
+        errores_unicidad falla, se deshace, se añaden sus errores al
+        formulario (is_valid() pasa a ser False) y el bloque termina sin
+        excepcion; cualquier otro error se propaga.
+        """
+        try:
+            with transaction.atomic():
+                yield
+        except IntegrityError as error:
+            nombre = restriccion_violada(error, self._meta.model)
+            if nombre not in self.errores_unicidad:
+                raise
+            for campo, mensaje in self.errores_unicidad[nombre].items():
+                self.add_error(campo, mensaje)
+
+
 # Jugador Create   
-class JugadorModelForm(forms.ModelForm):
-    # Campos de estadísticas que NO están en Jugador
-    partidos_jugados = forms.IntegerField(
-        label="Partidos Jugados",
-        widget=forms.NumberInput(attrs={'class': 'form-control'})
-    )
-    goles = forms.IntegerField(
-        label="Goles",
-        widget=forms.NumberInput(attrs={'class': 'form-control'}) 
-    )
-    asistencias = forms.IntegerField(
-        label="Asistencias",
-        widget=forms.NumberInput(attrs={'class': 'form-control'})
-    )
-    tarjetas = forms.IntegerField(
-        label="Tarjetas",
-        widget=forms.NumberInput(attrs={'class': 'form-control'})
-    )
+class JugadorModelForm(UnicidadMixin, forms.ModelForm):
+    # Las estadisticas no se escriben a mano: salen de las actas de los partidos
     
     class Meta:
         model = Jugador
@@ -44,22 +94,18 @@ class JugadorModelForm(forms.ModelForm):
         user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
         
-    def clean(self):
-        cleaned_data = super().clean()
-        nombre = cleaned_data.get('nombre')
-        apellido = cleaned_data.get('apellido')
-
-        if nombre and apellido:
-            # Comprueba si ya existe un jugador con los mismos datos ignorandose a si mismo
-            jugador_id = self.instance.id if self.instance else None
-            if Jugador.objects.filter(nombre=nombre, apellido=apellido).exclude(id=jugador_id).exists():
-                self.add_error('nombre',"Ya existe un jugador con ese nombre y apellido.")
-                self.add_error('apellido',"Ya existe un jugador con ese nombre y apellido.")
-        
-        return cleaned_data
+    # Nombre y apellido repetidos: lo comprueba la restriccion unica al guardar
+    errores_unicidad = {
+        'jugador_nombre_apellido_unica': {
+            'nombre': "Ya existe un jugador con ese nombre y apellido.",
+            'apellido': "Ya existe un jugador con ese nombre y apellido.",
+        },
+    }
 # Jugador buscar
 class BusquedaJugadorForm(forms.Form):
-    nombreBusqueda=forms.CharField(required=False)
+    nombreBusqueda=forms.CharField(required=False,
+        widget=forms.TextInput(attrs={'data-autocompletar': reverse_lazy('autocompletar_jugadores'), 'autocomplete': 'off'})
+    )
     apellidoBusqueda=forms.CharField(required=False)
     posicionBusqueda=forms.ChoiceField(choices=Jugador.POSICIONES,required=False)
     
@@ -85,10 +131,10 @@ class BusquedaJugadorForm(forms.Form):
         return cleaned_data
     
 # Equipo create
-class EquipoModelForm(forms.ModelForm):
+class EquipoModelForm(UnicidadMixin, forms.ModelForm):
     jugadores = forms.ModelMultipleChoiceField(
         queryset=Jugador.objects.all(),
-        widget=forms.SelectMultiple(attrs={'class': 'form-select'}),
+        widget=SelectMultiplePerezoso(reverse_lazy('opciones_jugadores'), attrs={'class': 'form-select'}),
         required=False
     )
 
@@ -114,24 +160,19 @@ class EquipoModelForm(forms.ModelForm):
         user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
 
-    def clean(self):
-        cleaned_data = super().clean()
-        nombre = cleaned_data.get('nombre')
-        ciudad = cleaned_data.get('ciudad')
-        
-
-        if nombre and ciudad:
-            # Comprueba si ya existe un equipo con los mismos datos ignorandose a si mismo
-            equipo_id = self.instance.id if self.instance else None
-            if Equipo.objects.filter(nombre=nombre, ciudad=ciudad).exclude(id=equipo_id).exists():
-                self.add_error('nombre',"Ya existe un equipo con ese nombre")
-                self.add_error('ciudad',"Ya existe un equipo con esta ciudad.")
-        
-        return cleaned_data
+    # Nombre y ciudad repetidos: lo comprueba la restriccion unica al guardar
+    errores_unicidad = {
+        'equipo_nombre_ciudad_unica': {
+            'nombre': "Ya existe un equipo con ese nombre",
+            'ciudad': "Ya existe un equipo con esta ciudad.",
+        },
+    }
     
 # Equipo buscar
 class BusquedaEquipoForm(forms.Form):
-    nombreBusqueda=forms.CharField(required=False)
+    nombreBusqueda=forms.CharField(required=False,
+        widget=forms.TextInput(attrs={'data-autocompletar': reverse_lazy('autocompletar_equipos'), 'autocomplete': 'off'})
+    )
     ciudadBusqueda=forms.CharField(required=False)
     opcionesBoolean = [
         ('---------', '---------'),
@@ -164,7 +205,7 @@ class BusquedaEquipoForm(forms.Form):
         return cleaned_data
     
 # Estadio create
-class EstadioModelForm(forms.ModelForm):
+class EstadioModelForm(UnicidadMixin, forms.ModelForm):
     class Meta:
         model = Estadio
         fields = ['nombre', 'ciudad', 'capacidad', 'cubierto', 'imagen']
@@ -183,23 +224,16 @@ class EstadioModelForm(forms.ModelForm):
             'imagen': forms.ClearableFileInput(attrs={'class': 'form-control'}),
         }
         
+    # Nombre y ciudad repetidos: lo comprueba la restriccion unica al guardar
+    errores_unicidad = {
+        'estadio_nombre_ciudad_unica': {
+            'nombre': "Ya existe un estadio con ese nombre en esa ciudad",
+        },
+    }
+
     def __init__(self, *args, **kwargs):
         user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
-        
-    def clean(self):
-        cleaned_data = super().clean()
-        nombre = cleaned_data.get('nombre')
-        ciudad = cleaned_data.get('ciudad')
-        
-
-        if nombre and ciudad:
-            # Comprueba si ya existe un estadio con los mismos datos ignorandose a si mismo
-            estadio_id = self.instance.id if self.instance else None
-            if Estadio.objects.filter(nombre=nombre, ciudad=ciudad).exclude(id=estadio_id).exists():
-                self.add_error('nombre',"Ya existe un estadio con ese nombre en esa ciudad")
-        
-        return cleaned_data
     
 # Estadio buscar
 class BusquedaEstadioForm(forms.Form):
@@ -235,7 +269,7 @@ class BusquedaEstadioForm(forms.Form):
         return cleaned_data
 
 # Sponsor create
-class SponsorModelForm(forms.ModelForm):
+class SponsorModelForm(UnicidadMixin, forms.ModelForm):
     class Meta:
         model = Sponsor
         fields = ['nombre', 'pais', 'monto', 'equipos']
@@ -257,18 +291,13 @@ class SponsorModelForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         if user:
             self.fields['equipos'].queryset = Equipo.objects.filter(creado_por=user)
-        
-    def clean(self):
-        cleaned_data = super().clean()
-        nombre = cleaned_data.get('nombre')
-        
-        if nombre:
-            # Comprueba si ya existe un sponsor con los mismos datos ignorandose a si mismo
-            sponsor_id = self.instance.id if self.instance else None
-            if Sponsor.objects.filter(nombre=nombre).exclude(id=sponsor_id).exists():
-                self.add_error('nombre',"Ya existe un sponsor con ese nombre")
-        
-        return cleaned_data
+
+    # Nombre repetido: lo comprueba la restriccion unica al guardar
+    errores_unicidad = {
+        'sponsor_nombre_unica': {
+            'nombre': "Ya existe un sponsor con ese nombre",
+        },
+    }
     
 # Sponsor buscar
 class BusquedaSponsorForm(forms.Form):
@@ -298,23 +327,25 @@ class BusquedaSponsorForm(forms.Form):
         return cleaned_data
     
 # Partido create
-class PartidoModelForm(forms.ModelForm):
+class PartidoModelForm(UnicidadMixin, forms.ModelForm):
     class Meta:
         model = Partido
-        fields = ['fecha', 'equipo_local', 'equipo_visitante', 'torneo', 'resultado']
+        fields = ['fecha', 'equipo_local', 'equipo_visitante', 'torneo', 'goles_local', 'goles_visitante']
         labels = {
             'fecha': 'fecha',
             'equipo local': 'equipo local',
             'equipo visitante': 'equipo visitante',
             'torneo': 'torneo',
-            'resultado': 'resultado',
+            'goles_local': 'goles local',
+            'goles_visitante': 'goles visitante',
         }
         widgets = {
             'fecha': forms.DateTimeInput(attrs={'type': 'datetime-local', 'class': 'form-control'},format='%Y-%m-%dT%H:%M'),
             'equipo_local': forms.Select(attrs={'class': 'form-control'}),
             'equipo_visitante': forms.Select(attrs={'class': 'form-control'}),
             'torneo': forms.Select(attrs={'class': 'form-control'}),
-            'resultado': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'x-x'}),
+            'goles_local': forms.NumberInput(attrs={'class': 'form-control', 'min': 0}),
+            'goles_visitante': forms.NumberInput(attrs={'class': 'form-control', 'min': 0}),
         }
 
     def __init__(self, *args, **kwargs):
@@ -325,25 +356,12 @@ class PartidoModelForm(forms.ModelForm):
             self.fields['equipo_visitante'].queryset = Equipo.objects.filter(creado_por=user)
             self.fields['torneo'].queryset = Torneo.objects.filter(creado_por=user)
 
-
-    def clean(self):
-        cleaned_data = super().clean()
-        fecha = cleaned_data.get('fecha')
-        resultado = cleaned_data.get('resultado')
-        
-        # Validacion de fecha: no puede repetirse
-        if fecha:
-            partido_id = self.instance.id if self.instance else None
-            if Partido.objects.filter(fecha=fecha).exclude(id=partido_id).exists():
-                self.add_error('fecha', "Ya existe un partido en esa fecha")
-        
-        # Validacion del resultado: debe tener formato x-x (ej: 2-1)
-        if resultado:
-            import re
-            if not re.match(r'^\d+-\d+$', resultado):
-                self.add_error('resultado', "El resultado debe tener el formato x-x (EJ: 2-1)")
-
-        return cleaned_data
+    # Fecha repetida: lo comprueba la restriccion unica al guardar
+    errores_unicidad = {
+        'partido_fecha_unica': {
+            'fecha': "Ya existe un partido en esa fecha",
+        },
+    }
 
 # Partido buscar
 class BusquedaPartidoForm(forms.Form):
@@ -358,7 +376,7 @@ class BusquedaPartidoForm(forms.Form):
     torneoBusqueda=forms.ModelChoiceField(
         Torneo.objects.all(),
         required=False,
-        widget=forms.Select(attrs={'class': 'form-control'}),
+        widget=SelectPerezoso(reverse_lazy('opciones_torneos'), attrs={'class': 'form-control'}),
     )
     
     def clean(self):
@@ -382,7 +400,7 @@ class BusquedaPartidoForm(forms.Form):
         return cleaned_data
     
 # Torneo create
-class TorneoModelForm(forms.ModelForm):
+class TorneoModelForm(UnicidadMixin, forms.ModelForm):
     class Meta:
         model = Torneo
         fields = ['nombre', 'pais', 'fecha_inicio', 'fecha_fin', 'arbitro_principal']
@@ -404,21 +422,20 @@ class TorneoModelForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
-        if user:
-            self.fields['arbitro_principal'].queryset = Arbitro.objects.filter(creado_por=user)
+        # Arbitro no tiene creado_por: se ofrecen todos los arbitros
+
+    # Nombre repetido: lo comprueba la restriccion unica al guardar
+    errores_unicidad = {
+        'torneo_nombre_unica': {
+            'nombre': "Ya existe un torneo con este nombre",
+        },
+    }
 
     def clean(self):
         cleaned_data = super().clean()
-        nombre = cleaned_data.get('nombre')
         fecha_inicio = cleaned_data.get('fecha_inicio')
         fecha_fin = cleaned_data.get('fecha_fin')
-        
-        # Validacion de fecha: no puede repetirse
-        if nombre:
-            torneo_id = self.instance.id if self.instance else None
-            if Torneo.objects.filter(nombre=nombre).exclude(id=torneo_id).exists():
-                self.add_error('nombre', "Ya existe un torneo con este nombre")
-            
+
         # Validacion: fecha_fin >= fecha_inicio
         if fecha_inicio and fecha_fin and fecha_fin < fecha_inicio:
             self.add_error('fecha_fin', "La fecha fin no puede ser anterior a la fecha inicio")
@@ -0,0 +1,359 @@
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.utils import timezone
+
+from .models import *
+from .cache_paginas import subir_version
+from .clasificacion import reconstruir_clasificacion
+
+# Filas que se leen de la base de datos en cada bloque al cargar los mapas
+TAMANO_BLOQUE = 5000
+
+VERDADERO = {'1', 't', 'true', 'si', 'sí', 'yes'}
+FALSO = {'0', 'f', 'false', 'no'}
+
+
+class FilaRechazada(Exception):
+    pass
+
+
+# ----------------------------
+# Lectura de ficheros
+# Cada lector devuelve (numero de linea, fila). En NDJSON la fila es el
+# texto de la linea, que se decodifica al convertirla para poder rechazar
+# solo esa linea si no es JSON valido.
+# ----------------------------
+def leer_csv(fichero):
+    lector = csv.DictReader(fichero)
+    for fila in lector:
+        yield lector.line_num, fila
+
+
+def leer_ndjson(fichero):
+    for numero, linea in enumerate(fichero, 1):
+        if linea.strip():
+            yield numero, linea
+
+
+LECTORES = {
+    'csv': leer_csv,
+    'ndjson': leer_ndjson,
+}
+
+
+def decodificar(fila):
+    if isinstance(fila, str):
+        try:
+            fila = json.loads(fila)
+        except ValueError as error:
+            raise FilaRechazada(f'JSON no valido: {error}')
+        if not isinstance(fila, dict):
+            raise FilaRechazada('La linea no es un objeto JSON')
+    return fila
+
+
+class Rechazados:
+    """
+    Guarda las filas rechazadas en el mismo formato que la entrada, con las
+    columnas _linea y _error, para corregirlas y volver a importarlas.
+    El fichero solo se crea si se rechaza alguna fila.
+    """
+
+    def __init__(self, ruta, formato):
+        self.ruta = ruta
+        self.formato = formato
+        self.fichero = None
+        self.escritor = None
+        self.total = 0
+
+    def escribir(self, numero, fila, error):
+        if self.fichero is None:
+            self.fichero = open(self.ruta, 'w', newline='', encoding='utf-8')
+        self.total += 1
+        if isinstance(fila, str):
+            fila = {'_texto': fila.rstrip('\n')}
+        fila = {**fila, '_linea': numero, '_error': error}
+        if self.formato == 'csv':
+            if self.escritor is None:
+                self.escritor = csv.DictWriter(self.fichero, fieldnames=list(fila), extrasaction='ignore')
+                self.escritor.writeheader()
+            self.escritor.writerow(fila)
+        else:
+            self.fichero.write(json.dumps(fila, ensure_ascii=False, default=str) + '\n')
+
+    def cerrar(self):
+        if self.fichero is not None:
+            self.fichero.close()
+
+
+# ----------------------------
+# Conversion de columnas
+# ----------------------------
+def valor(fila, modelo, campo, columna=None):
+    # Lee una columna y la valida con el campo del modelo (tipo, longitud, choices...)
+    columna = columna or campo
+    field = modelo._meta.get_field(campo)
+    dato = fila.get(columna)
+    if isinstance(dato, str):
+        dato = dato.strip()
+    if dato is None or dato == '':
+        if field.has_default():
+            return field.get_default()
+        if field.null:
+            return None
+        raise FilaRechazada(f'{columna}: obligatorio')
+    if isinstance(field, models.BooleanField) and isinstance(dato, str):
+        if dato.lower() not in VERDADERO | FALSO:
+            raise FilaRechazada(f'{columna}: valor booleano no valido ({dato})')
+        return dato.lower() in VERDADERO
+    try:
+        dato = field.clean(dato, None)
+    except ValidationError as error:
+        raise FilaRechazada(f'{columna}: {" ".join(error.messages)}')
+    if isinstance(field, models.DateTimeField) and timezone.is_naive(dato):
+        dato = timezone.make_aware(dato)
+    return dato
+
+
+def upsert(modelo, objetos, campos):
+    """
+    INSERT ... ON CONFLICT (id) DO UPDATE: los objetos con id (los que ya
+    existen segun los mapas) se actualizan y los demas se insertan, todo en
+    las mismas sentencias. bulk_create rellena el id de los nuevos.
+    """
+    return modelo.objects.bulk_create(objetos, update_conflicts=True, unique_fields=['id'], update_fields=campos)
+
+
+# ----------------------------
+# Mapas en memoria clave natural -> id
+# Se cargan una vez al empezar y se completan con los ids que se insertan,
+# asi resolver una clave ajena no cuesta ninguna consulta por fila.
+# Las claves van en minusculas, igual que las restricciones unicas de los
+# modelos: "Real Betis" y "real betis" son la misma fila.
+# ----------------------------
+def clave(*textos):
+    return tuple(texto.lower() for texto in textos)
+
+
+def mapa_jugadores():
+    filas = Jugador.objects.values_list('nombre', 'apellido', 'id', 'estadisticas_id')
+    return {clave(nombre, apellido): (pk, estadisticas) for nombre, apellido, pk, estadisticas in
+            filas.iterator(chunk_size=TAMANO_BLOQUE)}
+
+
+def mapa_equipos():
+    filas = Equipo.objects.values_list('nombre', 'ciudad', 'id')
+    return {clave(nombre, ciudad): pk for nombre, ciudad, pk in filas.iterator(chunk_size=TAMANO_BLOQUE)}
+
+
+def mapa_torneos():
+    filas = Torneo.objects.values_list('nombre', 'id')
+    return {clave(nombre): pk for nombre, pk in filas.iterator(chunk_size=TAMANO_BLOQUE)}
+
+
+# ----------------------------
+# Importadores
+# convertir() valida una fila y devuelve (clave natural, valores);
+# guardar() escribe un lote {clave: valores} con bulk_create y actualiza
+# los mapas al final, para que un lote que falla no los deje a medias.
+# ----------------------------
+class Importador:
+    # Modelos cuya version de cache hay que subir al terminar
+    modelos = []
+
+    def __init__(self):
+        self.nuevas = 0
+        self.actualizadas = 0
+
+    def terminar(self):
+        # bulk_create no envia señales
+        for modelo in self.modelos:
+            subir_version(modelo)
+
+
+class ImportadorJugadores(Importador):
+    """
+    Columnas: nombre, apellido, fecha_nacimiento, posicion y opcionalmente
+    partidos_jugados, goles, asistencias, tarjetas. Clave: nombre + apellido.
+    """
+    modelos = ['jugador', 'estadisticasjugador']
+    CAMPOS = ['nombre', 'apellido', 'fecha_nacimiento', 'posicion']
+    ESTADISTICAS = ['partidos_jugados', 'goles', 'asistencias', 'tarjetas']
+
+    def __init__(self):
+        super().__init__()
+        self.jugadores = mapa_jugadores()
+
+    def convertir(self, fila):
+        valores = {campo: valor(fila, Jugador, campo) for campo in self.CAMPOS}
+        # Las estadisticas solo se escriben si vienen en la fila (todas). Son
+        # historico sin acta: se guardan tambien como base de los totales
+        estadisticas = None
+        if any(fila.get(campo) not in (None, '') for campo in self.ESTADISTICAS):
+            estadisticas = {campo: valor(fila, EstadisticasJugador, campo) for campo in self.ESTADISTICAS}
+            estadisticas.update({f'{campo}_base': estadisticas[campo] for campo in self.ESTADISTICAS})
+        return clave(valores['nombre'], valores['apellido']), (valores, estadisticas)
+
+    def guardar(self, filas):
+        nuevas = [(clave, datos) for clave, datos in filas.items() if clave not in self.jugadores]
+        existentes = [(clave, datos) for clave, datos in filas.items() if clave in self.jugadores]
+
+        # Los jugadores nuevos necesitan antes su fila de estadisticas
+        estadisticas = EstadisticasJugador.objects.bulk_create([
+            EstadisticasJugador(**(datos or {}))
+            for _, (_, datos) in nuevas
+        ])
+        jugadores = [
+            Jugador(estadisticas_id=fila.id, **valores)
+            for (_, (valores, _)), fila in zip(nuevas, estadisticas)
+        ] + [
+            Jugador(id=self.jugadores[clave][0], estadisticas_id=self.jugadores[clave][1], **valores)
+            for clave, (valores, _) in existentes
+        ]
+        upsert(Jugador, jugadores, self.CAMPOS)
+        upsert(EstadisticasJugador, [
+            EstadisticasJugador(id=self.jugadores[clave][1], **datos)
+            for clave, (_, datos) in existentes if datos
+        ], self.ESTADISTICAS + [f'{campo}_base' for campo in self.ESTADISTICAS])
+
+        for (clave, _), jugador in zip(nuevas, jugadores):
+            self.jugadores[clave] = (jugador.id, jugador.estadisticas_id)
+        self.nuevas += len(nuevas)
+        self.actualizadas += len(existentes)
+
+
+class ImportadorEquipos(Importador):
+    """
+    Columnas: nombre, ciudad, fundacion y opcionalmente activo.
+    Clave: nombre + ciudad.
+    """
+    modelos = ['equipo']
+    CAMPOS = ['nombre', 'ciudad', 'fundacion', 'activo']
+
+    def __init__(self):
+        super().__init__()
+        self.equipos = mapa_equipos()
+
+    def convertir(self, fila):
+        valores = {campo: valor(fila, Equipo, campo) for campo in self.CAMPOS}
+        return clave(valores['nombre'], valores['ciudad']), valores
+
+    def guardar(self, filas):
+        equipos = [Equipo(id=self.equipos.get(clave), **valores) for clave, valores in filas.items()]
+        nuevas = sum(1 for clave in filas if clave not in self.equipos)
+        upsert(Equipo, equipos, self.CAMPOS)
+        for clave, equipo in zip(filas, equipos):
+            self.equipos[clave] = equipo.id
+        self.nuevas += nuevas
+        self.actualizadas += len(filas) - nuevas
+
+
+class ImportadorPlantillas(Importador):
+    """
+    Columnas: jugador_nombre, jugador_apellido, equipo_nombre, equipo_ciudad,
+    fecha_ingreso y opcionalmente capitan. Clave: jugador + equipo.
+    """
+    modelos = ['equipojugador']
+    CAMPOS = ['fecha_ingreso', 'capitan']
+
+    def __init__(self):
+        super().__init__()
+        self.jugadores = mapa_jugadores()
+        self.equipos = mapa_equipos()
+        self.plantillas = {
+            (jugador, equipo): pk for jugador, equipo, pk in
+            EquipoJugador.objects.values_list('jugador_id', 'equipo_id', 'id').iterator(chunk_size=TAMANO_BLOQUE)
+        }
+
+    def convertir(self, fila):
+        jugador = (valor(fila, Jugador, 'nombre', 'jugador_nombre'), valor(fila, Jugador, 'apellido', 'jugador_apellido'))
+        equipo = (valor(fila, Equipo, 'nombre', 'equipo_nombre'), valor(fila, Equipo, 'ciudad', 'equipo_ciudad'))
+        if clave(*jugador) not in self.jugadores:
+            raise FilaRechazada(f'No existe el jugador {jugador[0]} {jugador[1]}')
+        if clave(*equipo) not in self.equipos:
+            raise FilaRechazada(f'No existe el equipo {equipo[0]} ({equipo[1]})')
+        valores = {campo: valor(fila, EquipoJugador, campo) for campo in self.CAMPOS}
+        return (self.jugadores[clave(*jugador)][0], self.equipos[clave(*equipo)]), valores
+
+    def guardar(self, filas):
+        plantillas = [
+            EquipoJugador(id=self.plantillas.get(clave), jugador_id=clave[0], equipo_id=clave[1], **valores)
+            for clave, valores in filas.items()
+        ]
+        nuevas = sum(1 for clave in filas if clave not in self.plantillas)
+        upsert(EquipoJugador, plantillas, self.CAMPOS)
+        for clave, plantilla in zip(filas, plantillas):
+            self.plantillas[clave] = plantilla.id
+        self.nuevas += nuevas
+        self.actualizadas += len(filas) - nuevas
+
+
+class ImportadorPartidos(Importador):
+    """
+    Columnas: torneo (nombre), equipo_local_nombre, equipo_local_ciudad,
+    equipo_visitante_nombre, equipo_visitante_ciudad, fecha y opcionalmente
+    goles_local, goles_visitante. Clave: fecha (no puede haber dos partidos
+    a la vez: restriccion partido_fecha_unica).
+    """
+    modelos = ['partido', 'clasificacion']
+    CAMPOS = ['equipo_local', 'equipo_visitante', 'fecha', 'goles_local', 'goles_visitante', 'resultado', 'torneo']
+
+    def __init__(self):
+        super().__init__()
+        self.equipos = mapa_equipos()
+        self.torneos = mapa_torneos()
+        self.partidos = dict(Partido.objects.values_list('fecha', 'id').iterator(chunk_size=TAMANO_BLOQUE))
+
+    def equipo(self, fila, lado):
+        nombre = valor(fila, Equipo, 'nombre', f'equipo_{lado}_nombre')
+        ciudad = valor(fila, Equipo, 'ciudad', f'equipo_{lado}_ciudad')
+        if clave(nombre, ciudad) not in self.equipos:
+            raise FilaRechazada(f'No existe el equipo {nombre} ({ciudad})')
+        return self.equipos[clave(nombre, ciudad)]
+
+    def convertir(self, fila):
+        torneo = valor(fila, Torneo, 'nombre', 'torneo')
+        if clave(torneo) not in self.torneos:
+            raise FilaRechazada(f'No existe el torneo {torneo}')
+        local = self.equipo(fila, 'local')
+        visitante = self.equipo(fila, 'visitante')
+        if local == visitante:
+            raise FilaRechazada('El equipo local y el visitante son el mismo')
+        fecha = valor(fila, Partido, 'fecha')
+        goles_local = valor(fila, Partido, 'goles_local')
+        goles_visitante = valor(fila, Partido, 'goles_visitante')
+        return fecha, {
+            'equipo_local_id': local,
+            'equipo_visitante_id': visitante,
+            'fecha': fecha,
+            'goles_local': goles_local,
+            'goles_visitante': goles_visitante,
+            # bulk_create no llama a Partido.save(), que es quien lo calcula
+            'resultado': f'{goles_local}-{goles_visitante}' if goles_local is not None and goles_visitante is not None else '',
+            'torneo_id': self.torneos[clave(torneo)],
+        }
+
+    def guardar(self, filas):
+        partidos = [Partido(id=self.partidos.get(fecha), **valores) for fecha, valores in filas.items()]
+        nuevas = sum(1 for fecha in filas if fecha not in self.partidos)
+        upsert(Partido, partidos, self.CAMPOS)
+        for fecha, partido in zip(filas, partidos):
+            self.partidos[fecha] = partido.id
+        self.nuevas += nuevas
+        self.actualizadas += len(filas) - nuevas
+
+    def terminar(self):
+        # Las señales que mantienen la clasificacion no se han ejecutado
+        reconstruir_clasificacion()
+        super().terminar()
+
+
+IMPORTACIONES = {
+    'jugadores': ImportadorJugadores,
+    'equipos': ImportadorEquipos,
+    'plantillas': ImportadorPlantillas,
+    'partidos': ImportadorPartidos,
+}
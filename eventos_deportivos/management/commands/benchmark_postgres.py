@@ -0,0 +1,105 @@
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from .benchmark_views import PERFILES
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = ('Arrancar un PostgreSQL local temporal (initdb + pg_ctl), ejecutar benchmark_views '
+            'con SQLite y con PostgreSQL sobre los mismos datos (perfil y seed) y comparar '
+            'los tiempos de cada escenario y, con --concurrencia, las peticiones por segundo.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--perfil', choices=sorted(PERFILES), default='pequeno')
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--concurrencia', type=int, default=0,
+                            help='Conexiones de la prueba de carga de benchmark_views (0 = no se hace)')
+        parser.add_argument('--pg-bin', help='Directorio de initdb y pg_ctl (por defecto se buscan en PATH)')
+        parser.add_argument('--salida', help='Fichero JSON de la comparacion '
+                                             '(por defecto benchmark-postgres-<perfil>.json)')
+
+    def handle(self, *args, **options):
+        initdb = self.programa('initdb', options['pg_bin'])
+        pg_ctl = self.programa('pg_ctl', options['pg_bin'])
+        argumentos = ['--perfil', options['perfil'], '--repeticiones', str(options['repeticiones']),
+                      '--concurrencia', str(options['concurrencia'])]
+
+        with tempfile.TemporaryDirectory() as directorio:
+            datos = os.path.join(directorio, 'datos')
+            puerto = puerto_libre()
+            subprocess.run([initdb, '-D', datos, '-U', 'postgres', '--auth=trust', '-E', 'UTF8'],
+                           check=True, capture_output=True)
+            subprocess.run([pg_ctl, '-D', datos, '-l', os.path.join(directorio, 'postgres.log'), '-w',
+                            '-o', f"-p {puerto} -k {directorio} -c listen_addresses=127.0.0.1", 'start'],
+                           check=True, capture_output=True)
+            try:
+                resultados = {}
+                for nombre, url in [('sqlite', None), ('postgresql', f'postgres://postgres@127.0.0.1:{puerto}/benchmark')]:
+                    salida = os.path.join(directorio, f'{nombre}.json')
+                    self.stdout.write(f'benchmark_views con {nombre}...')
+                    self.benchmark(url, argumentos + ['--salida', salida])
+                    with open(salida, encoding='utf-8') as fichero:
+                        resultados[nombre] = json.load(fichero)
+            finally:
+                subprocess.run([pg_ctl, '-D', datos, '-m', 'fast', '-w', 'stop'], capture_output=True)
+
+        comparacion = self.comparar(resultados['sqlite'], resultados['postgresql'])
+        salida = options['salida'] or f"benchmark-postgres-{options['perfil']}.json"
+        with open(salida, 'w', encoding='utf-8') as fichero:
+            json.dump({'perfil': options['perfil'], 'comparacion': comparacion, **resultados}, fichero, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Resultados guardados en {salida}.'))
+
+    def programa(self, nombre, directorio):
+        ruta = os.path.join(directorio, nombre) if directorio else shutil.which(nombre)
+        if not ruta or not os.path.exists(ruta):
+            raise CommandError(f'No se encuentra {nombre}: instala PostgreSQL o indica --pg-bin')
+        return ruta
+
+    def benchmark(self, url, argumentos):
+        # Cada base de datos en su proceso: DATABASES se lee al arrancar
+        entorno = {**os.environ, 'SQLITE_PRODUCCION': 'off'}
+        entorno.pop('DATABASE_URL', None)
+        entorno.pop('DATABASE_REPLICAS', None)
+        if url:
+            entorno['DATABASE_URL'] = url
+        proceso = subprocess.run(
+            [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'benchmark_views', *argumentos],
+            env=entorno, capture_output=True, text=True,
+        )
+        if proceso.returncode != 0:
+            raise CommandError(f'benchmark_views fallo:\n{proceso.stderr}')
+
+    def comparar(self, sqlite, postgres):
+        comparacion = {}
+        self.stdout.write(f"{'escenario':28} {'sqlite p50':>11} {'pg p50':>8} {'sqlite p95':>11} {'pg p95':>8}")
+        for nombre, r in sqlite['resultados'].items():
+            p = postgres['resultados'].get(nombre)
+            if p is None:
+                continue
+            comparacion[nombre] = {'sqlite_p50_ms': r['p50_ms'], 'postgresql_p50_ms': p['p50_ms'],
+                                   'sqlite_p95_ms': r['p95_ms'], 'postgresql_p95_ms': p['p95_ms']}
+            self.stdout.write(f"{nombre:28} {r['p50_ms']:11.1f} {p['p50_ms']:8.1f} "
+                              f"{r['p95_ms']:11.1f} {p['p95_ms']:8.1f}")
+
+        if 'concurrencia' in sqlite and 'concurrencia' in postgres:
+            self.stdout.write(f"\n{'modo':16} {'sqlite pet/s':>13} {'pg pet/s':>9}")
+            for modo, r in sqlite['concurrencia']['modos'].items():
+                p = postgres['concurrencia']['modos'][modo]
+                comparacion[f'carga:{modo}'] = {'sqlite_peticiones_s': r['peticiones_s'],
+                                                'postgresql_peticiones_s': p['peticiones_s']}
+                self.stdout.write(f"{modo:16} {r['peticiones_s']:13.1f} {p['peticiones_s']:9.1f}")
+        return comparacion
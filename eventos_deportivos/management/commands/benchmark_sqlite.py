@@ -0,0 +1,134 @@
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+from eventos_deportivos.models import Partido
+from eventos_deportivos.sqlite_produccion import cola_escritura, opciones_produccion
+
+# Alias de la copia sobre la que se mide cada modo
+ALIAS = 'contencion'
+
+# modo -> (diario, OPTIONS, cola de escritura)
+MODOS = {
+    'por-defecto': ('DELETE', {}, False),
+    'produccion': ('WAL', opciones_produccion(), False),
+    'produccion+cola': ('WAL', opciones_produccion(), True),
+}
+
+
+def percentil(valores, p):
+    if len(valores) < 2:
+        return round(valores[0] * 1000, 1) if valores else 0
+    return round(statistics.quantiles(valores, n=100, method='inclusive')[p - 1] * 1000, 1)
+
+
+class Command(BaseCommand):
+    help = ('Medir lecturas y escrituras concurrentes en una copia de la base de datos SQLite '
+            'con la configuracion por defecto, con la de produccion (WAL, pragmas, IMMEDIATE) '
+            'y con la cola de escritura. La base de datos original no se modifica.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lectores', type=int, default=8, help='Hilos que leen')
+        parser.add_argument('--escritores', type=int, default=4, help='Hilos que escriben')
+        parser.add_argument('--segundos', type=float, default=5, help='Duracion de cada modo')
+        parser.add_argument('--modos', nargs='+', choices=list(MODOS), default=list(MODOS))
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help='Base de datos SQLite que se copia')
+
+    def handle(self, *args, **options):
+        origen = connections[options['database']]
+        if origen.vendor != 'sqlite':
+            raise CommandError(f"{options['database']} no es una base de datos SQLite")
+        ids = list(Partido.objects.using(options['database']).values_list('pk', flat=True)[:10000])
+        if not ids:
+            raise CommandError('No hay partidos: genera datos con generar_datos')
+
+        self.stdout.write(f"{options['lectores']} lectores, {options['escritores']} escritores, "
+                          f"{options['segundos']} s por modo")
+        self.stdout.write(f"{'modo':16} {'lect/s':>8} {'escr/s':>8} {'p95 lect':>9} {'p95 escr':>9} errores")
+        with tempfile.TemporaryDirectory() as directorio:
+            for modo in options['modos']:
+                ruta = os.path.join(directorio, f'{modo}.sqlite3')
+                self.copiar(origen.settings_dict['NAME'], ruta, MODOS[modo][0])
+                r = self.medir(origen.settings_dict, ruta, modo, ids, options)
+                self.stdout.write(
+                    f"{modo:16} {r['lecturas_s']:8.1f} {r['escrituras_s']:8.1f} "
+                    f"{r['p95_lectura_ms']:9.1f} {r['p95_escritura_ms']:9.1f} {r['errores']}"
+                )
+        self.stdout.write(self.style.SUCCESS('Benchmark terminado.'))
+
+    def copiar(self, origen, destino, diario):
+        fuente = sqlite3.connect(origen)
+        copia = sqlite3.connect(destino)
+        try:
+            fuente.backup(copia)
+            # El modo del diario queda guardado en el fichero: se fija antes de abrir mas conexiones
+            copia.execute(f'PRAGMA journal_mode = {diario}')
+        finally:
+            copia.close()
+            fuente.close()
+
+    def medir(self, configuracion, ruta, modo, ids, options):
+        _, opciones, cola = MODOS[modo]
+        connections.settings[ALIAS] = {**configuracion, 'NAME': ruta, 'OPTIONS': opciones}
+        lecturas, escrituras, errores = [], [], []
+        fin = time.monotonic() + options['segundos']
+
+        def leer():
+            while time.monotonic() < fin:
+                comienzo = time.perf_counter()
+                try:
+                    list(Partido.objects.using(ALIAS)
+                         .select_related('equipo_local', 'equipo_visitante', 'torneo')
+                         .order_by('-fecha', '-id')[:50])
+                except OperationalError:
+                    errores.append(1)
+                    continue
+                lecturas.append(time.perf_counter() - comienzo)
+
+        def escribir():
+            # Como partido_editar: lee la fila y la actualiza en la misma transaccion
+            while time.monotonic() < fin:
+                pk = random.choice(ids)
+                comienzo = time.perf_counter()
+                try:
+                    with cola_escritura() if cola else nullcontext(), transaction.atomic(using=ALIAS):
+                        partido = Partido.objects.using(ALIAS).get(pk=pk)
+                        Partido.objects.using(ALIAS).filter(pk=pk).update(
+                            goles_local=(partido.goles_local or 0) % 9 + 1)
+                except OperationalError:
+                    errores.append(1)
+                    continue
+                escrituras.append(time.perf_counter() - comienzo)
+
+        def hilo(funcion):
+            try:
+                funcion()
+            finally:
+                connections[ALIAS].close()
+
+        hilos = ([threading.Thread(target=hilo, args=(leer,)) for _ in range(options['lectores'])]
+                 + [threading.Thread(target=hilo, args=(escribir,)) for _ in range(options['escritores'])])
+        comienzo = time.monotonic()
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        duracion = time.monotonic() - comienzo
+        del connections.settings[ALIAS]
+
+        return {
+            'lecturas_s': len(lecturas) / duracion,
+            'escrituras_s': len(escrituras) / duracion,
+            'p95_lectura_ms': percentil(lecturas, 95),
+            'p95_escritura_ms': percentil(escrituras, 95),
+            'errores': len(errores),
+        }
@@ -0,0 +1,625 @@
+import asyncio
+import importlib
+import json
+import platform
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.backends.signals import connection_created
+from django.test import Client, RequestFactory
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import clear_url_caches, reverse
+from django.utils.http import urlencode
+
+from eventos_deportivos import urls
+from eventos_deportivos.models import *
+from eventos_deportivos.paginacion import codificar_cursor
+from eventos_deportivos.views import OPCIONES_PAGINA
+
+# Opciones de generar_datos de cada perfil
+PERFILES = {
+    'pequeno': {'usuarios': 20, 'estadios': 20, 'equipos': 20, 'jugadores': 500,
+                'partidos': 2000, 'sponsors': 50},
+    'mediano': {'usuarios': 200, 'estadios': 200, 'equipos': 200, 'jugadores': 20000,
+                'partidos': 100000, 'actas': 20000, 'sponsors': 500},
+    'grande': {'usuarios': 1000, 'estadios': 1000, 'equipos': 1000, 'jugadores': 200000,
+               'partidos': 1000000, 'actas': 100000, 'sponsors': 5000},
+}
+
+# Rutas que no se miden: borrarian los objetos que usan el resto de escenarios
+SIN_MEDIR = {'jugador_eliminar', 'equipo_eliminar', 'estadio_eliminar', 'sponsor_eliminar',
+             'partido_eliminar', 'torneo_eliminar'}
+
+# Por debajo de esta diferencia de p95 no se considera regresion (ruido)
+MARGEN_MS = 5
+
+# Rutas de la prueba de carga (--concurrencia): listas, detalles y busquedas
+RUTAS_CARGA = ['lista_jugadores', 'lista_partidos', 'detalle_equipo', 'detalle_torneo',
+               'jugador_buscar', 'partido_buscar']
+
+# (modo, vistas async): WSGI con --hilos hilos y ASGI con vistas sincronas y async
+MODOS_CARGA = [('wsgi', False), ('asgi-sincronas', False), ('asgi', True)]
+
+
+def percentil(cuantiles, p):
+    return round(cuantiles[p - 1] * 1000, 2)
+
+
+class Cronometro:
+    # Cuenta las consultas y su tiempo (CaptureQueriesContext lo redondea a ms)
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        comienzo = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tiempo += time.perf_counter() - comienzo
+            self.consultas += 1
+
+
+class Retardo:
+    # Simula una base de datos en red: cada consulta espera latencia segundos
+    def __init__(self, latencia):
+        self.latencia = latencia
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.latencia)
+        return execute(sql, params, many, context)
+
+    def conectar(self, sender, connection, **kwargs):
+        # Cada hilo o peticion ASGI abre su propia conexion
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+class Command(BaseCommand):
+    help = ('Medir todas las rutas de eventos_deportivos (listas, detalles, busquedas, '
+            'exportaciones y POST de crear/editar) con el cliente de pruebas: p50/p95/p99, '
+            'consultas SQL, tiempo SQL y tamaño de respuesta. Guarda el resultado en JSON y '
+            'con --comparar marca las regresiones respecto a otro resultado.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--perfil', choices=sorted(PERFILES), default='pequeno',
+                            help='Datos que se generan en una base de datos de pruebas')
+        parser.add_argument('--bd-actual', action='store_true',
+                            help='Usar los datos de la base de datos actual en vez de generar un perfil')
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--procesos', type=int, default=1, help='Procesos de generar_datos')
+        parser.add_argument('--con-cache', action='store_true',
+                            help='Usar la cache configurada (por defecto se desactiva)')
+        parser.add_argument('--salida', help='Fichero JSON de resultados (por defecto benchmark-<perfil>.json)')
+        parser.add_argument('--comparar', help='Resultado JSON anterior con el que comparar')
+        parser.add_argument('--tolerancia', type=float, default=0.2,
+                            help='Aumento del p95 que se considera regresion (0.2 = 20%%)')
+        parser.add_argument('--concurrencia', type=int, default=0,
+                            help='Conexiones simultaneas de la prueba de carga WSGI/ASGI (0 = no se hace)')
+        parser.add_argument('--peticiones', type=int, default=5,
+                            help='Peticiones seguidas de cada conexion en la prueba de carga')
+        parser.add_argument('--hilos', type=int, default=1,
+                            help='Hilos del worker WSGI simulado (1 = worker sincrono de gunicorn)')
+        parser.add_argument('--latencia-ms', type=float, default=0,
+                            help='Espera añadida a cada consulta en la prueba de carga (base de datos en red)')
+
+    def handle(self, *args, **options):
+        self.repeticiones = options['repeticiones']
+        if self.repeticiones < 2:
+            raise CommandError('--repeticiones debe ser al menos 2')
+        perfil = 'bd-actual' if options['bd_actual'] else options['perfil']
+
+        nombre_bd = None
+        if not options['bd_actual']:
+            # Base de datos de pruebas con los datos del perfil; la real no se toca
+            nombre_bd = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            call_command('generar_datos', seed=options['seed'], procesos=options['procesos'],
+                         stdout=self.stdout, **PERFILES[perfil])
+
+        setup_test_environment()
+        ajustes = override_settings() if options['con_cache'] else override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+        ajustes.enable()
+        try:
+            # Los POST crean y editan filas: todo se deshace al terminar
+            with transaction.atomic():
+                resultados = self.medir()
+                transaction.set_rollback(True)
+            carga = None
+            if options['concurrencia'] > 0:
+                carga = self.carga(options)
+        finally:
+            ajustes.disable()
+            teardown_test_environment()
+            if nombre_bd is not None:
+                connection.creation.destroy_test_db(nombre_bd, verbosity=0)
+
+        informe = {
+            'perfil': perfil,
+            'fecha': datetime.now(timezone.utc).isoformat(),
+            'repeticiones': self.repeticiones,
+            'cache': options['con_cache'],
+            'entorno': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'base_de_datos': connection.vendor,
+            },
+            'resultados': resultados,
+        }
+        if carga is not None:
+            informe['concurrencia'] = carga
+        salida = options['salida'] or f'benchmark-{perfil}.json'
+        with open(salida, 'w', encoding='utf-8') as fichero:
+            json.dump(informe, fichero, indent=2)
+        self.mostrar(resultados)
+        if carga is not None:
+            self.mostrar_carga(carga)
+        self.stdout.write(self.style.SUCCESS(f'Resultados guardados en {salida}.'))
+
+        if options['comparar']:
+            self.comparar(options['comparar'], informe, options['tolerancia'])
+
+    # ----------------------------
+    # Escenarios
+    # ----------------------------
+    def escenarios(self):
+        """
+        Devuelve (nombre, ruta, metodo, url, datos) para cada caso a medir.
+        datos es None en los GET y una funcion de la repeticion en los POST,
+        para que cada creacion use nombres y fechas distintos.
+        """
+        jugador = self.ejemplo(Jugador.objects.filter(equipojugador__isnull=False))
+        equipo, otro_equipo = Equipo.objects.order_by('id')[:2]
+        partido = self.ejemplo(Partido.objects.all())
+        torneo = self.ejemplo(Torneo.objects.filter(partido__isnull=False))
+        arbitro = self.ejemplo(Arbitro.objects.all())
+        sponsor = self.ejemplo(Sponsor.objects.all())
+        estadio = self.ejemplo(Estadio.objects.all())
+
+        # Los formularios de crear solo ofrecen los equipos y torneos del usuario
+        Equipo.objects.filter(id__in=[equipo.id, otro_equipo.id]).update(creado_por=self.usuario)
+        Torneo.objects.filter(id=torneo.id).update(creado_por=self.usuario)
+        # arbitro_principal es OneToOne: cada torneo creado necesita un arbitro libre
+        libres = [
+            Arbitro.objects.create(usuario=Usuario.objects.create(username=f'benchmark{i}'),
+                                   nombre='Benchmark', apellido=str(i), licencia=f'BENCH-{i}')
+            for i in range(self.repeticiones + 1)
+        ]
+
+        def datos_jugador(i):
+            return {'nombre': f'Benchmark{i}', 'apellido': 'Prueba', 'fecha_nacimiento': '1990-01-01',
+                    'posicion': 'DEL'}
+
+        def datos_equipo(i):
+            return {'nombre': f'Benchmark{i}', 'ciudad': 'Sevilla', 'fundacion': '1900-01-01', 'activo': 'on'}
+
+        def datos_estadio(i):
+            return {'nombre': f'Benchmark{i}', 'ciudad': 'Sevilla', 'capacidad': 1000}
+
+        def datos_sponsor(i):
+            return {'nombre': f'Benchmark{i}', 'pais': 'España', 'monto': 1000, 'equipos': [equipo.id]}
+
+        def datos_partido(i):
+            return {'fecha': f'2040-01-01T{i % 24:02d}:{i // 24 % 60:02d}', 'equipo_local': equipo.id,
+                    'equipo_visitante': otro_equipo.id, 'torneo': torneo.id, 'goles_local': 1, 'goles_visitante': 0}
+
+        def datos_torneo(i):
+            return {'nombre': f'Benchmark{i}', 'pais': 'España', 'fecha_inicio': '2040-01-01',
+                    'fecha_fin': '2040-06-01', 'arbitro_principal': libres[i].id}
+
+        # Los POST de editar no reutilizan los nombres y fechas de los de crear:
+        # chocarian con las restricciones unicas y solo se mediria el error
+        def editado(datos):
+            return lambda i: {**datos(i), 'nombre': f'Editado{i}'}
+
+        def datos_partido_editado(i):
+            return {**datos_partido(i), 'fecha': datos_partido(i)['fecha'].replace('2040', '2041', 1)}
+
+        def datos_torneo_editado(i):
+            return {**editado(datos_torneo)(i), 'arbitro_principal': torneo.arbitro_principal_id or ''}
+
+        # Acta completa del partido: titulares de los dos equipos y algunos eventos
+        # Otro partido y otros equipos que los de los POST de editar, que
+        # cambian los equipos del partido y las plantillas
+        con_acta = self.ejemplo(
+            Partido.objects.filter(equipo_local__equipojugador__isnull=False, equipo_visitante__equipojugador__isnull=False)
+            .exclude(id=partido.id)
+            .exclude(equipo_local__in=[equipo, otro_equipo]).exclude(equipo_visitante__in=[equipo, otro_equipo])
+            .distinct()
+        )
+        titulares = []
+        for equipo_id in (con_acta.equipo_local_id, con_acta.equipo_visitante_id):
+            plantilla = EquipoJugador.objects.filter(equipo_id=equipo_id).order_by('id')
+            titulares += plantilla.values_list('jugador_id', flat=True)[:11]
+
+        def datos_acta(i):
+            # Cada repeticion cambia los goles: el acta nueva difiere de la anterior
+            eventos = [{'jugador': j, 'tipo': 'alineacion'} for j in titulares]
+            eventos += [{'jugador': j, 'tipo': 'gol', 'minuto': 10 + n} for n, j in enumerate(titulares[:1 + i % 3])]
+            eventos += [{'jugador': titulares[-1], 'tipo': 'asistencia', 'minuto': 10},
+                        {'jugador': titulares[-1], 'tipo': 'tarjeta', 'minuto': 80}]
+            return json.dumps({'eventos': eventos})
+
+        # Lote de plantillas: hasta 500 jugadores al mismo equipo, uno de
+        # ellos capitan y otro traspasado (sale de sus demas equipos). Es el
+        # ultimo escenario: cambia las plantillas que usan los anteriores
+        destino = self.ejemplo(Equipo.objects.exclude(id__in=[
+            equipo.id, otro_equipo.id, con_acta.equipo_local_id, con_acta.equipo_visitante_id,
+        ]))
+        en_lote = list(Jugador.objects.order_by('id').values_list('id', flat=True)[:500])
+        traspasado = self.ejemplo(Jugador.objects.filter(id__in=en_lote, equipojugador__isnull=False)
+                                  .exclude(equipojugador__equipo=destino).distinct()).id
+
+        def datos_plantillas(i):
+            # Cada repeticion cambia la fecha de ingreso: siempre hay filas que actualizar
+            ingreso = f'2040-01-{1 + i % 28:02d}'
+            operaciones = [{'jugador': j, 'equipo': destino.id, 'fecha_ingreso': ingreso} for j in en_lote]
+            operaciones[0]['capitan'] = True
+            operaciones[en_lote.index(traspasado)]['traspaso'] = True
+            return json.dumps({'operaciones': operaciones})
+
+        # Segunda pagina de los selects perezosos: el cursor de la ultima
+        # opcion de la primera, sin filtrar por texto (con menos de una
+        # pagina de filas, desde la mitad, para que no salga vacia)
+        def opciones(ruta, queryset, q):
+            filas = list(queryset.order_by('nombre', 'id').values_list('nombre', 'id')[:OPCIONES_PAGINA])
+            ultima = filas[-1] if len(filas) == OPCIONES_PAGINA else filas[len(filas) // 2]
+            return [
+                (ruta, ruta, 'GET', f"{reverse(ruta)}?{urlencode({'q': q})}", None),
+                (f'{ruta} cursor', ruta, 'GET', f"{reverse(ruta)}?{urlencode({'q': '', 'cursor': codificar_cursor(*ultima)})}", None),
+            ]
+
+        fecha = partido.fecha.date()
+        return [
+            ('index', 'index', 'GET', reverse('index'), None),
+            ('registrar_usuario', 'registrar_usuario', 'GET', reverse('registrar_usuario'), None),
+
+            ('lista_jugadores', 'lista_jugadores', 'GET', reverse('lista_jugadores'), None),
+            ('lista_equipos', 'lista_equipos', 'GET', reverse('lista_equipos'), None),
+            ('lista_partidos', 'lista_partidos', 'GET', reverse('lista_partidos'), None),
+            ('lista_torneos', 'lista_torneos', 'GET', reverse('lista_torneos'), None),
+            ('lista_sponsors', 'lista_sponsors', 'GET', reverse('lista_sponsors'), None),
+            ('lista_estadios', 'lista_estadios', 'GET', reverse('lista_estadios'), None),
+
+            ('detalle_jugador', 'detalle_jugador', 'GET', reverse('detalle_jugador', args=[jugador.id]), None),
+            ('detalle_equipo', 'detalle_equipo', 'GET', reverse('detalle_equipo', args=[equipo.id]), None),
+            ('detalle_partido', 'detalle_partido', 'GET', reverse('detalle_partido', args=[partido.id]), None),
+            ('detalle_torneo', 'detalle_torneo', 'GET', reverse('detalle_torneo', args=[torneo.nombre]), None),
+            ('detalle_arbitro_torneo', 'detalle_arbitro_torneo', 'GET',
+             reverse('detalle_arbitro_torneo', args=[arbitro.id, torneo.id]), None),
+
+            ('jugador_buscar', 'jugador_buscar', 'GET',
+             f"{reverse('jugador_buscar')}?nombreBusqueda={jugador.nombre[:3]}&posicionBusqueda={jugador.posicion}", None),
+            ('equipo_buscar', 'equipo_buscar', 'GET', f"{reverse('equipo_buscar')}?nombreBusqueda={equipo.nombre[:3]}", None),
+            ('estadio_buscar', 'estadio_buscar', 'GET', f"{reverse('estadio_buscar')}?capacidadBusqueda={estadio.capacidad}", None),
+            ('sponsor_buscar', 'sponsor_buscar', 'GET', f"{reverse('sponsor_buscar')}?paisBusqueda={sponsor.pais[:3]}", None),
+            ('partido_buscar', 'partido_buscar', 'GET',
+             f"{reverse('partido_buscar')}?torneoBusqueda={torneo.id}&desdeFechaBusqueda={fecha}", None),
+            ('torneo_buscar', 'torneo_buscar', 'GET', f"{reverse('torneo_buscar')}?fechaDesdeBusqueda={torneo.fecha_inicio}", None),
+
+            ('exportar', 'exportar', 'GET',
+             f"{reverse('exportar', args=['partidos', 'csv'])}?torneoBusqueda={torneo.id}", None),
+            ('autocompletar_jugadores', 'autocompletar_jugadores', 'GET',
+             f"{reverse('autocompletar_jugadores')}?q={jugador.nombre[:3]}", None),
+            ('autocompletar_equipos', 'autocompletar_equipos', 'GET',
+             f"{reverse('autocompletar_equipos')}?q={equipo.nombre[:3]}", None),
+            *opciones('opciones_jugadores', Jugador.objects.all(), jugador.nombre[:3]),
+            *opciones('opciones_torneos', Torneo.objects.all(), torneo.nombre[:3]),
+
+            ('jugador_create GET', 'jugador_create', 'GET', reverse('jugador_create'), None),
+            ('jugador_create POST', 'jugador_create', 'POST', reverse('jugador_create'), datos_jugador),
+            ('jugador_editar GET', 'jugador_editar', 'GET', reverse('jugador_editar', args=[jugador.id]), None),
+            ('jugador_editar POST', 'jugador_editar', 'POST', reverse('jugador_editar', args=[jugador.id]), editado(datos_jugador)),
+            ('equipo_create GET', 'equipo_create', 'GET', reverse('equipo_create'), None),
+            ('equipo_create POST', 'equipo_create', 'POST', reverse('equipo_create'), datos_equipo),
+            ('equipo_editar GET', 'equipo_editar', 'GET', reverse('equipo_editar', args=[equipo.id]), None),
+            ('equipo_editar POST', 'equipo_editar', 'POST', reverse('equipo_editar', args=[equipo.id]), editado(datos_equipo)),
+            ('estadio_create GET', 'estadio_create', 'GET', reverse('estadio_create'), None),
+            ('estadio_create POST', 'estadio_create', 'POST', reverse('estadio_create'), datos_estadio),
+            ('estadio_editar GET', 'estadio_editar', 'GET', reverse('estadio_editar', args=[estadio.id]), None),
+            ('estadio_editar POST', 'estadio_editar', 'POST', reverse('estadio_editar', args=[estadio.id]), editado(datos_estadio)),
+            ('sponsor_create GET', 'sponsor_create', 'GET', reverse('sponsor_create'), None),
+            ('sponsor_create POST', 'sponsor_create', 'POST', reverse('sponsor_create'), datos_sponsor),
+            ('sponsor_editar GET', 'sponsor_editar', 'GET', reverse('sponsor_editar', args=[sponsor.id]), None),
+            ('sponsor_editar POST', 'sponsor_editar', 'POST', reverse('sponsor_editar', args=[sponsor.id]), editado(datos_sponsor)),
+            ('partido_create GET', 'partido_create', 'GET', reverse('partido_create'), None),
+            ('partido_create POST', 'partido_create', 'POST', reverse('partido_create'), datos_partido),
+            ('partido_editar GET', 'partido_editar', 'GET', reverse('partido_editar', args=[partido.id]), None),
+            ('partido_editar POST', 'partido_editar', 'POST', reverse('partido_editar', args=[partido.id]), datos_partido_editado),
+            ('torneo_create GET', 'torneo_create', 'GET', reverse('torneo_create'), None),
+            ('torneo_create POST', 'torneo_create', 'POST', reverse('torneo_create'), datos_torneo),
+            ('torneo_editar GET', 'torneo_editar', 'GET', reverse('torneo_editar', args=[torneo.id]), None),
+            ('torneo_editar POST', 'torneo_editar', 'POST', reverse('torneo_editar', args=[torneo.id]), datos_torneo_editado),
+            ('partido_acta POST', 'partido_acta', 'POST', reverse('partido_acta', args=[con_acta.id]), datos_acta),
+            ('plantillas_bloque POST', 'plantillas_bloque', 'POST', reverse('plantillas_bloque'), datos_plantillas),
+        ]
+
+    def ejemplo(self, queryset):
+        objeto = queryset.order_by('id').first()
+        if objeto is None:
+            raise CommandError(f'No hay datos de {queryset.model.__name__}; ejecuta antes generar_datos.')
+        return objeto
+
+    # ----------------------------
+    # Medicion
+    # ----------------------------
+    def medir(self):
+        self.usuario = Usuario.objects.create_superuser('benchmark', 'benchmark@example.com', 'benchmark')
+        grupo, _ = Group.objects.get_or_create(name='Managers')
+        self.usuario.groups.add(grupo)
+        cliente = Client(raise_request_exception=False)
+        cliente.force_login(self.usuario)
+
+        escenarios = self.escenarios()
+        rutas = {p.name for p in urls.urlpatterns if getattr(p, 'name', None)}
+        sin_escenario = rutas - {ruta for _, ruta, _, _, _ in escenarios} - SIN_MEDIR
+        if sin_escenario:
+            self.stderr.write('Rutas sin escenario: ' + ', '.join(sorted(sin_escenario)))
+
+        resultados = {}
+        for nombre, _, metodo, url, datos in escenarios:
+            tiempos, consultas, tiempos_sql = [], [], []
+            # La primera peticion calienta plantillas, indices en memoria...
+            for i in range(self.repeticiones + 1):
+                cronometro = Cronometro()
+                with connection.execute_wrapper(cronometro):
+                    comienzo = time.perf_counter()
+                    if metodo == 'GET':
+                        respuesta = cliente.get(url)
+                    else:
+                        cuerpo = datos(i)
+                        if isinstance(cuerpo, str):
+                            # Las API JSON reciben el cuerpo ya serializado
+                            respuesta = cliente.post(url, cuerpo, content_type='application/json')
+                        else:
+                            respuesta = cliente.post(url, cuerpo)
+                    contenido = (b''.join(respuesta.streaming_content) if respuesta.streaming
+                                 else respuesta.content)
+                    duracion = time.perf_counter() - comienzo
+                if i == 0:
+                    continue
+                tiempos.append(duracion)
+                consultas.append(cronometro.consultas)
+                tiempos_sql.append(cronometro.tiempo)
+
+            cuantiles = statistics.quantiles(tiempos, n=100, method='inclusive')
+            resultados[nombre] = {
+                'url': url,
+                'metodo': metodo,
+                'estado': respuesta.status_code,
+                'p50_ms': percentil(cuantiles, 50),
+                'p95_ms': percentil(cuantiles, 95),
+                'p99_ms': percentil(cuantiles, 99),
+                'consultas': max(consultas),
+                'tiempo_sql_ms': round(statistics.median(tiempos_sql) * 1000, 2),
+                'bytes': len(contenido),
+            }
+            if respuesta.status_code >= 400:
+                self.stderr.write(f'{nombre}: respuesta {respuesta.status_code}')
+        return resultados
+
+    # ----------------------------
+    # Prueba de carga: --concurrencia conexiones a la vez, cada una con
+    # --peticiones peticiones seguidas (anonimas) a RUTAS_CARGA. Se compara
+    # WSGI con un numero fijo de hilos (las peticiones esperan hilo libre)
+    # con ASGI, con las vistas sincronas y con las async. Las peticiones
+    # pasan por el manejador WSGI/ASGI de Django sin servidor ni red.
+    # ----------------------------
+    def carga(self, options):
+        equipo = self.ejemplo(Equipo.objects.all())
+        torneo = self.ejemplo(Torneo.objects.filter(partido__isnull=False))
+        jugador = self.ejemplo(Jugador.objects.all())
+        argumentos = {'detalle_equipo': [equipo.id], 'detalle_torneo': [torneo.nombre]}
+        consultas = {'jugador_buscar': f'nombreBusqueda={jugador.nombre[:3]}',
+                     'partido_buscar': f'torneoBusqueda={torneo.id}'}
+        rutas = []
+        for nombre in RUTAS_CARGA:
+            url = reverse(nombre, args=argumentos.get(nombre))
+            rutas.append(f'{url}?{consultas[nombre]}' if nombre in consultas else url)
+
+        self.conexiones = options['concurrencia']
+        self.peticiones = options['peticiones']
+        retardo = Retardo(options['latencia_ms'] / 1000)
+        if retardo.latencia:
+            connection_created.connect(retardo.conectar)
+        resultados = {}
+        try:
+            for modo, asincronas in MODOS_CARGA:
+                self.vistas_lectura(asincronas)
+                if modo == 'wsgi':
+                    medicion = self.carga_wsgi(rutas, options['hilos'])
+                else:
+                    medicion = asyncio.run(self.carga_asgi(rutas))
+                resultados[modo] = medicion
+        finally:
+            connection_created.disconnect(retardo.conectar)
+            self.vistas_lectura(settings.VISTAS_ASYNC)
+        return {
+            'conexiones': self.conexiones,
+            'peticiones_por_conexion': self.peticiones,
+            'hilos_wsgi': options['hilos'],
+            'latencia_ms': options['latencia_ms'],
+            'rutas': rutas,
+            'modos': resultados,
+        }
+
+    def vistas_lectura(self, asincronas):
+        # urls.py elige las vistas al importarse: se recarga con el ajuste pedido
+        with override_settings(VISTAS_ASYNC=asincronas):
+            importlib.reload(urls)
+        clear_url_caches()
+
+    def resumen_carga(self, latencias, errores, duracion, hilos):
+        cuantiles = statistics.quantiles(latencias, n=100, method='inclusive')
+        return {
+            'peticiones': len(latencias),
+            'errores': errores,
+            'segundos': round(duracion, 2),
+            'peticiones_s': round(len(latencias) / duracion, 1),
+            'p50_ms': percentil(cuantiles, 50),
+            'p95_ms': percentil(cuantiles, 95),
+            'p99_ms': percentil(cuantiles, 99),
+            'hilos_max': hilos,
+        }
+
+    def carga_wsgi(self, rutas, hilos):
+        manejador = WSGIHandler()
+        fabrica = RequestFactory()
+        latencias = []
+        errores = []
+        terminado = threading.Event()
+        pendientes = [self.conexiones]
+        bloqueo = threading.Lock()
+
+        def peticion(ruta):
+            estados = []
+            cuerpo = manejador(fabrica.get(ruta).environ, lambda estado, cabeceras, exc_info=None: estados.append(estado))
+            try:
+                b''.join(cuerpo)
+            finally:
+                cuerpo.close()
+            return int(estados[0].split()[0])
+
+        # Cada conexion envia su siguiente peticion al recibir la respuesta
+        # de la anterior; mientras tanto espera en la cola del pool
+        def enviar(pool, i, k, emitida):
+            futuro = pool.submit(peticion, rutas[(i + k) % len(rutas)])
+            futuro.add_done_callback(lambda f: recibida(pool, i, k, emitida, f))
+
+        def recibida(pool, i, k, emitida, futuro):
+            fin = time.perf_counter()
+            with bloqueo:
+                latencias.append(fin - emitida)
+                if futuro.exception() is not None or futuro.result() >= 400:
+                    errores.append(k)
+            if k + 1 < self.peticiones:
+                enviar(pool, i, k + 1, fin)
+                return
+            with bloqueo:
+                pendientes[0] -= 1
+                if not pendientes[0]:
+                    terminado.set()
+
+        maximo = threading.active_count()
+        with ThreadPoolExecutor(hilos) as pool:
+            comienzo = time.perf_counter()
+            for i in range(self.conexiones):
+                enviar(pool, i, 0, comienzo)
+            while not terminado.wait(0.01):
+                maximo = max(maximo, threading.active_count())
+            duracion = time.perf_counter() - comienzo
+        return self.resumen_carga(latencias, len(errores), duracion, maximo)
+
+    async def carga_asgi(self, rutas):
+        aplicacion = ASGIHandler()
+        latencias = []
+        errores = []
+
+        async def peticion(ruta):
+            camino, _, consulta = ruta.partition('?')
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': camino, 'raw_path': camino.encode(),
+                'query_string': consulta.encode(), 'root_path': '',
+                'headers': [(b'host', b'testserver')],
+                'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+            }
+            leido = False
+            estado = []
+
+            async def receive():
+                nonlocal leido
+                if not leido:
+                    leido = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # El cliente no se desconecta: se espera hasta que se cancele
+                await asyncio.Event().wait()
+
+            async def send(mensaje):
+                if mensaje['type'] == 'http.response.start':
+                    estado.append(mensaje['status'])
+
+            await aplicacion(scope, receive, send)
+            return estado[0]
+
+        async def conexion(i):
+            emitida = time.perf_counter()
+            for k in range(self.peticiones):
+                try:
+                    if await peticion(rutas[(i + k) % len(rutas)]) >= 400:
+                        errores.append(k)
+                except Exception:
+                    errores.append(k)
+                fin = time.perf_counter()
+                latencias.append(fin - emitida)
+                emitida = fin
+
+        async def vigilar():
+            nonlocal maximo
+            while True:
+                maximo = max(maximo, threading.active_count())
+                await asyncio.sleep(0.01)
+
+        maximo = threading.active_count()
+        vigilante = asyncio.create_task(vigilar())
+        comienzo = time.perf_counter()
+        await asyncio.gather(*(conexion(i) for i in range(self.conexiones)))
+        duracion = time.perf_counter() - comienzo
+        vigilante.cancel()
+        return self.resumen_carga(latencias, len(errores), duracion, maximo)
+
+    def mostrar_carga(self, carga):
+        self.stdout.write(
+            f"\nCarga: {carga['conexiones']} conexiones x {carga['peticiones_por_conexion']} peticiones, "
+            f"{carga['hilos_wsgi']} hilos WSGI, latencia SQL {carga['latencia_ms']} ms"
+        )
+        self.stdout.write(f"{'modo':16} {'pet/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'hilos':>6} errores")
+        for modo, r in carga['modos'].items():
+            self.stdout.write(
+                f"{modo:16} {r['peticiones_s']:8.1f} {r['p50_ms']:8.1f} {r['p95_ms']:8.1f} "
+                f"{r['p99_ms']:8.1f} {r['hilos_max']:6} {r['errores']}"
+            )
+
+    def mostrar(self, resultados):
+        self.stdout.write(f"{'escenario':28} {'p50':>8} {'p95':>8} {'p99':>8} {'sql':>5} {'sql ms':>8} {'KB':>8} estado")
+        for nombre, r in resultados.items():
+            self.stdout.write(
+                f"{nombre:28} {r['p50_ms']:8.1f} {r['p95_ms']:8.1f} {r['p99_ms']:8.1f} {r['consultas']:5} "
+                f"{r['tiempo_sql_ms']:8.1f} {r['bytes'] / 1024:8.1f} {r['estado']}"
+            )
+
+    def comparar(self, ruta, informe, tolerancia):
+        # Regresion: mas consultas que antes o un p95 mayor que la tolerancia
+        with open(ruta, encoding='utf-8') as fichero:
+            base = json.load(fichero)
+        if base['perfil'] != informe['perfil']:
+            self.stderr.write(f"Aviso: se compara el perfil {informe['perfil']} con {base['perfil']}")
+
+        regresiones = []
+        for nombre, actual in informe['resultados'].items():
+            anterior = base['resultados'].get(nombre)
+            if anterior is None:
+                continue
+            if actual['consultas'] > anterior['consultas']:
+                regresiones.append(f"{nombre}: {anterior['consultas']} -> {actual['consultas']} consultas")
+            if (actual['p95_ms'] > anterior['p95_ms'] * (1 + tolerancia)
+                    and actual['p95_ms'] - anterior['p95_ms'] > MARGEN_MS):
+                regresiones.append(f"{nombre}: p95 {anterior['p95_ms']} -> {actual['p95_ms']} ms")
+
+        if regresiones:
+            for regresion in regresiones:
+                self.stderr.write(regresion)
+            raise CommandError(f'{len(regresiones)} regresiones respecto a {ruta}.')
+        self.stdout.write(self.style.SUCCESS(f'Sin regresiones respecto a {ruta}.'))
@@ -0,0 +1,116 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (CaptureQueriesContext, override_settings,
+                               setup_test_environment, teardown_test_environment)
+from django.urls import reverse
+
+from eventos_deportivos.models import *
+
+# Lineas de EXPLAIN QUERY PLAN que indican un recorrido completo de tabla
+# ("SCAN tabla" sin indice) o una ordenacion en memoria (USE TEMP B-TREE).
+# Las tablas internas sqlite_* no cuentan.
+RECORRIDO_COMPLETO = re.compile(r'^SCAN (?!sqlite_)(\w+)$')
+ORDENACION_TEMPORAL = re.compile(r'USE TEMP B-TREE')
+
+
+class Command(BaseCommand):
+    help = ('Comprobar con EXPLAIN QUERY PLAN que las consultas de las vistas principales '
+            'usan indices (sin SCAN completo ni USE TEMP B-TREE). Usa los datos de la base '
+            'de datos actual, por ejemplo los de generar_datos.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mostrar', action='store_true', help='Mostrar el plan de todas las consultas')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Esta comprobacion solo esta preparada para SQLite.')
+        self.mostrar = options['mostrar']
+
+        # Sin cache de paginas, para que cada vista ejecute sus consultas
+        setup_test_environment()
+        sin_cache = override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+        sin_cache.enable()
+        try:
+            self.cliente = Client()
+            errores = []
+            for url in self.urls():
+                errores.extend(self.comprobar(url))
+        finally:
+            sin_cache.disable()
+            teardown_test_environment()
+
+        if errores:
+            for error in errores:
+                self.stderr.write(error)
+            raise CommandError(f'{len(errores)} consultas sin indice.')
+        self.stdout.write(self.style.SUCCESS('Todas las consultas usan indices.'))
+
+    def urls(self):
+        # URLs a comprobar: listas (primera y segunda pagina), detalles y busquedas habituales
+        for nombre in ('lista_jugadores', 'lista_equipos', 'lista_partidos',
+                       'lista_torneos', 'lista_sponsors', 'lista_estadios'):
+            yield reverse(nombre)
+            cursor = self.cursor_siguiente(reverse(nombre))
+            if cursor:
+                yield f"{reverse(nombre)}?cursor={cursor}"
+
+        jugador = self.ejemplo(Jugador.objects.filter(equipojugador__isnull=False))
+        equipo = self.ejemplo(Equipo.objects.filter(equipojugador__isnull=False))
+        partido = self.ejemplo(Partido.objects.all())
+        torneo = self.ejemplo(Torneo.objects.filter(partido__isnull=False))
+        arbitro = self.ejemplo(Arbitro.objects.all())
+        sponsor = self.ejemplo(Sponsor.objects.all())
+        estadio = self.ejemplo(Estadio.objects.all())
+
+        yield reverse('detalle_jugador', args=[jugador.id])
+        yield reverse('detalle_equipo', args=[equipo.id])
+        yield reverse('detalle_partido', args=[partido.id])
+        yield reverse('detalle_torneo', args=[torneo.nombre])
+        yield reverse('detalle_arbitro_torneo', args=[arbitro.id, partido.torneo_id])
+
+        yield f"{reverse('jugador_buscar')}?nombreBusqueda={jugador.nombre[:3]}&posicionBusqueda={jugador.posicion}"
+        yield f"{reverse('jugador_buscar')}?posicionBusqueda={jugador.posicion}"
+        yield f"{reverse('equipo_buscar')}?nombreBusqueda={equipo.nombre[:3]}"
+        yield f"{reverse('estadio_buscar')}?capacidadBusqueda={estadio.capacidad}"
+        yield f"{reverse('sponsor_buscar')}?montoBusqueda={int(sponsor.monto) + 1}"
+        yield f"{reverse('sponsor_buscar')}?paisBusqueda={sponsor.pais[:3]}"
+        yield (f"{reverse('partido_buscar')}?torneoBusqueda={partido.torneo_id}"
+                                 f"&desdeFechaBusqueda={partido.fecha.date()}")
+        yield f"{reverse('partido_buscar')}?desdeFechaBusqueda={partido.fecha.date()}"
+        yield f"{reverse('torneo_buscar')}?fechaDesdeBusqueda={torneo.fecha_inicio}"
+
+    def ejemplo(self, queryset):
+        objeto = queryset.order_by('id').first()
+        if objeto is None:
+            raise CommandError(f'No hay datos de {queryset.model.__name__}; ejecuta antes generar_datos.')
+        return objeto
+
+    def cursor_siguiente(self, url):
+        respuesta = self.cliente.get(url)
+        paginacion = respuesta.context['paginacion'] if respuesta.context else None
+        return paginacion['cursor_siguiente'] if paginacion else None
+
+    def comprobar(self, url):
+        # Ejecuta la vista, captura su SQL y revisa el plan de cada consulta
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.cliente.get(url)
+        if respuesta.status_code != 200:
+            return [f'{url}: respuesta {respuesta.status_code}']
+
+        errores = []
+        with connection.cursor() as cursor:
+            for consulta in consultas.captured_queries:
+                sql = consulta['sql']
+                if not sql.startswith('SELECT'):
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [fila[3] for fila in cursor.fetchall()]
+                if self.mostrar:
+                    self.stdout.write(f'{url}\n  {sql}\n    ' + '\n    '.join(plan))
+                for linea in plan:
+                    if RECORRIDO_COMPLETO.match(linea) or ORDENACION_TEMPORAL.search(linea):
+                        errores.append(f'{url}: {linea}\n  {sql}')
+        return errores
@@ -0,0 +1,57 @@
+import json
+import os
+import time
+from datetime import datetime, timezone
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from eventos_deportivos.copias import MANIFIESTO, copiar_modelo, etiqueta, instantanea, modelos_copia
+
+
+class Command(BaseCommand):
+    help = ('Crear una copia de seguridad con un fichero NDJSON comprimido (gzip) por modelo, '
+            'escritos en paralelo, y un manifiesto con filas y sha256 de cada fichero. '
+            'Todos los modelos se leen de una misma instantanea (SQLite y PostgreSQL); '
+            'con otras bases de datos no se debe escribir durante la copia. '
+            'Se restaura con restaurar_copia.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directorio')
+        parser.add_argument('--procesos', type=int, default=4,
+                            help='Modelos que se copian a la vez, cada uno en su proceso')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        directorio = options['directorio']
+        os.makedirs(directorio, exist_ok=True)
+        if os.path.exists(os.path.join(directorio, MANIFIESTO)):
+            raise CommandError(f'{directorio} ya contiene una copia')
+
+        modelos = [etiqueta(modelo) for modelo in modelos_copia()]
+        comienzo = time.monotonic()
+
+        entradas = {}
+        with instantanea(options['database'], directorio) as (using, snapshot):
+            tareas = [(nombre, directorio, using, snapshot) for nombre in modelos]
+            # Los procesos hijos abren su propia conexion
+            connections.close_all()
+            with get_context('fork').Pool(max(1, options['procesos'])) as pool:
+                for entrada in pool.imap_unordered(copiar_modelo, tareas):
+                    entradas[entrada['modelo']] = entrada
+                    self.stdout.write(f"{entrada['modelo']}: {entrada['filas']} filas")
+
+        # El manifiesto se escribe al final: sin el, la copia esta incompleta
+        manifiesto = {
+            'creado': datetime.now(timezone.utc).isoformat(),
+            'modelos': [entradas[nombre] for nombre in modelos],
+        }
+        with open(os.path.join(directorio, MANIFIESTO), 'w', encoding='utf-8') as fichero:
+            json.dump(manifiesto, fichero, indent=2)
+
+        total = sum(entrada['filas'] for entrada in manifiesto['modelos'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Copia creada en {directorio}: {len(modelos)} modelos, {total} filas '
+            f'({time.monotonic() - comienzo:.1f}s).'
+        ))
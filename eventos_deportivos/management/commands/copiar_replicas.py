@@ -0,0 +1,39 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = ('Copiar la base de datos principal SQLite en las replicas SQLite de REPLICAS '
+            'con la API de backup de SQLite, para probar las replicas de lectura en local. '
+            'Las replicas reales (PostgreSQL...) se mantienen con la replicacion del servidor.')
+
+    def handle(self, *args, **options):
+        principal = connections[DEFAULT_DB_ALIAS]
+        if principal.vendor != 'sqlite':
+            raise CommandError('La base de datos principal no es SQLite')
+        replicas = [alias for alias in getattr(settings, 'REPLICAS', {})
+                    if connections[alias].vendor == 'sqlite']
+        if not replicas:
+            raise CommandError('No hay replicas SQLite en DATABASE_REPLICAS')
+
+        comienzo = time.monotonic()
+        origen = sqlite3.connect(principal.settings_dict['NAME'])
+        try:
+            for alias in replicas:
+                # Se cierra la conexion de Django para no copiar encima de una lectura abierta
+                connections[alias].close()
+                destino = sqlite3.connect(connections[alias].settings_dict['NAME'])
+                try:
+                    origen.backup(destino)
+                finally:
+                    destino.close()
+                self.stdout.write(f"{alias}: {connections[alias].settings_dict['NAME']}")
+        finally:
+            origen.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(replicas)} replicas copiadas ({time.monotonic() - comienzo:.1f}s).'
+        ))
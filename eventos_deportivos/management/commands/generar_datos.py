@@ -1,127 +1,424 @@
-from django.core.management.base import BaseCommand
-from eventos_deportivos.models import *
-from faker import Faker
 import random
+import time as reloj
+import zlib
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from multiprocessing import get_context
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from faker import Faker
+
+from eventos_deportivos.models import *
+from eventos_deportivos.importar import clave
+from eventos_deportivos.clasificacion import reconstruir_clasificacion
+from eventos_deportivos.estadisticas import reconstruir_estadisticas
+from eventos_deportivos.cache_paginas import MODELOS_VERSIONADOS, subir_version
 
 fake = Faker()
 
+# Todas las fechas se generan a partir de este dia, asi con la misma --seed
+# se obtienen exactamente los mismos datos se ejecute cuando se ejecute
+REFERENCIA = date(2025, 1, 1)
+POSICIONES = [p[0] for p in Jugador.POSICIONES]
+CONTRASENA = '1234'
+# Filas de cada bloque generado. Es fijo (no depende de --lote) para que la
+# misma --seed de los mismos datos con cualquier tamaño de lote
+FILAS_BLOQUE = 1000
+
+
+# ----------------------------
+# Generacion de filas por bloques
+# Cada bloque tiene su propio random y semilla de Faker (derivados de --seed,
+# el modelo y el numero de bloque), asi el resultado no depende del numero
+# de procesos. Las filas usan indices (equipo 0..n-1) en vez de ids, que
+# solo conoce el proceso principal despues de insertar.
+# ----------------------------
+def aleatorio(semilla, modelo, bloque):
+    numero = zlib.crc32(f'{semilla}-{modelo}-{bloque}'.encode())
+    fake.seed_instance(numero)
+    return random.Random(numero)
+
+
+def dia(rng, desde, hasta):
+    # Fecha entre REFERENCIA + desde dias y REFERENCIA + hasta dias
+    return REFERENCIA + timedelta(days=rng.randint(desde, hasta))
+
+
+def filas_usuarios(rng, inicio, cantidad, contexto):
+    return [
+        (fake.user_name(), fake.email(), rng.choice([Usuario.MANAGER, Usuario.ARBITRO]),
+         fake.first_name(), fake.last_name())
+        for _ in range(cantidad)
+    ]
+
+
+def filas_estadios(rng, inicio, cantidad, contexto):
+    return [
+        (fake.company(), fake.city(), rng.randint(5000, 50000), rng.random() < 0.5)
+        for _ in range(cantidad)
+    ]
+
+
+def filas_equipos(rng, inicio, cantidad, contexto):
+    return [
+        (fake.company(), fake.city(), dia(rng, -100 * 365, -10 * 365))
+        for _ in range(cantidad)
+    ]
+
+
+def filas_jugadores(rng, inicio, cantidad, contexto):
+    equipos = contexto['equipos']
+    filas = []
+    for _ in range(cantidad):
+        # Cada jugador entra en un equipo al azar (si hay equipos)
+        equipo = rng.randrange(equipos) if equipos else None
+        filas.append((
+            fake.first_name(), fake.last_name(), dia(rng, -40 * 365, -18 * 365), rng.choice(POSICIONES),
+            equipo, dia(rng, -5 * 365, 0), rng.random() < 0.05,
+        ))
+    return filas
+
+
+def filas_torneos(rng, inicio, cantidad, contexto):
+    return [
+        (fake.company(), fake.country(), dia(rng, -2 * 365, 0), dia(rng, 1, 365))
+        for _ in range(cantidad)
+    ]
+
+
+def filas_partidos(rng, inicio, cantidad, contexto):
+    equipos = contexto['equipos']
+    torneos = contexto['torneos']
+    filas = []
+    for _ in range(cantidad):
+        local = rng.randrange(equipos)
+        visitante = rng.randrange(equipos - 1)
+        if visitante >= local:
+            visitante += 1
+        segundos = rng.randint(-365 * 86400, 0)
+        filas.append((local, visitante, segundos, rng.randint(0, 5), rng.randint(0, 5), rng.randrange(torneos)))
+    return filas
+
+
+def filas_sponsors(rng, inicio, cantidad, contexto):
+    equipos = contexto['equipos']
+    return [
+        (fake.company(), round(rng.uniform(1000, 50000), 2), fake.country(),
+         rng.sample(range(equipos), k=min(2, equipos)))
+        for _ in range(cantidad)
+    ]
+
+
+def filas_premios(rng, inicio, cantidad, contexto):
+    equipos = contexto['equipos']
+    return [
+        (fake.catch_phrase()[:100], round(rng.uniform(1000, 50000), 2),
+         rng.randrange(equipos) if equipos else None)
+        for _ in range(cantidad)
+    ]
+
+
+GENERADORES = {
+    'usuarios': filas_usuarios,
+    'estadios': filas_estadios,
+    'equipos': filas_equipos,
+    'jugadores': filas_jugadores,
+    'torneos': filas_torneos,
+    'partidos': filas_partidos,
+    'sponsors': filas_sponsors,
+    'premios': filas_premios,
+}
+
+
+class Unicos:
+    """
+    Claves ya usadas de una restriccion unica (en minusculas, como la
+    restriccion). Faker repite nombres: la segunda vez se numeran
+    ("Smith 2", "Smith 3"...). Se rellena con lo que ya hay en la base de
+    datos y se usa en el proceso principal, en orden, para que el resultado
+    con la misma --seed no dependa de --procesos.
+    """
+
+    def __init__(self, filas=(), separador=' '):
+        self.usadas = {clave(*fila) for fila in filas}
+        # Usuarios y licencias no llevan espacios: "ana12_2", "LIC-0000001-2"
+        self.separador = separador
+
+    def unico(self, texto, *resto):
+        # Devuelve texto (numerado si hace falta) con (texto, *resto) sin usar
+        candidato, numero = texto, 1
+        while clave(candidato, *resto) in self.usadas:
+            numero += 1
+            sufijo = f'{self.separador}{numero}'
+            candidato = texto[:100 - len(sufijo)] + sufijo
+        self.usadas.add(clave(candidato, *resto))
+        return candidato
+
+
+def eventos_partido(rng, partido, plantillas):
+    """
+    Acta de un partido recien creado: once titulares (o los que haya) de
+    cada equipo, un gol por cada gol del marcador con asistencia a veces y
+    algunas tarjetas. Devuelve los EventoPartido sin guardar.
+    """
+    eventos = []
+    for equipo_id, goles in ((partido.equipo_local_id, partido.goles_local),
+                             (partido.equipo_visitante_id, partido.goles_visitante)):
+        plantilla = plantillas.get(equipo_id, [])
+        titulares = rng.sample(plantilla, k=min(11, len(plantilla)))
+        if not titulares:
+            continue
+        eventos.extend(EventoPartido(partido_id=partido.id, jugador_id=j, tipo=EventoPartido.ALINEACION)
+                       for j in titulares)
+        for _ in range(goles or 0):
+            autor, pasador = rng.choice(titulares), rng.choice(titulares)
+            minuto = rng.randint(1, 90)
+            eventos.append(EventoPartido(partido_id=partido.id, jugador_id=autor, tipo=EventoPartido.GOL,
+                                         minuto=minuto))
+            if pasador != autor and rng.random() < 0.6:
+                eventos.append(EventoPartido(partido_id=partido.id, jugador_id=pasador,
+                                             tipo=EventoPartido.ASISTENCIA, minuto=minuto))
+        for _ in range(rng.randint(0, 3)):
+            eventos.append(EventoPartido(partido_id=partido.id, jugador_id=rng.choice(titulares),
+                                         tipo=EventoPartido.TARJETA, minuto=rng.randint(1, 90)))
+    return eventos
+
+
+def fecha_libre(fecha, usadas):
+    # partido_fecha_unica: se retrasa un segundo hasta encontrar una fecha libre
+    while fecha in usadas:
+        fecha += timedelta(seconds=1)
+    usadas.add(fecha)
+    return fecha
+
+
+def generar_bloque(tarea):
+    # Se ejecuta en los procesos del pool (o en el principal con --procesos 1)
+    modelo, semilla, bloque, inicio, cantidad, contexto = tarea
+    rng = aleatorio(semilla, modelo, bloque)
+    return GENERADORES[modelo](rng, inicio, cantidad, contexto)
+
+
 class Command(BaseCommand):
-    help = 'Generar datos de prueba sin violar UNIQUE/OneToOne'
-
-    def handle(self, *args, **kwargs):
-
-        # --- USUARIOS ---
-        usuarios = []
-        for _ in range(5):
-            rol = random.choice([Usuario.MANAGER, Usuario.ARBITRO])
-            u = Usuario.objects.create_user(
-                username=fake.user_name(),
-                email=fake.email(),
-                password='1234',
-                rol=rol
-            )
-            usuarios.append(u)
-            if rol == Usuario.ARBITRO:
-                Arbitro.objects.create(
-                    usuario=u,
-                    nombre=fake.first_name(),
-                    apellido=fake.last_name(),
-                    licencia=fake.unique.bothify(text='LIC-#####')
-                )
-            else:
-                Manager.objects.create(usuario=u)
+    help = 'Generar datos de prueba sin violar UNIQUE/OneToOne, en bloque y reproducibles con --seed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=5)
+        parser.add_argument('--estadios', type=int, default=3)
+        parser.add_argument('--equipos', type=int, default=3)
+        parser.add_argument('--jugadores', type=int, default=10)
+        parser.add_argument('--torneos', type=int, default=None,
+                            help='Por defecto uno por arbitro (minimo 1)')
+        parser.add_argument('--partidos', type=int, default=5)
+        parser.add_argument('--actas', type=int, default=None,
+                            help='Partidos (los primeros) con acta de eventos; por defecto todos')
+        parser.add_argument('--sponsors', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Semilla para generar siempre los mismos datos')
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Filas por bulk_create y por transaccion')
+        parser.add_argument('--procesos', type=int, default=1,
+                            help='Procesos que generan las filas con Faker en paralelo')
+
+    def handle(self, *args, **options):
+        self.semilla = options['seed'] if options['seed'] is not None else random.randrange(2 ** 31)
+        self.lote = options['lote']
+        if self.lote < 1:
+            raise CommandError('--lote debe ser mayor que 0')
+        if options['partidos'] and options['equipos'] < 2:
+            raise CommandError('Para generar partidos hacen falta al menos 2 equipos')
+
+        # Un solo hash para todos los usuarios: create_user lo calcularia en cada uno
+        self.contrasena = make_password(CONTRASENA)
+        self.pool = None
+        if options['procesos'] > 1:
+            # Los procesos hijos no usan la base de datos
+            connections.close_all()
+            self.pool = get_context('fork').Pool(options['procesos'])
+        try:
+            self.generar(options)
+        finally:
+            if self.pool is not None:
+                self.pool.close()
+                self.pool.join()
+
+        self.stdout.write(self.style.SUCCESS(f'Datos generados correctamente (--seed {self.semilla}).'))
+
+    def bloques(self, modelo, total, contexto=None):
+        # Genera las filas de total elementos en orden y las agrupa en lotes de --lote
+        tareas = [
+            (modelo, self.semilla, numero, inicio, min(FILAS_BLOQUE, total - inicio), contexto or {})
+            for numero, inicio in enumerate(range(0, total, FILAS_BLOQUE))
+        ]
+        generados = self.pool.imap(generar_bloque, tareas) if self.pool is not None else map(generar_bloque, tareas)
+        lote = []
+        for filas in generados:
+            lote.extend(filas)
+            while len(lote) >= self.lote:
+                yield lote[:self.lote]
+                lote = lote[self.lote:]
+        if lote:
+            yield lote
+
+    def insertar(self, modelo, total, crear, contexto=None):
+        # Inserta cada bloque en su propia transaccion y devuelve los ids creados
+        comienzo = reloj.monotonic()
+        ids = []
+        inicio = 0
+        for filas in self.bloques(modelo, total, contexto):
+            with transaction.atomic():
+                ids.extend(crear(inicio, filas))
+            inicio += len(filas)
+        if total:
+            self.stdout.write(f'{modelo}: {total} filas ({reloj.monotonic() - comienzo:.1f}s)')
+        return ids
+
+    def generar(self, options):
+        # --- USUARIOS (y su Manager o Arbitro) ---
+        self.arbitros = []
+        # Otra ejecucion sobre la misma base de datos repetiria usuarios y licencias
+        usuarios_usados = Unicos(Usuario.objects.values_list('username'), separador='_')
+        licencias_usadas = Unicos(Arbitro.objects.values_list('licencia'), separador='-')
+
+        def crear_usuarios(inicio, filas):
+            usuarios = Usuario.objects.bulk_create([
+                Usuario(username=usuarios_usados.unico(f'{username}{inicio + i}'), email=email,
+                        password=self.contrasena, rol=rol, first_name=nombre, last_name=apellido)
+                for i, (username, email, rol, nombre, apellido) in enumerate(filas)
+            ])
+            Manager.objects.bulk_create([Manager(usuario=u) for u in usuarios if u.rol == Usuario.MANAGER])
+            self.arbitros.extend(a.id for a in Arbitro.objects.bulk_create([
+                Arbitro(usuario=u, nombre=u.first_name, apellido=u.last_name,
+                        licencia=licencias_usadas.unico(f'LIC-{inicio + i:07d}'))
+                for i, u in enumerate(usuarios) if u.rol == Usuario.ARBITRO
+            ]))
+            return [u.id for u in usuarios]
+
+        self.insertar('usuarios', options['usuarios'], crear_usuarios)
 
         # --- ESTADIOS ---
-        estadios = []
-        for _ in range(3):
-            e = Estadio.objects.create(
-                nombre=fake.company(),
-                ciudad=fake.city(),
-                capacidad=random.randint(5000, 50000),
-                cubierto=random.choice([True, False])
-            )
-            estadios.append(e)
-
-        # --- EQUIPOS ---
-        equipos = []
-        for i in range(len(estadios)):
-            eq = Equipo.objects.create(
-                nombre=fake.company(),
-                ciudad=fake.city(),
-                fundacion=fake.date_between(start_date='-100y', end_date='-10y'),
-                activo=True,
-                estadio_principal=estadios[i]  # cada equipo un estadio
-            )
-            equipos.append(eq)
-
-        # --- JUGADORES ---
-        jugadores = []
-        for _ in range(10):
-            stats = EstadisticasJugador.objects.create(
-                partidos_jugados=random.randint(0, 100),
-                goles=random.randint(0, 50),
-                asistencias=random.randint(0, 50),
-                tarjetas=random.randint(0, 20)
-            )
-            j = Jugador.objects.create(
-                nombre=fake.first_name(),
-                apellido=fake.last_name(),
-                fecha_nacimiento=fake.date_of_birth(minimum_age=18, maximum_age=40),
-                posicion=random.choice([p[0] for p in Jugador.POSICIONES]),
-                estadisticas=stats
-            )
-            jugadores.append(j)
-
-        # --- ASIGNAR JUGADORES A EQUIPOS ---
-        for eq in equipos:
-            eq_jugadores = random.sample(jugadores, k=3)
-            for j in eq_jugadores:
-                EquipoJugador.objects.create(
-                    jugador=j,
-                    equipo=eq,
-                    fecha_ingreso=fake.date_between(start_date='-5y', end_date='today'),
-                    capitan=random.choice([True, False])
-                )
-
-        # --- TORNEOS ---
-        arbitros = list(Arbitro.objects.all())
-        torneos = []
-        for i, arb in enumerate(arbitros):
-            t = Torneo.objects.create(
-                nombre=fake.company(),
-                pais=fake.country(),
-                fecha_inicio=fake.date_between(start_date='-2y', end_date='today'),
-                fecha_fin=fake.date_between(start_date='today', end_date='+1y'),
-                arbitro_principal=arb  # cada torneo un árbitro distinto
-            )
-            torneos.append(t)
+        estadios_usados = Unicos(Estadio.objects.values_list('nombre', 'ciudad'))
+        estadios = self.insertar('estadios', options['estadios'], lambda inicio, filas: [
+            e.id for e in Estadio.objects.bulk_create([
+                Estadio(nombre=estadios_usados.unico(nombre, ciudad), ciudad=ciudad, capacidad=capacidad,
+                        cubierto=cubierto)
+                for nombre, ciudad, capacidad, cubierto in filas
+            ])
+        ])
+
+        # --- EQUIPOS (cada equipo un estadio mientras haya) ---
+        equipos_usados = Unicos(Equipo.objects.values_list('nombre', 'ciudad'))
+        equipos = self.insertar('equipos', options['equipos'], lambda inicio, filas: [
+            e.id for e in Equipo.objects.bulk_create([
+                Equipo(nombre=equipos_usados.unico(nombre, ciudad), ciudad=ciudad, fundacion=fundacion, activo=True,
+                       estadio_principal_id=estadios[inicio + i] if inicio + i < len(estadios) else None)
+                for i, (nombre, ciudad, fundacion) in enumerate(filas)
+            ])
+        ])
+
+        # --- JUGADORES, sus estadisticas (a cero) y su equipo ---
+        # Nombre y apellido no se repiten: se numera el apellido
+        jugadores_usados = Unicos((apellido, nombre) for nombre, apellido in
+                                  Jugador.objects.values_list('nombre', 'apellido'))
+        # Como mucho un capitan por equipo (igual que plantillas.py)
+        con_capitan = set(EquipoJugador.con_eliminados.filter(capitan=True).values_list('equipo_id', flat=True))
+        # Jugadores de cada equipo nuevo, para las actas de los partidos
+        plantillas = {}
+
+        def capitan_libre(equipo, capitan):
+            if not capitan or equipos[equipo] in con_capitan:
+                return False
+            con_capitan.add(equipos[equipo])
+            return True
+
+        def crear_jugadores(inicio, filas):
+            estadisticas = EstadisticasJugador.objects.bulk_create([EstadisticasJugador() for _ in filas])
+            jugadores = Jugador.objects.bulk_create([
+                Jugador(nombre=nombre, apellido=jugadores_usados.unico(apellido, nombre), fecha_nacimiento=nacimiento,
+                        posicion=posicion, estadisticas_id=estadistica.id)
+                for (nombre, apellido, nacimiento, posicion, _, _, _), estadistica in zip(filas, estadisticas)
+            ])
+            EquipoJugador.objects.bulk_create([
+                EquipoJugador(jugador_id=jugador.id, equipo_id=equipos[equipo], fecha_ingreso=ingreso,
+                              capitan=capitan_libre(equipo, capitan))
+                for (_, _, _, _, equipo, ingreso, capitan), jugador in zip(filas, jugadores)
+                if equipo is not None
+            ])
+            for (_, _, _, _, equipo, _, _), jugador in zip(filas, jugadores):
+                if equipo is not None:
+                    plantillas.setdefault(equipos[equipo], []).append(jugador.id)
+            return [j.id for j in jugadores]
+
+        self.insertar('jugadores', options['jugadores'], crear_jugadores, {'equipos': len(equipos)})
+
+        # --- TORNEOS (cada torneo un arbitro distinto mientras haya) ---
+        total_torneos = options['torneos'] if options['torneos'] is not None else max(1, len(self.arbitros))
+        torneos_usados = Unicos(Torneo.objects.values_list('nombre'))
+        torneos = self.insertar('torneos', total_torneos, lambda inicio, filas: [
+            t.id for t in Torneo.objects.bulk_create([
+                Torneo(nombre=torneos_usados.unico(nombre), pais=pais, fecha_inicio=inicio_torneo, fecha_fin=fin,
+                       arbitro_principal_id=self.arbitros[inicio + i] if inicio + i < len(self.arbitros) else None)
+                for i, (nombre, pais, inicio_torneo, fin) in enumerate(filas)
+            ])
+        ])
 
         # --- PARTIDOS ---
-        for _ in range(5):
-            Partido.objects.create(
-                equipo_local=random.choice(equipos),
-                equipo_visitante=random.choice([e for e in equipos if e != equipos[0]]),
-                fecha=fake.date_time_between(start_date='-1y', end_date='now'),
-                resultado=f"{random.randint(0,5)}-{random.randint(0,5)}",
-                torneo=random.choice(torneos)
-            )
+        if options['partidos'] and not torneos:
+            raise CommandError('Para generar partidos hace falta al menos un torneo')
+        referencia = datetime.combine(REFERENCIA, time(12), tzinfo=timezone.utc)
+        fechas_usadas = set(Partido.objects.values_list('fecha', flat=True))
+        actas = options['actas'] if options['actas'] is not None else options['partidos']
+
+        def crear_partidos(inicio, filas):
+            # bulk_create no llama a save(): el resultado se rellena aqui
+            partidos = Partido.objects.bulk_create([
+                Partido(equipo_local_id=equipos[local], equipo_visitante_id=equipos[visitante],
+                        fecha=fecha_libre(referencia + timedelta(seconds=segundos), fechas_usadas), goles_local=gl, goles_visitante=gv,
+                        resultado=f'{gl}-{gv}', torneo_id=torneos[torneo])
+                for local, visitante, segundos, gl, gv, torneo in filas
+            ])
+            # Las actas se generan aqui, en orden: necesitan los ids de los
+            # partidos y las plantillas, que solo conoce el proceso principal
+            rng = random.Random(zlib.crc32(f'{self.semilla}-eventos-{inicio}'.encode()))
+            EventoPartido.objects.bulk_create([
+                evento for partido in partidos[:max(0, actas - inicio)]
+                for evento in eventos_partido(rng, partido, plantillas)
+            ])
+            return []
+
+        self.insertar('partidos', options['partidos'], crear_partidos,
+                      {'equipos': len(equipos), 'torneos': len(torneos)})
 
         # --- SPONSORS ---
-        for _ in range(3):
-            s = Sponsor.objects.create(
-                nombre=fake.company(),
-                monto=random.uniform(1000, 50000),
-                pais=fake.country()
-            )
-            s.equipos.set(random.sample(equipos, k=2))
-
-        # --- PREMIOS ---
-        for t in torneos:
-            Premio.objects.create(
-                nombre=fake.catch_phrase(),
-                monto=random.uniform(1000, 50000),
-                torneo=t,
-                ganador=random.choice(equipos)
-            )
-
-        self.stdout.write(self.style.SUCCESS('Datos generados correctamente.'))
+        SponsorEquipos = Sponsor.equipos.through
+        sponsors_usados = Unicos(Sponsor.objects.values_list('nombre'))
+
+        def crear_sponsors(inicio, filas):
+            sponsors = Sponsor.objects.bulk_create([
+                Sponsor(nombre=sponsors_usados.unico(nombre), monto=Decimal(str(monto)), pais=pais)
+                for nombre, monto, pais, _ in filas
+            ])
+            SponsorEquipos.objects.bulk_create([
+                SponsorEquipos(sponsor_id=sponsor.id, equipo_id=equipos[equipo])
+                for (_, _, _, elegidos), sponsor in zip(filas, sponsors) for equipo in elegidos
+            ])
+            return [s.id for s in sponsors]
+
+        self.insertar('sponsors', options['sponsors'], crear_sponsors, {'equipos': len(equipos)})
+
+        # --- PREMIOS (uno por torneo) ---
+        self.insertar('premios', len(torneos), lambda inicio, filas: [
+            p.id for p in Premio.objects.bulk_create([
+                Premio(nombre=nombre, monto=Decimal(str(monto)), torneo_id=torneos[inicio + i],
+                       ganador_id=equipos[ganador] if ganador is not None else None)
+                for i, (nombre, monto, ganador) in enumerate(filas)
+            ])
+        ], {'equipos': len(equipos)})
+
+        # bulk_create no envia señales: se recalcula lo derivado a mano
+        reconstruir_clasificacion()
+        reconstruir_estadisticas()
+        for modelo in MODELOS_VERSIONADOS:
+            subir_version(modelo)
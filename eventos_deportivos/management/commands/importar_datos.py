@@ -0,0 +1,90 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from eventos_deportivos.importar import IMPORTACIONES, LECTORES, FilaRechazada, Rechazados, decodificar
+
+
+class Command(BaseCommand):
+    help = ('Importar jugadores, equipos, plantillas o partidos desde CSV o NDJSON. '
+            'Resuelve las claves ajenas con mapas en memoria y actualiza o inserta '
+            'con bulk_create en transacciones por lotes. Las filas con errores se '
+            'guardan en un fichero aparte sin detener la importacion.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('entidad', choices=sorted(IMPORTACIONES))
+        parser.add_argument('fichero')
+        parser.add_argument('--formato', choices=sorted(LECTORES),
+                            help='Por defecto segun la extension (.csv o .ndjson/.jsonl)')
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Filas por bulk_create y por transaccion')
+        parser.add_argument('--rechazados',
+                            help='Fichero para las filas rechazadas (por defecto <fichero>.rechazados.<formato>)')
+
+    def handle(self, *args, **options):
+        ruta = options['fichero']
+        if not os.path.exists(ruta):
+            raise CommandError(f'No existe el fichero {ruta}')
+        formato = options['formato'] or ('csv' if ruta.lower().endswith('.csv') else 'ndjson')
+        self.lote = options['lote']
+        if self.lote < 1:
+            raise CommandError('--lote debe ser mayor que 0')
+
+        self.importador = IMPORTACIONES[options['entidad']]()
+        self.rechazados = Rechazados(options['rechazados'] or f'{ruta}.rechazados.{formato}', formato)
+        self.comienzo = time.monotonic()
+        self.leidas = 0
+
+        try:
+            with open(ruta, newline='', encoding='utf-8') as fichero:
+                lote = {}
+                for numero, fila in LECTORES[formato](fichero):
+                    self.leidas += 1
+                    try:
+                        fila = decodificar(fila)
+                        clave, valores = self.importador.convertir(fila)
+                    except FilaRechazada as error:
+                        self.rechazados.escribir(numero, fila, str(error))
+                        continue
+                    # Si una clave se repite en el lote gana la ultima fila
+                    lote.pop(clave, None)
+                    lote[clave] = (numero, fila, valores)
+                    if len(lote) >= self.lote:
+                        self.guardar(lote)
+                        lote = {}
+                if lote:
+                    self.guardar(lote)
+            self.importador.terminar()
+        finally:
+            self.rechazados.cerrar()
+
+        segundos = time.monotonic() - self.comienzo
+        self.stdout.write(self.style.SUCCESS(
+            f'Importacion terminada: {self.importador.nuevas} nuevas, {self.importador.actualizadas} actualizadas, '
+            f'{self.rechazados.total} rechazadas en {segundos:.1f}s ({self.leidas / max(segundos, 0.001):.0f} filas/s).'
+        ))
+        if self.rechazados.total:
+            self.stdout.write(f'Filas rechazadas en {self.rechazados.ruta}')
+
+    def guardar(self, lote):
+        try:
+            with transaction.atomic():
+                self.importador.guardar({clave: valores for clave, (_, _, valores) in lote.items()})
+        except IntegrityError:
+            # Se repite el lote fila a fila para rechazar solo las que fallan
+            for clave, (numero, fila, valores) in lote.items():
+                try:
+                    with transaction.atomic():
+                        self.importador.guardar({clave: valores})
+                except IntegrityError as error:
+                    self.rechazados.escribir(numero, fila, str(error))
+        self.progreso()
+
+    def progreso(self):
+        segundos = time.monotonic() - self.comienzo
+        self.stdout.write(
+            f'{self.leidas} filas leidas ({self.leidas / max(segundos, 0.001):.0f} filas/s), '
+            f'{self.rechazados.total} rechazadas'
+        )
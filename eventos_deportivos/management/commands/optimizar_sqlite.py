@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = ('Ejecutar PRAGMA optimize (y ANALYZE con --analyze) y vaciar el WAL en una base '
+            'de datos SQLite. Se programa con cron o se deja en marcha con --cada SEGUNDOS.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true',
+                            help='ANALYZE completo en vez de solo lo que PRAGMA optimize considere necesario')
+        parser.add_argument('--cada', type=int, default=0,
+                            help='Repetir cada N segundos (0 = una vez)')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        conexion = connections[options['database']]
+        if conexion.vendor != 'sqlite':
+            raise CommandError(f"{options['database']} no es una base de datos SQLite")
+        while True:
+            self.optimizar(conexion, options['analyze'])
+            if not options['cada']:
+                break
+            # No se mantiene la conexion abierta entre pasadas
+            conexion.close()
+            time.sleep(options['cada'])
+
+    def optimizar(self, conexion, analyze):
+        comienzo = time.monotonic()
+        with conexion.cursor() as cursor:
+            if analyze:
+                cursor.execute('ANALYZE')
+            cursor.execute('PRAGMA optimize')
+            # Con WAL: pasa el WAL a la base de datos y lo deja vacio
+            cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self.stdout.write(self.style.SUCCESS(
+            f"{conexion.alias} optimizada ({time.monotonic() - comienzo:.1f}s)."
+        ))
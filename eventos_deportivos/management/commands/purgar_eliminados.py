@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from eventos_deportivos.purga import TAMANO_LOTE, purgar_eliminados
+
+
+class Command(BaseCommand):
+    help = ('Borrar de verdad las filas eliminadas (eliminacion suave) y todo lo que depende de '
+            'ellas, por lotes y en transacciones cortas. Se programa con cron o se deja en '
+            'marcha con --cada SEGUNDOS.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE,
+                            help='Filas por transaccion de borrado')
+        parser.add_argument('--pausa', type=float, default=0,
+                            help='Segundos de espera entre lotes, para dejar paso a otras escrituras')
+        parser.add_argument('--cada', type=int, default=0,
+                            help='Repetir cada N segundos (0 = una vez)')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que 0')
+        while True:
+            self.purgar(options['lote'], options['pausa'])
+            if not options['cada']:
+                break
+            # No se mantiene la conexion abierta entre pasadas
+            connection.close()
+            time.sleep(options['cada'])
+
+    def purgar(self, lote, pausa):
+        comienzo = time.monotonic()
+        borradas = purgar_eliminados(lote, pausa)
+        detalle = ', '.join(f'{modelo}: {total}' for modelo, total in sorted(borradas.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f"Purga terminada ({time.monotonic() - comienzo:.1f}s). {detalle or 'Nada que borrar.'}"
+        ))
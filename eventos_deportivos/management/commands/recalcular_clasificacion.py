@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from eventos_deportivos.clasificacion import reconstruir_clasificacion
+
+
+class Command(BaseCommand):
+    help = 'Reconstruir desde cero la clasificacion de todos los torneos'
+
+    def handle(self, *args, **kwargs):
+        total = reconstruir_clasificacion()
+        self.stdout.write(self.style.SUCCESS(f'Clasificacion recalculada ({total} filas).'))
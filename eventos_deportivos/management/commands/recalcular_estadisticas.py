@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from eventos_deportivos.estadisticas import reconstruir_estadisticas
+
+
+class Command(BaseCommand):
+    help = 'Reconstruir desde cero las estadisticas de todos los jugadores a partir de las actas'
+
+    def handle(self, *args, **kwargs):
+        total = reconstruir_estadisticas()
+        self.stdout.write(self.style.SUCCESS(f'Estadisticas recalculadas ({total} jugadores con eventos).'))
@@ -0,0 +1,113 @@
+import json
+import os
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from eventos_deportivos.copias import MANIFIESTO, campos_naturales, leer_modelo, suma
+from eventos_deportivos.cache_paginas import MODELOS_VERSIONADOS, subir_version
+from eventos_deportivos.roles import invalidar_roles
+
+
+class Command(BaseCommand):
+    help = ('Restaurar una copia de copia_seguridad en una base de datos migrada y vacia. '
+            'Comprueba el sha256 de cada fichero, inserta con bulk_create en orden de '
+            'dependencias y comprueba las filas de cada tabla. Si se interrumpe, se '
+            'continua con --continuar.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directorio')
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Filas por bulk_create y por transaccion')
+        parser.add_argument('--continuar', action='store_true',
+                            help='Seguir una restauracion interrumpida en lugar de exigir tablas vacias')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        self.directorio = options['directorio']
+        self.using = options['database']
+        self.lote = options['lote']
+        if self.lote < 1:
+            raise CommandError('--lote debe ser mayor que 0')
+        ruta = os.path.join(self.directorio, MANIFIESTO)
+        if not os.path.exists(ruta):
+            raise CommandError(f'No hay {MANIFIESTO} en {self.directorio}: la copia no existe o esta incompleta')
+        with open(ruta, encoding='utf-8') as fichero:
+            manifiesto = json.load(fichero)
+
+        # Se comprueba todo antes de escribir nada
+        for entrada in manifiesto['modelos']:
+            fichero = os.path.join(self.directorio, entrada['fichero'])
+            if not os.path.exists(fichero):
+                raise CommandError(f"Falta el fichero {entrada['fichero']}")
+            if suma(fichero) != entrada['sha256']:
+                raise CommandError(f"El sha256 de {entrada['fichero']} no coincide con el manifiesto")
+            modelo = apps.get_model(entrada['modelo'])
+            if not options['continuar'] and modelo._base_manager.using(self.using).exists():
+                raise CommandError(f"La tabla de {entrada['modelo']} ya tiene filas: "
+                                   f"restaura en una base de datos vacia o usa --continuar")
+
+        comienzo = time.monotonic()
+        for entrada in manifiesto['modelos']:
+            self.restaurar(entrada)
+
+        # bulk_create no envia señales: se invalidan las caches a mano
+        for modelo in MODELOS_VERSIONADOS:
+            subir_version(modelo)
+        invalidar_roles()
+
+        total = sum(entrada['filas'] for entrada in manifiesto['modelos'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Copia del {manifiesto['creado']} restaurada: {total} filas ({time.monotonic() - comienzo:.1f}s)."
+        ))
+
+    def restaurar(self, entrada):
+        modelo = apps.get_model(entrada['modelo'])
+        filas = modelo._base_manager.using(self.using)
+        existentes = filas.count()
+        if existentes and existentes == entrada['filas']:
+            self.stdout.write(f"{entrada['modelo']}: ya restaurado")
+            return
+
+        # Los ficheros van ordenados por id: tras una interrupcion se
+        # continua despues del ultimo id que llego a guardarse
+        ultimo = filas.order_by('-pk').values_list('pk', flat=True).first() if existentes else None
+        naturales = {campo.attname: self.ids_naturales(campo) for campo in campos_naturales(modelo)}
+
+        lote = []
+        for fila in leer_modelo(os.path.join(self.directorio, entrada['fichero'])):
+            if ultimo is not None and fila[modelo._meta.pk.attname] <= ultimo:
+                continue
+            for campo, ids in naturales.items():
+                if fila[campo] is not None:
+                    fila[campo] = ids[tuple(fila[campo])]
+            lote.append(modelo(**fila))
+            if len(lote) >= self.lote:
+                self.guardar(modelo, lote)
+                lote = []
+        if lote:
+            self.guardar(modelo, lote)
+
+        # Con ids explicitos las secuencias (PostgreSQL) no avanzan solas
+        connection = connections[self.using]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [modelo]):
+                cursor.execute(sql)
+
+        restauradas = filas.count()
+        if restauradas != entrada['filas']:
+            raise CommandError(f"{entrada['modelo']}: el manifiesto indica {entrada['filas']} filas "
+                               f"y la tabla tiene {restauradas}")
+        self.stdout.write(f"{entrada['modelo']}: {restauradas} filas")
+
+    def guardar(self, modelo, lote):
+        with transaction.atomic(using=self.using):
+            modelo._base_manager.db_manager(self.using).bulk_create(lote)
+
+    def ids_naturales(self, campo):
+        # {clave natural: id} en la base de datos de destino
+        filas = campo.related_model._default_manager.db_manager(self.using).select_related()
+        return {tuple(fila.natural_key()): fila.pk for fila in filas}
@@ -0,0 +1,120 @@
+import logging
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Node
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Presupuesto de consultas por peticion
+# Cuenta las sentencias SQL de cada peticion y las agrupa por su forma
+# (la consulta sin valores). Si una vista pasa de su limite o repite la
+# misma forma muchas veces (patron N+1) se registra un aviso o se lanza
+# una excepcion, indicando la linea de plantilla que la provoco.
+# ----------------------------
+
+CONFIGURACION = {
+    'ACTIVO': False,
+    'MAXIMO': 50,          # consultas por peticion si la vista no tiene limite propio
+    'VISTAS': {},          # nombre de la url -> limite de consultas
+    'REPETICIONES': 10,    # veces que puede repetirse la misma forma de consulta
+    'ERROR': False,        # True: lanza PresupuestoConsultasExcedido en vez de avisar
+}
+
+# Cadenas, numeros y listas IN (...) se sustituyen para comparar solo la forma
+CADENAS = re.compile(r"'(?:[^']|'')*'")
+NUMEROS = re.compile(r'\b\d+(?:\.\d+)?\b')
+LISTAS = re.compile(r'\((?:\s*%s\s*,)*\s*%s\s*\)')
+
+
+class PresupuestoConsultasExcedido(Exception):
+    pass
+
+
+def forma_consulta(sql):
+    sql = CADENAS.sub('%s', sql)
+    sql = NUMEROS.sub('%s', sql)
+    return LISTAS.sub('(...)', sql)
+
+
+def origen_consulta():
+    """
+    Devuelve "plantilla:linea" del nodo de plantilla que se estaba
+    renderizando o, si la consulta sale del codigo Python, "fichero:linea"
+    del primer marco del proyecto.
+    """
+    codigo = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        nodo = frame.f_locals.get('self')
+        if frame.f_code.co_name == 'render_annotated' and isinstance(nodo, Node):
+            origen = getattr(nodo, 'origin', None)
+            token = getattr(nodo, 'token', None)
+            if origen is not None and token is not None:
+                return f'{origen.template_name}:{token.lineno}'
+        fichero = frame.f_code.co_filename
+        if (codigo is None and fichero.startswith(str(settings.BASE_DIR))
+                and fichero != __file__ and 'site-packages' not in fichero):
+            codigo = f'{fichero}:{frame.f_lineno}'
+        frame = frame.f_back
+    return codigo
+
+
+class Registro:
+    # Se envuelve en cada conexion con execute_wrapper durante la peticion
+    def __init__(self):
+        self.formas = Counter()
+        self.origenes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        forma = forma_consulta(sql)
+        self.formas[forma] += 1
+        # Solo se busca el origen cuando la forma se repite, y una vez
+        if self.formas[forma] == 2:
+            self.origenes[forma] = origen_consulta()
+        return execute(sql, params, many, context)
+
+
+class PresupuestoConsultasMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.configuracion = {**CONFIGURACION, **getattr(settings, 'PRESUPUESTO_CONSULTAS', {})}
+        if not self.configuracion['ACTIVO']:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        registro = Registro()
+        with ExitStack() as pila:
+            for alias in connections:
+                pila.enter_context(connections[alias].execute_wrapper(registro))
+            response = self.get_response(request)
+
+        total = sum(registro.formas.values())
+        response['X-Consultas'] = str(total)
+
+        vista = request.resolver_match.view_name if request.resolver_match else request.path
+        problemas = self.problemas(vista, total, registro)
+        if problemas:
+            mensaje = f'{request.method} {request.get_full_path()} ({vista}): ' + '; '.join(problemas)
+            if self.configuracion['ERROR']:
+                raise PresupuestoConsultasExcedido(mensaje)
+            logger.warning(mensaje)
+        return response
+
+    def problemas(self, vista, total, registro):
+        limite = self.configuracion['VISTAS'].get(vista, self.configuracion['MAXIMO'])
+        problemas = []
+        if total > limite:
+            problemas.append(f'{total} consultas (limite {limite})')
+        for forma, veces in registro.formas.most_common():
+            if veces <= self.configuracion['REPETICIONES']:
+                break
+            problemas.append(f'{veces} veces desde {registro.origenes.get(forma)}: {forma}')
+        return problemas
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.15 on 2026-10-18 07:56
+
+import re
+
+from django.db import migrations, models
+
+# Partidos procesados en cada bloque del rellenado
+TAMANO_BLOQUE = 2000
+
+
+def rellenar_goles(apps, schema_editor):
+    # Convierte los resultados "x-x" existentes en columnas enteras, por bloques de id
+    Partido = apps.get_model('eventos_deportivos', 'Partido')
+    formato = re.compile(r'^\s*(\d+)\s*-\s*(\d+)\s*$')
+    ultimo_id = 0
+    while True:
+        bloque = list(
+            Partido.objects.filter(id__gt=ultimo_id).order_by('id').only('id', 'resultado')[:TAMANO_BLOQUE]
+        )
+        if not bloque:
+            break
+        cambiados = []
+        for partido in bloque:
+            coincidencia = formato.match(partido.resultado or '')
+            if coincidencia:
+                partido.goles_local = int(coincidencia.group(1))
+                partido.goles_visitante = int(coincidencia.group(2))
+                cambiados.append(partido)
+        Partido.objects.bulk_update(cambiados, ['goles_local', 'goles_visitante'])
+        ultimo_id = bloque[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos_deportivos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='partido',
+            name='goles_local',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='partido',
+            name='goles_visitante',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='partido',
+            name='resultado',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.RunPython(rellenar_goles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.15 on 2026-10-18 07:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def calcular_clasificacion(apps, schema_editor):
+    # Rellena la tabla con los partidos que ya existen
+    from eventos_deportivos.clasificacion import reconstruir_clasificacion
+    reconstruir_clasificacion(
+        apps.get_model('eventos_deportivos', 'Partido'),
+        apps.get_model('eventos_deportivos', 'Clasificacion'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos_deportivos', '0002_goles_partido'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Clasificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jugados', models.IntegerField(default=0)),
+                ('ganados', models.IntegerField(default=0)),
+                ('empatados', models.IntegerField(default=0)),
+                ('perdidos', models.IntegerField(default=0)),
+                ('goles_favor', models.IntegerField(default=0)),
+                ('goles_contra', models.IntegerField(default=0)),
+                ('diferencia_goles', models.IntegerField(default=0)),
+                ('puntos', models.IntegerField(default=0)),
+                ('equipo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='eventos_deportivos.equipo')),
+                ('torneo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='eventos_deportivos.torneo')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['torneo', '-puntos', '-diferencia_goles', '-goles_favor'], name='clasificacion_orden_idx')],
+                'constraints': [models.UniqueConstraint(fields=('torneo', 'equipo'), name='clasificacion_torneo_equipo_unica')],
+            },
+        ),
+        migrations.RunPython(calcular_clasificacion, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+from eventos_deportivos.busqueda import COLUMNAS_INDEXADAS, sql_crear_indice, sql_borrar_indice
+
+
+def crear_indices(apps, schema_editor):
+    # Los indices FTS5 solo existen en SQLite; en otras bases se usa icontains
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for modelo, columnas in COLUMNAS_INDEXADAS.items():
+        tabla = apps.get_model('eventos_deportivos', modelo)._meta.db_table
+        for sentencia in sql_crear_indice(tabla, columnas):
+            schema_editor.execute(sentencia)
+
+
+def borrar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for modelo in COLUMNAS_INDEXADAS:
+        tabla = apps.get_model('eventos_deportivos', modelo)._meta.db_table
+        for sentencia in sql_borrar_indice(tabla):
+            schema_editor.execute(sentencia)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos_deportivos', '0003_clasificacion'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, borrar_indices),
+    ]
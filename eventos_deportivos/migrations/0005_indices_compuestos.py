@@ -0,0 +1,70 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:01
+
+from django.db import migrations, models
+
+from eventos_deportivos.operaciones import CrearIndiceConcurrente
+
+
+class Migration(migrations.Migration):
+
+    # En PostgreSQL los indices se crean con CONCURRENTLY, fuera de una transaccion
+    atomic = False
+
+    dependencies = [
+        ('eventos_deportivos', '0004_indices_fts'),
+    ]
+
+    operations = [
+        CrearIndiceConcurrente(
+            model_name='equipo',
+            index=models.Index(fields=['nombre', 'id'], name='equipo_nombre_idx'),
+        ),
+        CrearIndiceConcurrente(
+            model_name='equipojugador',
+            index=models.Index(fields=['equipo', 'fecha_ingreso'], name='equipojugador_equipo_idx'),
+        ),
+        CrearIndiceConcurrente(
+            model_name='equipojugador',
+            index=models.Index(fields=['jugador', 'fecha_ingreso'], name='equipojugador_jugador_idx'),
+        ),
+        CrearIndiceConcurrente(
+            model_name='estadio',
+            index=models.Index(fields=['nombre', 'id'], name='estadio_nombre_idx'),
+        ),
+        CrearIndiceConcurrente(
+            model_name='estadio',
+            index=models.Index(fields=['capacidad'], name='estadio_capacidad_idx'),
+        ),
+        CrearIndiceConcurrente(
+            model_name='jugador',
+            index=models.Index(fields=['nombre', 'id'], name='jugador_nombre_idx'),
+        ),
+        CrearIndiceConcurrente(
+            model_name='jugador',
+            index=models.Index(fields=['posicion', 'nombre'], name='jugador_posicion_nombre_idx'),
+        ),
+        CrearIndiceConcurrente(
+            model_name='partido',
+            index=models.Index(fields=['torneo', 'fecha'], name='partido_torneo_fecha_idx'),
+        ),
+        CrearIndiceConcurrente(
+            model_name='partido',
+            index=models.Index(fields=['fecha', 'id'], name='partido_fecha_idx'),
+        ),
+        CrearIndiceConcurrente(
+            model_name='sponsor',
+            index=models.Index(fields=['nombre', 'id'], name='sponsor_nombre_idx'),
+        ),
+        CrearIndiceConcurrente(
+            model_name='sponsor',
+            index=models.Index(fields=['monto'], name='sponsor_monto_idx'),
+        ),
+        CrearIndiceConcurrente(
+            model_name='torneo',
+            index=models.Index(fields=['nombre', 'fecha_inicio'], name='torneo_nombre_fecha_idx'),
+        ),
+        CrearIndiceConcurrente(
+            model_name='torneo',
+            index=models.Index(fields=['fecha_inicio', 'id'], name='torneo_fecha_inicio_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:23
+
+import django.db.models.functions.text
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+from django.db.models.functions import Lower
+
+# modelo, campos de la restriccion y campo al que se añade " (id)" si se repite
+TEXTOS_UNICOS = [
+    ('Jugador', ['nombre', 'apellido'], 'apellido'),
+    ('Equipo', ['nombre', 'ciudad'], 'nombre'),
+    ('Estadio', ['nombre', 'ciudad'], 'nombre'),
+    ('Sponsor', ['nombre'], 'nombre'),
+    ('Torneo', ['nombre'], 'nombre'),
+]
+
+
+def separar_repetidos(apps, schema_editor):
+    """
+    Las filas que ya estan repetidas (sin distinguir mayusculas) impedirian
+    crear las restricciones: se conserva la de menor id y al resto se les
+    añade su id ("Smith" -> "Smith (42)"). Los partidos a la misma hora se
+    separan un microsegundo, que no cambia la hora que se muestra.
+    """
+    for nombre, campos, numerar in TEXTOS_UNICOS:
+        modelo = apps.get_model('eventos_deportivos', nombre)
+        claves = {f'clave_{campo}': Lower(campo) for campo in campos}
+        longitud = modelo._meta.get_field(numerar).max_length
+        grupos = (modelo.objects.annotate(**claves).values(*claves)
+                  .annotate(primero=Min('id'), filas=Count('id')).filter(filas__gt=1))
+        for grupo in grupos:
+            repetidos = modelo.objects.annotate(**claves).filter(
+                **{clave: grupo[clave] for clave in claves}).exclude(id=grupo['primero'])
+            for fila in repetidos:
+                sufijo = f' ({fila.id})'
+                setattr(fila, numerar, getattr(fila, numerar)[:longitud - len(sufijo)] + sufijo)
+                fila.save(update_fields=[numerar])
+
+    Partido = apps.get_model('eventos_deportivos', 'Partido')
+    repetidas = Partido.objects.values('fecha').annotate(primero=Min('id'), filas=Count('id')).filter(filas__gt=1)
+    for grupo in repetidas:
+        for partido in Partido.objects.filter(fecha=grupo['fecha']).exclude(id=grupo['primero']):
+            fecha = partido.fecha
+            while Partido.objects.filter(fecha=fecha).exists():
+                fecha += timedelta(microseconds=1)
+            partido.fecha = fecha
+            partido.save(update_fields=['fecha'])
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos_deportivos', '0005_indices_compuestos'),
+    ]
+
+    operations = [
+        migrations.RunPython(separar_repetidos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='equipo',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('nombre'), django.db.models.functions.text.Lower('ciudad'), name='equipo_nombre_ciudad_unica', violation_error_message='Ya existe un equipo con ese nombre en esa ciudad.'),
+        ),
+        migrations.AddConstraint(
+            model_name='estadio',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('nombre'), django.db.models.functions.text.Lower('ciudad'), name='estadio_nombre_ciudad_unica', violation_error_message='Ya existe un estadio con ese nombre en esa ciudad.'),
+        ),
+        migrations.AddConstraint(
+            model_name='jugador',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('nombre'), django.db.models.functions.text.Lower('apellido'), name='jugador_nombre_apellido_unica', violation_error_message='Ya existe un jugador con ese nombre y apellido.'),
+        ),
+        migrations.AddConstraint(
+            model_name='partido',
+            constraint=models.UniqueConstraint(fields=('fecha',), name='partido_fecha_unica', violation_error_message='Ya existe un partido en esa fecha.'),
+        ),
+        migrations.AddConstraint(
+            model_name='sponsor',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('nombre'), name='sponsor_nombre_unica', violation_error_message='Ya existe un sponsor con ese nombre.'),
+        ),
+        migrations.AddConstraint(
+            model_name='torneo',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('nombre'), name='torneo_nombre_unica', violation_error_message='Ya existe un torneo con este nombre.'),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:35
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos_deportivos', '0006_restricciones_unicas'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='equipo',
+            name='equipo_nombre_ciudad_unica',
+        ),
+        migrations.RemoveConstraint(
+            model_name='estadio',
+            name='estadio_nombre_ciudad_unica',
+        ),
+        migrations.RemoveConstraint(
+            model_name='jugador',
+            name='jugador_nombre_apellido_unica',
+        ),
+        migrations.RemoveConstraint(
+            model_name='partido',
+            name='partido_fecha_unica',
+        ),
+        migrations.RemoveConstraint(
+            model_name='sponsor',
+            name='sponsor_nombre_unica',
+        ),
+        migrations.RemoveConstraint(
+            model_name='torneo',
+            name='torneo_nombre_unica',
+        ),
+        migrations.AddField(
+            model_name='equipo',
+            name='eliminado',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='estadio',
+            name='eliminado',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='jugador',
+            name='eliminado',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='partido',
+            name='eliminado',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sponsor',
+            name='eliminado',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='torneo',
+            name='eliminado',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='eliminado',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='equipo',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('nombre'), django.db.models.functions.text.Lower('ciudad'), condition=models.Q(('eliminado__isnull', True)), name='equipo_nombre_ciudad_unica', violation_error_message='Ya existe un equipo con ese nombre en esa ciudad.'),
+        ),
+        migrations.AddConstraint(
+            model_name='estadio',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('nombre'), django.db.models.functions.text.Lower('ciudad'), condition=models.Q(('eliminado__isnull', True)), name='estadio_nombre_ciudad_unica', violation_error_message='Ya existe un estadio con ese nombre en esa ciudad.'),
+        ),
+        migrations.AddConstraint(
+            model_name='jugador',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('nombre'), django.db.models.functions.text.Lower('apellido'), condition=models.Q(('eliminado__isnull', True)), name='jugador_nombre_apellido_unica', violation_error_message='Ya existe un jugador con ese nombre y apellido.'),
+        ),
+        migrations.AddConstraint(
+            model_name='partido',
+            constraint=models.UniqueConstraint(condition=models.Q(('eliminado__isnull', True)), fields=('fecha',), name='partido_fecha_unica', violation_error_message='Ya existe un partido en esa fecha.'),
+        ),
+        migrations.AddConstraint(
+            model_name='sponsor',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('nombre'), condition=models.Q(('eliminado__isnull', True)), name='sponsor_nombre_unica', violation_error_message='Ya existe un sponsor con ese nombre.'),
+        ),
+        migrations.AddConstraint(
+            model_name='torneo',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('nombre'), condition=models.Q(('eliminado__isnull', True)), name='torneo_nombre_unica', violation_error_message='Ya existe un torneo con este nombre.'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos_deportivos', '0007_eliminacion_suave'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='estadisticasjugador',
+            name='asistencias',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='estadisticasjugador',
+            name='goles',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='estadisticasjugador',
+            name='partidos_jugados',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='estadisticasjugador',
+            name='tarjetas',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='EventoPartido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.PositiveSmallIntegerField(choices=[(1, 'alineacion'), (2, 'gol'), (3, 'asistencia'), (4, 'tarjeta')])),
+                ('minuto', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('jugador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='eventos_deportivos.jugador')),
+                ('partido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='eventos_deportivos.partido')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('tipo', 1)), fields=('partido', 'jugador'), name='evento_alineacion_unica')],
+            },
+        ),
+    ]
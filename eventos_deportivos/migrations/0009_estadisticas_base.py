@@ -0,0 +1,59 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:54
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+# tipo de EventoPartido -> total de EstadisticasJugador
+CAMPOS = {1: 'partidos_jugados', 2: 'goles', 3: 'asistencias', 4: 'tarjetas'}
+
+
+def guardar_historico(apps, schema_editor):
+    # Los totales actuales pasan a ser el historico, menos lo que ya venga
+    # de las actas (de partidos visibles) para no contarlo dos veces
+    EstadisticasJugador = apps.get_model('eventos_deportivos', 'EstadisticasJugador')
+    EventoPartido = apps.get_model('eventos_deportivos', 'EventoPartido')
+    EstadisticasJugador.objects.update(**{f'{campo}_base': F(campo) for campo in CAMPOS.values()})
+
+    eventos = EventoPartido.objects.filter(
+        partido__eliminado__isnull=True, partido__torneo__eliminado__isnull=True,
+        partido__equipo_local__eliminado__isnull=True, partido__equipo_visitante__eliminado__isnull=True,
+    )
+    grupos = {}
+    filas = eventos.values('jugador__estadisticas', 'tipo').annotate(total=Count('id')).order_by()
+    for fila in filas.iterator():
+        grupos.setdefault(fila['jugador__estadisticas'], {})[CAMPOS[fila['tipo']]] = fila['total']
+    for estadisticas_id, totales in grupos.items():
+        EstadisticasJugador.objects.filter(id=estadisticas_id).update(
+            **{f'{campo}_base': F(f'{campo}_base') - total for campo, total in totales.items()}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos_deportivos', '0008_eventos_partido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='estadisticasjugador',
+            name='asistencias_base',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='estadisticasjugador',
+            name='goles_base',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='estadisticasjugador',
+            name='partidos_jugados_base',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='estadisticasjugador',
+            name='tarjetas_base',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(guardar_historico, migrations.RunPython.noop),
+    ]
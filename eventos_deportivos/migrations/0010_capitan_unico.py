@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-18 10:00
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def un_capitan_por_equipo(apps, schema_editor):
+    """
+    Los equipos con varios capitanes impedirian crear la restriccion: se
+    conserva el de ingreso mas reciente (el que dejaria plantillas.py) y
+    los demas pasan a ser jugadores.
+    """
+    EquipoJugador = apps.get_model('eventos_deportivos', 'EquipoJugador')
+    repetidos = (EquipoJugador.objects.filter(capitan=True).values('equipo')
+                 .annotate(filas=Count('id')).filter(filas__gt=1).values_list('equipo', flat=True))
+    for equipo in repetidos:
+        capitanes = EquipoJugador.objects.filter(equipo=equipo, capitan=True).order_by('-fecha_ingreso', '-id')
+        EquipoJugador.objects.filter(id__in=list(capitanes.values_list('id', flat=True)[1:])).update(capitan=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos_deportivos', '0009_estadisticas_base'),
+    ]
+
+    operations = [
+        migrations.RunPython(un_capitan_por_equipo, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='equipojugador',
+            constraint=models.UniqueConstraint(condition=models.Q(('capitan', True)), fields=('equipo',), name='equipojugador_capitan_unico', violation_error_message='El equipo ya tiene capitán.'),
+        ),
+    ]
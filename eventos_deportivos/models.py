@@ -1,5 +1,109 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q, F, Sum, Count, Case, When
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
+from django.utils.timezone import now
+
+from .roles import roles_usuario
+
+
+# ----------------------------
+# Guardar solo las columnas modificadas
+# ----------------------------
+class CamposModificadosMixin:
+    """
+    Guarda los valores de las columnas al cargar la fila. save() sin
+    update_fields hace el UPDATE solo de las columnas que han cambiado y,
+    si no ha cambiado ninguna, no ejecuta nada (ni envia post_save).
+    Las filas nuevas y los save() con update_fields se guardan como siempre.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._originales = instancia.valores_columnas()
+        return instancia
+
+    def refresh_from_db(self, *args, **kwargs):
+        # Tambien lo usa Django para cargar los campos diferidos (only/defer)
+        super().refresh_from_db(*args, **kwargs)
+        self._originales = {**getattr(self, '_originales', {}), **self.valores_columnas()}
+
+    def valores_columnas(self):
+        # Valores cargados tal y como se escribirian (un FieldFile es su nombre)
+        return {
+            campo.attname: campo.get_prep_value(self.__dict__[campo.attname])
+            for campo in self._meta.concrete_fields
+            if not campo.primary_key and campo.attname in self.__dict__
+        }
+
+    def campos_modificados(self):
+        originales = getattr(self, '_originales', {})
+        return [
+            nombre for nombre, valor in self.valores_columnas().items()
+            if nombre not in originales or valor != originales[nombre]
+            # Fichero subido sin guardar todavia, aunque se llame igual
+            or getattr(self.__dict__[nombre], '_committed', True) is False
+        ]
+
+    def save(self, *args, **kwargs):
+        parcial = (not self._state.adding and hasattr(self, '_originales') and not args
+                   and kwargs.get('update_fields') is None and not kwargs.get('force_insert'))
+        if parcial:
+            cambiados = self.campos_modificados()
+            if not cambiados:
+                return
+            kwargs['update_fields'] = cambiados
+        super().save(*args, **kwargs)
+        self._originales = self.valores_columnas()
+
+
+# ----------------------------
+# Eliminacion suave
+# Eliminar solo marca la fila (un UPDATE). Los managers por defecto ocultan
+# las filas eliminadas y las que caerian con ellas en cascada; el comando
+# purgar_eliminados las borra despues por lotes (purga.py).
+# ----------------------------
+def filtro_visibles(modelo):
+    # La propia fila (si es eliminable) y las relaciones de eliminado_con sin eliminar
+    caminos = [f'{relacion}__' for relacion in modelo.eliminado_con]
+    if any(campo.name == 'eliminado' for campo in modelo._meta.concrete_fields):
+        caminos.insert(0, '')
+    return {f'{camino}eliminado__isnull': True for camino in caminos}
+
+
+class VisiblesManager(models.Manager):
+
+    def get_queryset(self):
+        return super().get_queryset().filter(**filtro_visibles(self.model))
+
+
+class Eliminable(models.Model):
+    eliminado = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # Relaciones (CASCADE) que ocultan tambien la fila al eliminarse
+    eliminado_con = []
+
+    objects = VisiblesManager()
+    # Todas las filas, tambien las eliminadas pendientes de purgar
+    con_eliminados = models.Manager()
+
+    class Meta:
+        abstract = True
+
+    def eliminar(self):
+        """
+        Marca la fila como eliminada con un UPDATE, sin tocar las que dependen
+        de ella. Los OneToOne opcionales se vacian ya, para que el estadio o el
+        arbitro puedan asignarse a otra fila antes de la purga.
+        """
+        self.eliminado = now()
+        campos = ['eliminado']
+        for campo in self._meta.concrete_fields:
+            if campo.one_to_one and campo.null:
+                setattr(self, campo.attname, None)
+                campos.append(campo.attname)
+        self.save(update_fields=campos)
 
 # Create your models here.
 class Usuario(AbstractUser):
@@ -13,12 +117,23 @@ class Usuario(AbstractUser):
     rol=models.PositiveSmallIntegerField(
         choices=ROLES,default=0
     )
+    # Baja del usuario: no puede entrar y purgar_eliminados borra lo que creo
+    eliminado = models.DateTimeField(null=True, blank=True, editable=False)
+
+    def eliminar(self):
+        self.eliminado = now()
+        self.is_active = False
+        self.save(update_fields=['eliminado', 'is_active'])
 
+    # Los grupos salen de la cache de roles (roles.py), no de una consulta por llamada
     def es_manager(self):
-        return self.groups.filter(name='Managers').exists()
+        return 'Managers' in roles_usuario(self)['grupos']
     
     def es_arbitro(self):
-        return self.groups.filter(name='Arbitros').exists()
+        return 'Arbitros' in roles_usuario(self)['grupos']
+    
+    def nombres_grupos(self):
+        return sorted(roles_usuario(self)['grupos'])
 
 class Manager(models.Model):
     usuario=models.OneToOneField(Usuario,on_delete=models.CASCADE)
@@ -27,17 +142,24 @@ class Manager(models.Model):
         return f"{self.usuario}"
 
 # Estadisticas Jugador
+# Totales = historico anterior a las actas (_base) + eventos de EventoPartido
+# (estadisticas.py los mantiene al dia)
 class EstadisticasJugador(models.Model):
-    partidos_jugados = models.IntegerField()
-    goles = models.IntegerField()
-    asistencias = models.IntegerField()
-    tarjetas = models.IntegerField()
+    partidos_jugados = models.IntegerField(default=0)
+    goles = models.IntegerField(default=0)
+    asistencias = models.IntegerField(default=0)
+    tarjetas = models.IntegerField(default=0)
+    # Totales introducidos a mano o importados, sin acta que los respalde
+    partidos_jugados_base = models.IntegerField(default=0)
+    goles_base = models.IntegerField(default=0)
+    asistencias_base = models.IntegerField(default=0)
+    tarjetas_base = models.IntegerField(default=0)
     
     def __str__(self):
         return f"Estadisticas de jugador #{self.id}"
 
 # Jugador    
-class Jugador(models.Model):
+class Jugador(CamposModificadosMixin, Eliminable):
     POSICIONES = [
         ('DEL', 'Delanteros'),
         ('MED', 'Mediocampista'),
@@ -58,11 +180,26 @@ class Jugador(models.Model):
     )
     creado_por = models.ForeignKey('Usuario', on_delete=models.CASCADE, null=True, blank=True)
     
+    class Meta:
+        constraints = [
+            # Sin distinguir mayusculas y sin contar las filas eliminadas;
+            # los formularios convierten el IntegrityError en errores
+            models.UniqueConstraint(Lower('nombre'), Lower('apellido'), name='jugador_nombre_apellido_unica',
+                                    condition=Q(eliminado__isnull=True),
+                                    violation_error_message='Ya existe un jugador con ese nombre y apellido.'),
+        ]
+        indexes = [
+            # Orden de lista_jugadores (paginacion por nombre, id)
+            models.Index(fields=['nombre', 'id'], name='jugador_nombre_idx'),
+            # jugador_buscar por posicion
+            models.Index(fields=['posicion', 'nombre'], name='jugador_posicion_nombre_idx'),
+        ]
+
     def __str__(self):
         return f"{self.nombre} {self.apellido}"
 
 # Equipo
-class Equipo(models.Model):
+class Equipo(CamposModificadosMixin, Eliminable):
     nombre = models.CharField(max_length=100)
     ciudad = models.CharField(max_length=100)
     fundacion = models.DateField()
@@ -80,8 +217,24 @@ class Equipo(models.Model):
     )
     creado_por = models.ForeignKey('Usuario', on_delete=models.CASCADE, null=True, blank=True)
     
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower('nombre'), Lower('ciudad'), name='equipo_nombre_ciudad_unica',
+                                    condition=Q(eliminado__isnull=True),
+                                    violation_error_message='Ya existe un equipo con ese nombre en esa ciudad.'),
+        ]
+        indexes = [
+            models.Index(fields=['nombre', 'id'], name='equipo_nombre_idx'),
+        ]
+
     def __str__(self):
         return f"{self.nombre}"
+
+    def eliminar(self):
+        # Sus partidos salen ya de la clasificacion y de los totales de jugadores
+        with transaction.atomic():
+            Partido.objects.filter(Q(equipo_local=self) | Q(equipo_visitante=self)).retirar()
+            super().eliminar()
     
 # Equipo Jugador (tabla intermedia)
 class EquipoJugador(models.Model):
@@ -95,12 +248,29 @@ class EquipoJugador(models.Model):
     )
     fecha_ingreso = models.DateField()
     capitan = models.BooleanField(default=False)
+
+    eliminado_con = ['jugador', 'equipo']
+    objects = VisiblesManager()
+    con_eliminados = models.Manager()
     
+    class Meta:
+        constraints = [
+            # Como mucho un capitan por equipo; cuenta tambien las filas
+            # ocultas hasta la purga (jugador eliminado)
+            models.UniqueConstraint(fields=['equipo'], condition=Q(capitan=True), name='equipojugador_capitan_unico',
+                                    violation_error_message='El equipo ya tiene capitán.'),
+        ]
+        indexes = [
+            # Plantilla de detalle_equipo y equipos de detalle_jugador, ordenados por fecha de ingreso
+            models.Index(fields=['equipo', 'fecha_ingreso'], name='equipojugador_equipo_idx'),
+            models.Index(fields=['jugador', 'fecha_ingreso'], name='equipojugador_jugador_idx'),
+        ]
+
     def __str__(self):
         return f"{self.jugador.nombre} {self.jugador.apellido} - {self.equipo.nombre} ({'Capitán' if self.capitan else 'Jugador'})"
     
 # Torneo
-class Torneo(models.Model):
+class Torneo(CamposModificadosMixin, Eliminable):
     nombre = models.CharField(max_length=100)
     pais = models.CharField(max_length=50)
     fecha_inicio = models.DateField()
@@ -113,11 +283,83 @@ class Torneo(models.Model):
     )
     creado_por = models.ForeignKey('Usuario', on_delete=models.CASCADE, null=True, blank=True)
     
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower('nombre'), name='torneo_nombre_unica',
+                                    condition=Q(eliminado__isnull=True),
+                                    violation_error_message='Ya existe un torneo con este nombre.'),
+        ]
+        indexes = [
+            # detalle_torneo filtra por nombre y ordena por fecha_inicio
+            models.Index(fields=['nombre', 'fecha_inicio'], name='torneo_nombre_fecha_idx'),
+            # Orden de lista_torneos y torneo_buscar por fecha desde
+            models.Index(fields=['fecha_inicio', 'id'], name='torneo_fecha_inicio_idx'),
+        ]
+
     def __str__(self):
         return f"{self.nombre}"
+
+    def eliminar(self):
+        with transaction.atomic():
+            Partido.objects.filter(torneo=self).retirar()
+            super().eliminar()
     
 # Partido
-class Partido(models.Model):
+class PartidoQuerySet(models.QuerySet):
+    def retirar(self):
+        """
+        Resta los partidos de la clasificacion y sus actas de los totales de
+        los jugadores. Se llama antes de ocultarlos (eliminar) o borrarlos
+        (purga), con el queryset de los que aun son visibles para no
+        restarlos dos veces.
+        """
+        # Importacion local: clasificacion y estadisticas importan este modulo
+        from .clasificacion import restar_partidos
+        from .estadisticas import restar_actas
+        restar_partidos(self)
+        restar_actas(self)
+
+    def resumen_equipo(self, equipo):
+        """
+        Devuelve victorias, empates, derrotas, goles a favor y en contra de
+        un equipo en una sola consulta con SUM(CASE ...) sobre las columnas
+        de goles, sin cargar los partidos en Python.
+        """
+        partidos, agregados = self._resumen_equipo(equipo)
+        return partidos.aggregate(**agregados)
+
+    async def aresumen_equipo(self, equipo):
+        # Version async de resumen_equipo
+        partidos, agregados = self._resumen_equipo(equipo)
+        return await partidos.aaggregate(**agregados)
+
+    def _resumen_equipo(self, equipo):
+        local = Q(equipo_local=equipo)
+        visitante = Q(equipo_visitante=equipo)
+        gana_local = Q(goles_local__gt=F('goles_visitante'))
+        gana_visitante = Q(goles_visitante__gt=F('goles_local'))
+
+        def contar(condicion):
+            return Sum(Case(When(condicion, then=1), default=0, output_field=models.IntegerField()))
+
+        def sumar(cuando_local, cuando_visitante):
+            return Sum(Case(
+                When(local, then=cuando_local),
+                When(visitante, then=cuando_visitante),
+                default=0,
+                output_field=models.IntegerField(),
+            ))
+
+        return self.filter(local | visitante, goles_local__isnull=False), dict(
+            jugados=Count('id'),
+            ganados=contar((local & gana_local) | (visitante & gana_visitante)),
+            empatados=contar(Q(goles_local=F('goles_visitante'))),
+            perdidos=contar((local & gana_visitante) | (visitante & gana_local)),
+            goles_favor=sumar(F('goles_local'), F('goles_visitante')),
+            goles_contra=sumar(F('goles_visitante'), F('goles_local')),
+        )
+
+class Partido(CamposModificadosMixin, Eliminable):
     equipo_local = models.ForeignKey(
         Equipo,
         on_delete=models.CASCADE,
@@ -129,16 +371,122 @@ class Partido(models.Model):
         related_name='partidos_visitante'
     )
     fecha = models.DateTimeField()
-    resultado = models.CharField(max_length=20)
+    goles_local = models.PositiveSmallIntegerField(null=True)
+    goles_visitante = models.PositiveSmallIntegerField(null=True)
+    # Texto "x-x" derivado de los goles, solo para mostrar
+    resultado = models.CharField(max_length=20, editable=False, blank=True)
     torneo = models.ForeignKey(
         Torneo,
         on_delete=models.CASCADE
     )
     creado_por = models.ForeignKey('Usuario', on_delete=models.CASCADE, null=True, blank=True)
     
+    # Los partidos de un torneo o equipo eliminado tampoco se muestran
+    eliminado_con = ['torneo', 'equipo_local', 'equipo_visitante']
+    objects = VisiblesManager.from_queryset(PartidoQuerySet)()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['fecha'], name='partido_fecha_unica',
+                                    condition=Q(eliminado__isnull=True),
+                                    violation_error_message='Ya existe un partido en esa fecha.'),
+        ]
+        indexes = [
+            # partido_buscar y detalle_arbitro_torneo: torneo + rango de fechas
+            models.Index(fields=['torneo', 'fecha'], name='partido_torneo_fecha_idx'),
+            # Orden de lista_partidos y busqueda solo por fechas
+            models.Index(fields=['fecha', 'id'], name='partido_fecha_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # El resultado se calcula siempre a partir de las columnas de goles
+        if self.goles_local is not None and self.goles_visitante is not None:
+            self.resultado = f"{self.goles_local}-{self.goles_visitante}"
+        else:
+            self.resultado = ""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'goles_local', 'goles_visitante'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'resultado'}
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return f"{self.equipo_local.nombre} vs {self.equipo_visitante.nombre}"
 
+    def eliminar(self):
+        with transaction.atomic():
+            Partido.objects.filter(pk=self.pk).retirar()
+            super().eliminar()
+
+# Clasificacion (tabla materializada por torneo y equipo)
+class Clasificacion(models.Model):
+    torneo = models.ForeignKey(
+        Torneo,
+        on_delete=models.CASCADE
+    )
+    equipo = models.ForeignKey(
+        Equipo,
+        on_delete=models.CASCADE
+    )
+    jugados = models.IntegerField(default=0)
+    ganados = models.IntegerField(default=0)
+    empatados = models.IntegerField(default=0)
+    perdidos = models.IntegerField(default=0)
+    goles_favor = models.IntegerField(default=0)
+    goles_contra = models.IntegerField(default=0)
+    diferencia_goles = models.IntegerField(default=0)
+    puntos = models.IntegerField(default=0)
+
+    # Las filas de un torneo o equipo eliminado no salen en la tabla
+    eliminado_con = ['torneo', 'equipo']
+    objects = VisiblesManager()
+    con_eliminados = models.Manager()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['torneo', 'equipo'], name='clasificacion_torneo_equipo_unica'),
+        ]
+        indexes = [
+            # Sirve directamente el orden de la tabla de un torneo
+            models.Index(fields=['torneo', '-puntos', '-diferencia_goles', '-goles_favor'], name='clasificacion_orden_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.torneo.nombre} - {self.equipo.nombre} ({self.puntos} pts)"
+
+# Acta de un partido: un evento por fila
+class EventoPartido(models.Model):
+    ALINEACION=1
+    GOL=2
+    ASISTENCIA=3
+    TARJETA=4
+    TIPOS=(
+        (ALINEACION,'alineacion'),
+        (GOL,'gol'),
+        (ASISTENCIA,'asistencia'),
+        (TARJETA,'tarjeta'),
+    )
+
+    partido = models.ForeignKey(
+        Partido,
+        on_delete=models.CASCADE
+    )
+    jugador = models.ForeignKey(
+        Jugador,
+        on_delete=models.CASCADE
+    )
+    tipo = models.PositiveSmallIntegerField(choices=TIPOS)
+    minuto = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # Una sola alineacion (tipo=1, suma partidos_jugados) por jugador y partido
+            models.UniqueConstraint(fields=['partido', 'jugador'], condition=Q(tipo=1),
+                                    name='evento_alineacion_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} de {self.jugador} ({self.partido_id})"
+
 # Arbitro    
 class Arbitro(models.Model):
     usuario=models.OneToOneField(Usuario,on_delete=models.CASCADE)
@@ -154,7 +502,7 @@ class Arbitro(models.Model):
         return f"{self.usuario}"
     
 # Estadio
-class Estadio(models.Model):
+class Estadio(CamposModificadosMixin, Eliminable):
     nombre = models.CharField(max_length=100)
     ciudad = models.CharField(max_length=100)
     capacidad = models.IntegerField()
@@ -162,11 +510,23 @@ class Estadio(models.Model):
     imagen = models.ImageField(upload_to='eventos_deportivos/estadios/', null=True, blank=True)
     creado_por = models.ForeignKey('Usuario', on_delete=models.CASCADE, null=True, blank=True)
     
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower('nombre'), Lower('ciudad'), name='estadio_nombre_ciudad_unica',
+                                    condition=Q(eliminado__isnull=True),
+                                    violation_error_message='Ya existe un estadio con ese nombre en esa ciudad.'),
+        ]
+        indexes = [
+            models.Index(fields=['nombre', 'id'], name='estadio_nombre_idx'),
+            # estadio_buscar por capacidad maxima
+            models.Index(fields=['capacidad'], name='estadio_capacidad_idx'),
+        ]
+
     def __str__(self):
         return f"{self.nombre}"
     
 # Sponsor
-class Sponsor(models.Model):
+class Sponsor(CamposModificadosMixin, Eliminable):
     nombre = models.CharField(max_length=100)
     monto = models.DecimalField(
         max_digits=10,
@@ -176,6 +536,18 @@ class Sponsor(models.Model):
     equipos = models.ManyToManyField(Equipo)
     creado_por = models.ForeignKey('Usuario', on_delete=models.CASCADE, null=True, blank=True)
     
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower('nombre'), name='sponsor_nombre_unica',
+                                    condition=Q(eliminado__isnull=True),
+                                    violation_error_message='Ya existe un sponsor con ese nombre.'),
+        ]
+        indexes = [
+            models.Index(fields=['nombre', 'id'], name='sponsor_nombre_idx'),
+            # sponsor_buscar por monto maximo
+            models.Index(fields=['monto'], name='sponsor_monto_idx'),
+        ]
+
     def __str__(self):
         return f"{self.nombre}"
     
@@ -195,6 +567,10 @@ class Premio(models.Model):
         null=True,
         blank=True
     )
+
+    eliminado_con = ['torneo']
+    objects = VisiblesManager()
+    con_eliminados = models.Manager()
     
     def __str__(self):
         return f"{self.nombre}"
\ No newline at end of file
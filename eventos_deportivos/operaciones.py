@@ -0,0 +1,35 @@
+from django.db import NotSupportedError
+from django.db.migrations.operations import AddIndex
+
+# ----------------------------
+# Operaciones de migracion propias
+# ----------------------------
+
+
+class CrearIndiceConcurrente(AddIndex):
+    """
+    AddIndex que en PostgreSQL crea el indice con CREATE INDEX CONCURRENTLY,
+    sin bloquear las escrituras de una tabla con datos. En el resto de bases
+    de datos es un AddIndex normal. La migracion necesita atomic = False.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        self.fuera_de_transaccion(schema_editor)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        self.fuera_de_transaccion(schema_editor)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+    def fuera_de_transaccion(self, schema_editor):
+        if schema_editor.connection.in_atomic_block:
+            raise NotSupportedError('CREATE INDEX CONCURRENTLY no puede ejecutarse en una transaccion: '
+                                    'pon atomic = False en la migracion')
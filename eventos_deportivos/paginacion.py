@@ -0,0 +1,100 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.functional import SimpleLazyObject
+
+# Numero de filas por pagina en los listados
+TAMANO_PAGINA = 50
+
+
+def codificar_cursor(valor, pk):
+    # Convierte la clave de orden (valor, id) en un texto seguro para la URL.
+    # Las fechas se guardan con isoformat() para no perder los microsegundos.
+    if hasattr(valor, 'isoformat'):
+        valor = valor.isoformat()
+    datos = json.dumps([valor, pk])
+    return base64.urlsafe_b64encode(datos.encode()).decode()
+
+
+def decodificar_cursor(cursor, campo):
+    # Devuelve (valor, id) a partir del cursor o None si no es valido
+    try:
+        valor, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return campo.to_python(valor), int(pk)
+    except Exception:
+        return None
+
+
+def consulta_keyset(request, queryset, orden, tamano):
+    # Queryset de la pagina pedida (con una fila de mas) y el cursor recibido
+    campo = queryset.model._meta.get_field(orden)
+    cursor = decodificar_cursor(request.GET.get('cursor', ''), campo)
+    hacia_atras = request.GET.get('dir') == 'prev'
+
+    if cursor:
+        valor, pk = cursor
+        if hacia_atras:
+            filtro = Q(**{f'{orden}__lt': valor}) | Q(**{orden: valor, 'id__lt': pk})
+        else:
+            filtro = Q(**{f'{orden}__gt': valor}) | Q(**{orden: valor, 'id__gt': pk})
+        queryset = queryset.filter(filtro)
+
+    if hacia_atras:
+        queryset = queryset.order_by(f'-{orden}', '-id')
+    else:
+        queryset = queryset.order_by(orden, 'id')
+
+    # Se pide una fila de mas para saber si hay otra pagina
+    return queryset[:tamano + 1], cursor, hacia_atras
+
+
+def resultado_keyset(objetos, cursor, hacia_atras, orden, tamano):
+    hay_mas = len(objetos) > tamano
+    objetos = objetos[:tamano]
+    if hacia_atras:
+        objetos.reverse()
+
+    cursor_siguiente = None
+    cursor_anterior = None
+    if objetos:
+        primero, ultimo = objetos[0], objetos[-1]
+        if hay_mas or (cursor and hacia_atras):
+            cursor_siguiente = codificar_cursor(getattr(ultimo, orden), ultimo.id)
+        if (cursor and not hacia_atras) or (hacia_atras and hay_mas):
+            cursor_anterior = codificar_cursor(getattr(primero, orden), primero.id)
+
+    return {
+        'objetos': objetos,
+        'cursor_siguiente': cursor_siguiente,
+        'cursor_anterior': cursor_anterior,
+    }
+
+
+def paginar_keyset(request, queryset, orden, tamano=TAMANO_PAGINA):
+    """
+    Pagina un queryset por cursor (keyset) en lugar de OFFSET.
+    El orden es estable porque siempre se desempata por id, y cada pagina
+    es una consulta "WHERE (orden, id) > (valor, id) LIMIT tamano+1", asi
+    que su coste depende del tamaño de pagina y no de la posicion.
+    Devuelve un diccionario con los objetos y los cursores siguiente/anterior.
+    """
+    pagina, cursor, hacia_atras = consulta_keyset(request, queryset, orden, tamano)
+    return resultado_keyset(list(pagina), cursor, hacia_atras, orden, tamano)
+
+
+async def apaginar_keyset(request, queryset, orden, tamano=TAMANO_PAGINA):
+    # Igual que paginar_keyset con el ORM async (para views_async.py)
+    pagina, cursor, hacia_atras = consulta_keyset(request, queryset, orden, tamano)
+    objetos = [objeto async for objeto in pagina]
+    return resultado_keyset(objetos, cursor, hacia_atras, orden, tamano)
+
+
+def paginar_keyset_perezoso(request, queryset, orden, tamano=TAMANO_PAGINA):
+    """
+    Igual que paginar_keyset pero no consulta nada hasta que la plantilla
+    usa el resultado; si el fragmento ya esta en cache ({% cachear %}) no
+    se llega a consultar. Devuelve (paginacion, objetos).
+    """
+    paginacion = SimpleLazyObject(lambda: paginar_keyset(request, queryset, orden, tamano))
+    return paginacion, SimpleLazyObject(lambda: paginacion['objetos'])
@@ -0,0 +1,163 @@
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Equipo, EquipoJugador, Jugador
+from .cache_paginas import subir_version
+from .forms import restriccion_violada
+
+# Filas por sentencia de bulk_update (cada una añade un CASE WHEN por campo)
+TAMANO_LOTE = 500
+
+
+class PlantillaNoValida(Exception):
+    # errores: [{'operacion': indice, 'error': texto}]
+    def __init__(self, errores):
+        super().__init__(f'{len(errores)} operaciones no validas')
+        self.errores = errores
+
+
+# ----------------------------
+# Operaciones de plantilla en bloque
+# Cada operacion es un dict {jugador, equipo, fecha_ingreso, capitan,
+# traspaso}: el jugador pasa a la plantilla del equipo (o se actualiza su
+# fila si ya estaba) y, con traspaso, sale de los demas equipos. Sin
+# capitan, una fila que ya existe conserva el suyo y una nueva no lo es.
+# Se valida todo el lote antes de escribir y se aplica en una transaccion
+# con un numero fijo de consultas, no una por operacion.
+# ----------------------------
+def identificador(operacion, campo):
+    dato = operacion.get(campo)
+    if isinstance(dato, bool) or not isinstance(dato, (int, str)) or not str(dato).isdigit():
+        raise ValidationError(f'{campo}: debe ser un id')
+    return int(dato)
+
+
+def booleano(operacion, campo, defecto=False):
+    if campo not in operacion:
+        return defecto
+    dato = operacion[campo]
+    if not isinstance(dato, bool):
+        raise ValidationError(f'{campo}: debe ser true o false')
+    return dato
+
+
+def convertir(operacion):
+    # Devuelve (jugador, equipo, fecha_ingreso, capitan, traspaso); capitan
+    # es None si la operacion no lo indica
+    if not isinstance(operacion, dict):
+        raise ValidationError('La operacion no es un objeto')
+    fecha = operacion.get('fecha_ingreso')
+    if fecha in (None, ''):
+        fecha = timezone.localdate()
+    else:
+        try:
+            fecha = EquipoJugador._meta.get_field('fecha_ingreso').clean(fecha, None)
+        except ValidationError as error:
+            raise ValidationError(f'fecha_ingreso: {" ".join(error.messages)}')
+    return (identificador(operacion, 'jugador'), identificador(operacion, 'equipo'), fecha,
+            booleano(operacion, 'capitan', None), booleano(operacion, 'traspaso'))
+
+
+def validar(operaciones):
+    errores = []
+    validas = []
+    for numero, operacion in enumerate(operaciones):
+        try:
+            validas.append((numero, convertir(operacion)))
+        except ValidationError as error:
+            errores.append({'operacion': numero, 'error': ' '.join(error.messages)})
+
+    # Todos los ids del lote con una consulta por modelo
+    jugadores = Jugador.objects.only('id').in_bulk({op[0] for _, op in validas})
+    equipos = Equipo.objects.only('id').in_bulk({op[1] for _, op in validas})
+
+    vistas = set()
+    veces_jugador = {}
+    for _, (jugador, _, _, _, _) in validas:
+        veces_jugador[jugador] = veces_jugador.get(jugador, 0) + 1
+    capitanes = set()
+    for numero, (jugador, equipo, _, capitan, traspaso) in validas:
+        if jugador not in jugadores:
+            error = f'No existe el jugador {jugador}'
+        elif equipo not in equipos:
+            error = f'No existe el equipo {equipo}'
+        elif (jugador, equipo) in vistas:
+            error = f'El jugador {jugador} ya esta en el lote para el equipo {equipo}'
+        elif traspaso and veces_jugador[jugador] > 1:
+            error = f'El jugador {jugador} se traspasa y aparece en otras operaciones del lote'
+        elif capitan and equipo in capitanes:
+            error = f'El equipo {equipo} ya tiene capitan en el lote'
+        else:
+            vistas.add((jugador, equipo))
+            if capitan:
+                capitanes.add(equipo)
+            continue
+        errores.append({'operacion': numero, 'error': error})
+
+    if errores:
+        raise PlantillaNoValida(sorted(errores, key=lambda e: e['operacion']))
+    return [op for _, op in validas]
+
+
+def aplicar_plantillas(operaciones):
+    """
+    Valida y aplica un lote de operaciones de plantilla. Si alguna no es
+    valida lanza PlantillaNoValida y no se escribe nada. Un capitan nuevo
+    deja de serlo el anterior del equipo: como mucho uno por equipo
+    (restriccion equipojugador_capitan_unico).
+    Devuelve {'creadas': n, 'actualizadas': n, 'eliminadas': n}.
+    """
+    operaciones = validar(operaciones)
+    destinos = {jugador: equipo for jugador, equipo, _, _, traspaso in operaciones if traspaso}
+    con_capitan = {equipo for _, equipo, _, capitan, _ in operaciones if capitan}
+
+    try:
+        with transaction.atomic():
+            # Filas actuales de los jugadores del lote en una consulta
+            actuales = {}
+            sobrantes = []
+            for fila in EquipoJugador.objects.filter(jugador_id__in={op[0] for op in operaciones}):
+                if fila.jugador_id in destinos and fila.equipo_id != destinos[fila.jugador_id]:
+                    sobrantes.append(fila.id)
+                else:
+                    actuales.setdefault((fila.jugador_id, fila.equipo_id), fila)
+
+            nuevas = []
+            cambiadas = []
+            for jugador, equipo, fecha, capitan, _ in operaciones:
+                fila = actuales.get((jugador, equipo))
+                if fila is None:
+                    nuevas.append(EquipoJugador(jugador_id=jugador, equipo_id=equipo, fecha_ingreso=fecha,
+                                                capitan=bool(capitan)))
+                else:
+                    fila.fecha_ingreso = fecha
+                    if capitan is not None:
+                        fila.capitan = capitan
+                    elif equipo in con_capitan:
+                        # El capitan nuevo del lote sustituye al que fuera
+                        fila.capitan = False
+                    cambiadas.append(fila)
+
+            # Borrado en una sola sentencia, como en clasificacion.py: delete()
+            # cargaria las filas para enviar post_delete y borraria de 100 en 100
+            sobrantes = EquipoJugador.objects.filter(id__in=sobrantes)
+            eliminadas = sobrantes._raw_delete(sobrantes.db)
+            if con_capitan:
+                # Un UPDATE para todos los equipos con capitan nuevo
+                # (tambien las filas ocultas, que cuentan en la restriccion)
+                EquipoJugador.con_eliminados.filter(equipo_id__in=con_capitan, capitan=True).update(capitan=False)
+            EquipoJugador.objects.bulk_create(nuevas)
+            EquipoJugador.objects.bulk_update(cambiadas, ['fecha_ingreso', 'capitan'], batch_size=TAMANO_LOTE)
+            # bulk_create, bulk_update y update no envian señales
+            subir_version('equipojugador')
+    except IntegrityError as error:
+        # Otra peticion ha puesto capitan a uno de los equipos a la vez
+        if restriccion_violada(error, EquipoJugador) != 'equipojugador_capitan_unico':
+            raise
+        raise PlantillaNoValida([
+            {'operacion': numero, 'error': f'El equipo {equipo} ya tiene otro capitan'}
+            for numero, (_, equipo, _, capitan, _) in enumerate(operaciones) if capitan
+        ])
+
+    return {'creadas': len(nuevas), 'actualizadas': len(cambiadas), 'eliminadas': eliminadas}
@@ -0,0 +1,76 @@
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.db import models, transaction
+from django.utils.timezone import now
+
+from .models import Partido
+
+# Filas por lote: cada lote se borra en su propia transaccion
+TAMANO_LOTE = 500
+
+
+# ----------------------------
+# Purga de filas eliminadas
+# Eliminar (Eliminable.eliminar) solo marca la fila; aqui se borra de
+# verdad con todo lo que cae en cascada. Se baja por las relaciones CASCADE
+# y se borra desde las hojas, por lotes de tamaño fijo y en transacciones
+# cortas, para no bloquear la base de datos con un borrado enorme.
+# ----------------------------
+def relaciones_cascada(modelo):
+    # Relaciones inversas (ForeignKey / OneToOne de otros modelos) con on_delete=CASCADE
+    return [
+        relacion for relacion in modelo._meta.get_fields(include_hidden=True)
+        if relacion.auto_created and not relacion.concrete
+        and (relacion.one_to_many or relacion.one_to_one)
+        and relacion.on_delete is models.CASCADE
+    ]
+
+
+def purgar_filas(modelo, pks, lote, pausa, borradas):
+    if modelo is Partido:
+        # Los que aun se ven (caen con un usuario) salen de la clasificacion y
+        # de los totales antes de borrar sus actas; marcarlos evita restarlos
+        # otra vez si la purga se corta
+        with transaction.atomic():
+            visibles = Partido.objects.filter(pk__in=pks)
+            visibles.retirar()
+            visibles.update(eliminado=now())
+
+    # Primero las filas dependientes, por lotes, hasta que no quede ninguna
+    for relacion in relaciones_cascada(modelo):
+        dependientes = relacion.related_model._base_manager.filter(**{f'{relacion.field.name}__in': pks})
+        while True:
+            ids = list(dependientes.values_list('pk', flat=True)[:lote])
+            if not ids:
+                break
+            purgar_filas(relacion.related_model, ids, lote, pausa, borradas)
+
+    # Sin dependientes en cascada, delete() solo envia las señales y pone
+    # a NULL las relaciones SET_NULL de este lote
+    with transaction.atomic():
+        _, por_modelo = modelo._base_manager.filter(pk__in=pks).delete()
+    borradas.update(por_modelo)
+    if pausa:
+        time.sleep(pausa)
+
+
+def purgar_eliminados(lote=TAMANO_LOTE, pausa=0):
+    """
+    Borra las filas marcadas como eliminadas de todos los modelos con campo
+    eliminado y las que dependen de ellas. La clasificacion y los totales
+    de jugadores ya no cuentan lo eliminado, asi que no se recalculan.
+    Devuelve {'app.Modelo': filas borradas}.
+    """
+    borradas = Counter()
+    for modelo in apps.get_app_config('eventos_deportivos').get_models():
+        if not any(campo.name == 'eliminado' for campo in modelo._meta.concrete_fields):
+            continue
+        eliminados = modelo._base_manager.filter(eliminado__isnull=False)
+        while True:
+            ids = list(eliminados.values_list('pk', flat=True)[:lote])
+            if not ids:
+                break
+            purgar_filas(modelo, ids, lote, pausa, borradas)
+    return dict(borradas)
@@ -0,0 +1,124 @@
+import random
+
+from asgiref.local import Local
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+
+# ----------------------------
+# Lecturas en replicas
+# Las vistas de solo lectura (index, lista_*, detalle_*, *_buscar) leen de
+# una replica elegida por peso al empezar la peticion; todo lo demas, y
+# todas las escrituras, van a la base de datos principal ('default').
+# Tras una escritura del usuario (un POST) sus lecturas vuelven a la
+# principal durante unos segundos para que vea sus propios cambios aunque
+# la replica vaya con retraso.
+# ----------------------------
+
+COOKIE = 'leer_principal'
+SEGUNDOS_PRINCIPAL = 5
+METODOS_LECTURA = ('GET', 'HEAD')
+
+# Base de datos de lectura de la peticion en curso. asgiref.local.Local
+# sigue a la peticion tambien dentro de las vistas async y de sync_to_async
+_estado = Local()
+
+
+def replicas():
+    return getattr(settings, 'REPLICAS', {})
+
+
+def segundos_principal():
+    return getattr(settings, 'LECTURA_PRINCIPAL_SEGUNDOS', SEGUNDOS_PRINCIPAL)
+
+
+def elegir_replica():
+    pesos = replicas()
+    if not pesos:
+        return DEFAULT_DB_ALIAS
+    return random.choices(list(pesos), weights=list(pesos.values()))[0]
+
+
+def es_vista_lectura(nombre):
+    return bool(nombre) and (nombre == 'index' or nombre.startswith(('lista_', 'detalle_'))
+                             or nombre.endswith('_buscar'))
+
+
+def alias_lectura():
+    return getattr(_estado, 'alias', DEFAULT_DB_ALIAS)
+
+
+def lectura_en_replica():
+    # Lo leido de una replica puede ir por detras de las versiones de la
+    # cache: no se guarda como fragmento ni se firma con un ETag
+    return alias_lectura() != DEFAULT_DB_ALIAS
+
+
+class RouterReplicas:
+    """
+    Las escrituras van siempre a la principal. Las lecturas van a la
+    replica elegida para la peticion o, fuera de una vista de lectura
+    (formularios, comandos, shell), a la principal.
+    """
+
+    def db_for_read(self, model, **hints):
+        # Las sesiones se leen de la principal: una sesion recien creada
+        # (login) puede no haber llegado aun a la replica
+        if model._meta.app_label == 'sessions':
+            return DEFAULT_DB_ALIAS
+        return alias_lectura()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Todas las bases de datos tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Las replicas se copian de la principal: no se migran por separado
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicasMiddleware:
+    # Con ASGI las vistas async no pasan por un hilo solo por este middleware
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if not replicas():
+            raise MiddlewareNotUsed
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _estado.alias = DEFAULT_DB_ALIAS
+        return self.recordar_escritura(request, response)
+
+    async def __acall__(self, request):
+        try:
+            response = await self.get_response(request)
+        finally:
+            _estado.alias = DEFAULT_DB_ALIAS
+        return self.recordar_escritura(request, response)
+
+    def recordar_escritura(self, request, response):
+        if request.method not in METODOS_LECTURA:
+            # Read-your-writes: el navegador recuerda la escritura unos segundos
+            response.set_cookie(COOKIE, '1', max_age=segundos_principal(),
+                                httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, vista, args, kwargs):
+        nombre = request.resolver_match.url_name if request.resolver_match else None
+        if request.method in METODOS_LECTURA and es_vista_lectura(nombre) and COOKIE not in request.COOKIES:
+            _estado.alias = elegir_replica()
+        else:
+            _estado.alias = DEFAULT_DB_ALIAS
@@ -0,0 +1,81 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+# ----------------------------
+# Cache de grupos y permisos de cada usuario
+# Por peticion se guardan en el propio objeto usuario (request.user) y entre
+# peticiones en la cache de Django, con una version global (permisos de los
+# grupos) y otra por usuario (sus grupos y permisos). Al cambiar cualquiera
+# de ellas se genera una version nueva y la entrada anterior deja de valer.
+# ----------------------------
+
+# Segundos que se guarda cada entrada aunque no cambie ninguna version
+TIEMPO_CACHE = 300
+
+CLAVE_VERSION = 'roles:version'
+
+VACIO = {'grupos': frozenset(), 'permisos': frozenset()}
+
+
+def clave_version_usuario(usuario_id):
+    return f'roles:version:{usuario_id}'
+
+
+def clave_usuario(usuario_id):
+    return f'roles:usuario:{usuario_id}'
+
+
+def calcular_roles(usuario):
+    # Se importa aqui: el backend necesita el modelo de usuario ya cargado
+    from django.contrib.auth.backends import ModelBackend
+    return {
+        'grupos': frozenset(usuario.groups.values_list('name', flat=True)),
+        'permisos': frozenset(ModelBackend().get_all_permissions(usuario)),
+    }
+
+
+def roles_usuario(usuario):
+    """
+    Devuelve {'grupos': nombres, 'permisos': 'app.codename'} del usuario
+    consultando la base de datos solo si no estan en cache.
+    """
+    roles = getattr(usuario, '_roles_cache', None)
+    if roles is not None:
+        return roles
+    if usuario.pk is None:
+        return VACIO
+
+    claves = [CLAVE_VERSION, clave_version_usuario(usuario.pk), clave_usuario(usuario.pk)]
+    valores = cache.get_many(claves)
+    for clave in claves[:2]:
+        if clave not in valores:
+            # Sin version (primer uso o expulsada) se crea una nueva: las
+            # entradas guardadas con la anterior no pueden volver a valer.
+            # add no pisa la que haya guardado otro proceso mientras tanto
+            cache.add(clave, uuid.uuid4().hex, None)
+            valores[clave] = cache.get(clave)
+    version = (valores[claves[0]], valores[claves[1]])
+    guardado = valores.get(claves[2])
+    if guardado is not None and None not in version and guardado[0] == version:
+        roles = guardado[1]
+    else:
+        roles = calcular_roles(usuario)
+        cache.set(claves[2], (version, roles), TIEMPO_CACHE)
+    usuario._roles_cache = roles
+    return roles
+
+
+def invalidar_roles(usuario_ids=None):
+    """
+    Cambia la version de los usuarios indicados (o la global si es None)
+    cuando se confirma la transaccion, para no recalcular con datos sin guardar.
+    """
+    def nueva_version():
+        version = uuid.uuid4().hex
+        if usuario_ids is None:
+            cache.set(CLAVE_VERSION, version, None)
+        else:
+            cache.set_many({clave_version_usuario(pk): version for pk in usuario_ids}, None)
+    transaction.on_commit(nueva_version)
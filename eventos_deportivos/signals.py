@@ -0,0 +1,130 @@
+from django.apps import apps
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Jugador, Equipo, Usuario
+from .autocompletar import indice_jugadores, indice_equipos, fila_jugador, fila_equipo
+from .roles import invalidar_roles
+from .cache_paginas import MODELOS_VERSIONADOS, subir_version
+
+
+# ----------------------------
+# Indices de autocompletar
+# Se cambian al confirmar la transaccion, como las versiones de la cache:
+# un guardado o borrado que se deshace no toca el indice. La fila se
+# calcula ya, con los datos que se estan guardando.
+# ----------------------------
+def indice_guardado(indice, instance, fila):
+    if instance.eliminado:
+        pk = instance.id
+        transaction.on_commit(lambda: indice.quitar(pk))
+    else:
+        transaction.on_commit(lambda: indice.actualizar(fila))
+
+
+def indice_borrado(indice, instance):
+    pk = instance.id
+    transaction.on_commit(lambda: indice.quitar(pk))
+
+
+@receiver(post_save, sender=Jugador)
+def jugador_guardado(sender, instance, **kwargs):
+    indice_guardado(indice_jugadores, instance, fila_jugador(instance))
+
+
+@receiver(post_delete, sender=Jugador)
+def jugador_eliminado(sender, instance, **kwargs):
+    indice_borrado(indice_jugadores, instance)
+
+
+@receiver(post_save, sender=Equipo)
+def equipo_guardado(sender, instance, **kwargs):
+    indice_guardado(indice_equipos, instance, fila_equipo(instance))
+
+
+@receiver(post_delete, sender=Equipo)
+def equipo_eliminado(sender, instance, **kwargs):
+    indice_borrado(indice_equipos, instance)
+
+
+# ----------------------------
+# Cache de roles y permisos
+# ----------------------------
+@receiver(m2m_changed, sender=Usuario.groups.through)
+@receiver(m2m_changed, sender=Usuario.user_permissions.through)
+def grupos_usuario_cambiados(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidar_roles([instance.pk])
+    elif pk_set:
+        # group.user_set.add(...): pk_set son los usuarios
+        invalidar_roles(pk_set)
+    else:
+        # group.user_set.clear(): no se sabe a quien afecta
+        invalidar_roles()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def permisos_grupo_cambiados(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidar_roles()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def grupo_cambiado(sender, **kwargs):
+    invalidar_roles()
+
+
+@receiver(post_save, sender=Usuario)
+def usuario_guardado(sender, instance, update_fields, **kwargs):
+    # is_superuser / is_active cambian los permisos; el login solo toca last_login
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    invalidar_roles([instance.pk])
+
+
+# ----------------------------
+# Versiones de modelo para la cache de paginas
+# ----------------------------
+def ocultos_con(modelo):
+    # Modelos cuyas filas se ocultan al eliminar una fila de modelo (eliminado_con)
+    ocultos = []
+    for nombre in MODELOS_VERSIONADOS:
+        otro = apps.get_model('eventos_deportivos', nombre)
+        for relacion in getattr(otro, 'eliminado_con', []):
+            if otro._meta.get_field(relacion).related_model is modelo:
+                ocultos.append(nombre)
+                break
+    return ocultos
+
+
+def modelo_cambiado(sender, update_fields=None, **kwargs):
+    # Guardar solo last_login (cada login) no cambia lo que muestran las paginas
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    subir_version(sender._meta.model_name)
+    # Eliminacion suave: un UPDATE que oculta tambien filas de otros modelos
+    if update_fields is not None and 'eliminado' in update_fields:
+        for nombre in ocultos_con(sender):
+            subir_version(nombre)
+
+
+def relacion_cambiada(sender, instance, action, model, **kwargs):
+    # Una relacion ManyToMany afecta a los modelos de ambos lados
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        subir_version(instance._meta.model_name)
+        subir_version(model._meta.model_name)
+
+
+for nombre in MODELOS_VERSIONADOS:
+    modelo = apps.get_model('eventos_deportivos', nombre)
+    post_save.connect(modelo_cambiado, sender=modelo, dispatch_uid=f'version_{nombre}_save')
+    post_delete.connect(modelo_cambiado, sender=modelo, dispatch_uid=f'version_{nombre}_delete')
+    for campo in modelo._meta.local_many_to_many:
+        m2m_changed.connect(relacion_cambiada, sender=campo.remote_field.through,
+                            dispatch_uid=f'version_{nombre}_{campo.name}')
@@ -0,0 +1,65 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+# ----------------------------
+# SQLite en produccion
+# Pragmas que se ejecutan en cada conexion (OPTIONS['init_command']),
+# transacciones IMMEDIATE y una cola de escritura opcional que serializa
+# las peticiones que escriben dentro del proceso.
+# ----------------------------
+
+PRAGMAS = [
+    'PRAGMA journal_mode = WAL',        # los lectores no esperan al escritor ni al reves
+    'PRAGMA synchronous = NORMAL',      # con WAL es seguro; un corte de luz solo pierde lo ultimo
+    'PRAGMA busy_timeout = 20000',      # ms que se espera un bloqueo antes de "database is locked"
+    'PRAGMA mmap_size = 268435456',     # 256 MB de la base de datos leidos con mmap
+    'PRAGMA cache_size = -65536',       # 64 MB de cache de paginas por conexion
+    'PRAGMA temp_store = MEMORY',
+]
+
+METODOS_LECTURA = ('GET', 'HEAD', 'OPTIONS')
+
+
+def opciones_produccion():
+    """
+    OPTIONS de una base de datos SQLite de produccion. Con IMMEDIATE cada
+    transaccion toma el bloqueo de escritura al empezar: si otra esta
+    escribiendo espera busy_timeout, en vez de fallar al pasar de leer a
+    escribir (el "database is locked" que no respeta el timeout).
+    """
+    return {
+        'init_command': ';'.join(PRAGMAS),
+        'transaction_mode': 'IMMEDIATE',
+    }
+
+
+_cola = threading.Lock()
+
+
+@contextmanager
+def cola_escritura():
+    # Las escrituras del proceso esperan su turno en el lock en vez de
+    # reintentar contra el bloqueo de SQLite
+    with _cola:
+        yield
+
+
+class ColaEscrituraMiddleware:
+    """
+    Ejecuta de una en una las peticiones que escriben (POST...). Solo
+    serializa dentro del proceso: entre procesos sigue valiendo busy_timeout.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if not getattr(settings, 'SQLITE_COLA_ESCRITURA', False):
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        if request.method in METODOS_LECTURA:
+            return self.get_response(request)
+        with cola_escritura():
+            return self.get_response(request)
@@ -10,4 +10,92 @@ function eliminar(){
     return true
   else
     return false
-}
\ No newline at end of file
+}
+// Autocompletar: los inputs con data-autocompletar piden sugerencias a la API
+// y al elegir una se va directamente a su página de detalle.
+document.addEventListener('DOMContentLoaded', function(){
+  document.querySelectorAll('input[data-autocompletar]').forEach(function(input, i){
+    var lista = document.createElement('datalist');
+    lista.id = 'autocompletar-' + i;
+    input.setAttribute('list', lista.id);
+    input.after(lista);
+
+    var urls = {};
+    var espera = null;
+    input.addEventListener('input', function(){
+      if (urls[input.value]) {
+        window.location = urls[input.value];
+        return;
+      }
+      clearTimeout(espera);
+      espera = setTimeout(function(){
+        if (!input.value) return;
+        fetch(input.dataset.autocompletar + '?q=' + encodeURIComponent(input.value))
+          .then(function(respuesta){ return respuesta.json(); })
+          .then(function(datos){
+            lista.innerHTML = '';
+            urls = {};
+            datos.resultados.forEach(function(r){
+              var opcion = document.createElement('option');
+              opcion.value = r.texto;
+              urls[r.texto] = r.url;
+              lista.appendChild(opcion);
+            });
+          });
+      }, 150);
+    });
+  });
+});
+
+// Selects perezosos: los select con data-opciones solo traen las opciones
+// elegidas. Un buscador encima pide a la API las que coinciden con el
+// texto, por paginas ("Más resultados"), conservando las ya elegidas.
+document.addEventListener('DOMContentLoaded', function(){
+  document.querySelectorAll('select[data-opciones]').forEach(function(select){
+    var buscador = document.createElement('input');
+    buscador.type = 'search';
+    buscador.className = 'form-control mb-1';
+    buscador.placeholder = 'Buscar...';
+    buscador.autocomplete = 'off';
+    var mas = document.createElement('button');
+    mas.type = 'button';
+    mas.className = 'btn btn-link btn-sm';
+    mas.textContent = 'Más resultados';
+    mas.hidden = true;
+    select.before(buscador);
+    select.after(mas);
+
+    var siguiente = null;
+    var espera = null;
+
+    function cargar(cursor){
+      var url = select.dataset.opciones + '?q=' + encodeURIComponent(buscador.value);
+      if (cursor) url += '&cursor=' + encodeURIComponent(cursor);
+      fetch(url)
+        .then(function(respuesta){ return respuesta.json(); })
+        .then(function(datos){
+          if (!cursor) {
+            // Se quitan los resultados anteriores que no estan elegidos
+            Array.from(select.options).forEach(function(opcion){
+              if (!opcion.selected && opcion.value) opcion.remove();
+            });
+          }
+          datos.resultados.forEach(function(r){
+            if (select.querySelector('option[value="' + r.id + '"]')) return;
+            select.add(new Option(r.texto, r.id));
+          });
+          siguiente = datos.siguiente;
+          mas.hidden = !siguiente;
+        });
+    }
+
+    buscador.addEventListener('input', function(){
+      clearTimeout(espera);
+      espera = setTimeout(function(){ cargar(null); }, 200);
+    });
+    buscador.addEventListener('focus', function(){
+      if (select.options.length <= 1) cargar(null);
+    }, {once: true});
+    mas.addEventListener('click', function(){ cargar(siguiente); });
+  });
+});
@@ -0,0 +1,50 @@
+from django import template
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+from eventos_deportivos.cache_paginas import TIEMPO_FRAGMENTO, SENTINELA_CSRF, clave_fragmento
+from eventos_deportivos.replicas import lectura_en_replica
+
+register = template.Library()
+
+
+class NodoCachear(template.Node):
+
+    def __init__(self, nodelist, nombre, modelos):
+        self.nodelist = nodelist
+        self.nombre = nombre
+        self.modelos = modelos
+
+    def render(self, context):
+        request = context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return self.nodelist.render(context)
+
+        clave = clave_fragmento(self.nombre, request, self.modelos)
+        html = cache.get(clave)
+        if html is None:
+            with context.push(csrf_token=SENTINELA_CSRF):
+                html = str(self.nodelist.render(context))
+            # Con la version actual y datos de una replica con retraso, el
+            # fragmento viejo se serviria hasta el siguiente cambio
+            if not lectura_en_replica():
+                cache.set(clave, html, TIEMPO_FRAGMENTO)
+        if SENTINELA_CSRF in html:
+            html = html.replace(SENTINELA_CSRF, str(context.get('csrf_token', '')))
+        return mark_safe(html)
+
+
+@register.tag
+def cachear(parser, token):
+    """
+    {% cachear "jugador" "estadisticasjugador" %} ... {% endcachear %}
+
+    Guarda en la cache el contenido renderizado, con una clave que depende
+    de la URL, el rol del usuario y la version de los modelos indicados.
+    Los datos de la vista deben ser perezosos para no consultarse si el
+    fragmento ya esta guardado.
+    """
+    modelos = [bit.strip('"\'') for bit in token.split_contents()[1:]]
+    nodelist = parser.parse(('endcachear',))
+    parser.delete_first_token()
+    return NodoCachear(nodelist, parser.origin.template_name, modelos)
@@ -1,8 +1,11 @@
-from django.urls import path
-from . import views
+from django.urls import path, re_path
+from . import views, views_async
 from django.conf import settings
 from django.conf.urls.static import static
 
+# Listas, detalles y busquedas: async con ASGI (VISTAS_ASYNC), sincronas con WSGI
+lectura = views_async if settings.VISTAS_ASYNC else views
+
 urlpatterns = [
     # Página principal con enlaces a todas las vistas
     path('', views.index, name='index'),
@@ -14,7 +17,7 @@ urlpatterns = [
     # Crear Jugador
     path('jugadores/create', views.jugador_create, name='jugador_create'),
     # Buscar Jugadores
-    path('jugadores/buscar/', views.jugador_buscar, name='jugador_buscar'),
+    path('jugadores/buscar/', lectura.jugador_buscar, name='jugador_buscar'),
     # Actualizar Jugadores
     path('jugadores/editar/<int:jugador_id>/', views.jugador_editar, name='jugador_editar'),
     # Eliminar Jugadores
@@ -23,7 +26,7 @@ urlpatterns = [
     # Crear Equipos
     path('equipos/create', views.equipo_create, name='equipo_create'),
     # Buscar Equipos
-    path('equipos/buscar/', views.equipo_buscar, name='equipo_buscar'),
+    path('equipos/buscar/', lectura.equipo_buscar, name='equipo_buscar'),
     # Actualizar Equipos
     path('equipos/editar/<int:equipo_id>/', views.equipo_editar, name='equipo_editar'),
     # Eliminar Equipos
@@ -32,7 +35,7 @@ urlpatterns = [
     # Crear Estadios
     path('estadios/create', views.estadio_create, name='estadio_create'),
     # Buscar estadios
-    path('estadios/buscar/', views.estadio_buscar, name='estadio_buscar'),
+    path('estadios/buscar/', lectura.estadio_buscar, name='estadio_buscar'),
     # Actualizar Estadios
     path('estadios/editar/<int:estadio_id>/', views.estadio_editar, name='estadio_editar'),
     # Eliminar Estadios
@@ -41,7 +44,7 @@ urlpatterns = [
     # Crear Sponsors
     path('sponsors/create', views.sponsor_create, name='sponsor_create'),
     # Buscar Sponsors
-    path('sponsors/buscar/', views.sponsor_buscar, name='sponsor_buscar'),
+    path('sponsors/buscar/', lectura.sponsor_buscar, name='sponsor_buscar'),
     # Actualizar Estadios
     path('sponsors/editar/<int:sponsor_id>/', views.sponsor_editar, name='sponsor_editar'),
     # Eliminar Estadios
@@ -50,7 +53,7 @@ urlpatterns = [
     # Crear Partidos
     path('partidos/create', views.partido_create, name='partido_create'),
     # Buscar Partidos
-    path('partidos/buscar/', views.partido_buscar, name='partido_buscar'),
+    path('partidos/buscar/', lectura.partido_buscar, name='partido_buscar'),
     # Actualizar Partidos
     path('partidos/editar/<int:partido_id>/', views.partido_editar, name='partido_editar'),
     # Eliminar Partidos
@@ -59,7 +62,7 @@ urlpatterns = [
     # Crear Torneos
     path('torneos/create', views.torneo_create, name='torneo_create'),
     # Buscar Partidos
-    path('torneos/buscar/', views.torneo_buscar, name='torneo_buscar'),
+    path('torneos/buscar/', lectura.torneo_buscar, name='torneo_buscar'),
     # Actualizar Partidos
     path('torneos/editar/<int:torneo_id>/', views.torneo_editar, name='torneo_editar'),
     # Eliminar Partidos
@@ -67,28 +70,45 @@ urlpatterns = [
     
     #URLS
     # Jugadores
-    path('jugadores/', views.lista_jugadores, name='lista_jugadores'),                # URL1: Lista todos los jugadores
-    path('jugadores/<int:jugador_id>/', views.detalle_jugador, name='detalle_jugador'), # URL2: Detalle de un jugador específico
+    path('jugadores/', lectura.lista_jugadores, name='lista_jugadores'),                # URL1: Lista todos los jugadores
+    path('jugadores/<int:jugador_id>/', lectura.detalle_jugador, name='detalle_jugador'), # URL2: Detalle de un jugador específico
 
     # Equipos
-    path('equipos/', views.lista_equipos, name='lista_equipos'),                      # URL6: Lista todos los equipos
-    path('equipos/<int:equipo_id>/', views.detalle_equipo, name='detalle_equipo'),    # URL3: Detalle de un equipo específico
+    path('equipos/', lectura.lista_equipos, name='lista_equipos'),                      # URL6: Lista todos los equipos
+    path('equipos/<int:equipo_id>/', lectura.detalle_equipo, name='detalle_equipo'),    # URL3: Detalle de un equipo específico
 
     # Partidos
-    path('partidos/', views.lista_partidos, name='lista_partidos'),                    # URL4: Lista todos los partidos
-    path('partidos/<int:partido_id>/', views.detalle_partido, name='detalle_partido'), # URL5: Detalle de un partido específico
+    path('partidos/', lectura.lista_partidos, name='lista_partidos'),                    # URL4: Lista todos los partidos
+    path('partidos/<int:partido_id>/', lectura.detalle_partido, name='detalle_partido'), # URL5: Detalle de un partido específico
 
     # Torneos
-    path('torneos/', views.lista_torneos, name='lista_torneos'),                      # URL8: Lista de todos los torneos
-    path('torneos/<str:nombre_torneo>/', views.detalle_torneo, name='detalle_torneo'), # URL7: Detalle de un torneo por nombre
+    path('torneos/', lectura.lista_torneos, name='lista_torneos'),                      # URL8: Lista de todos los torneos
+    path('torneos/<str:nombre_torneo>/', lectura.detalle_torneo, name='detalle_torneo'), # URL7: Detalle de un torneo por nombre
 
     # Árbitros
-    path('arbitros/<int:arbitro_id>/torneo/<int:torneo_id>/', views.detalle_arbitro_torneo, name='detalle_arbitro_torneo'),                                              # URL9: Detalle de un árbitro en un torneo específico
+    path('arbitros/<int:arbitro_id>/torneo/<int:torneo_id>/', lectura.detalle_arbitro_torneo, name='detalle_arbitro_torneo'),                                              # URL9: Detalle de un árbitro en un torneo específico
 
     # Sponsors
-    path('sponsors/', views.lista_sponsors, name='lista_sponsors'), # URL10: Lista de Sponsors filtrando por país y monto
+    path('sponsors/', lectura.lista_sponsors, name='lista_sponsors'), # URL10: Lista de Sponsors filtrando por país y monto
 
     # Estadios
-    path('estadios/', views.lista_estadios, name='lista_estadios'),
+    path('estadios/', lectura.lista_estadios, name='lista_estadios'),
+    
+    # Exportaciones en streaming: /export/<entidad>.csv o /export/<entidad>.ndjson
+    re_path(r'^export/(?P<entidad>\w+)\.(?P<formato>csv|ndjson)$', views.exportar, name='exportar'),
+    
+    # Autocompletar nombres de jugadores y equipos: ?q=<prefijo>
+    path('api/autocomplete/jugadores', views.autocompletar_jugadores, name='autocompletar_jugadores'),
+    path('api/autocomplete/equipos', views.autocompletar_equipos, name='autocompletar_equipos'),
+    
+    # Opciones de los selects perezosos: ?q=<texto>&cursor=<pagina siguiente>
+    path('api/opciones/jugadores', views.opciones_jugadores, name='opciones_jugadores'),
+    path('api/opciones/torneos', views.opciones_torneos, name='opciones_torneos'),
+    
+    # Altas, cambios y traspasos de plantilla en bloque (POST JSON)
+    path('api/plantillas', views.plantillas_bloque, name='plantillas_bloque'),
+    
+    # Acta del partido (alineaciones, goles, asistencias y tarjetas) en bloque (POST JSON)
+    path('api/partidos/<int:partido_id>/acta', views.partido_acta, name='partido_acta'),
     
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
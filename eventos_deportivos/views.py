@@ -1,13 +1,29 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import StreamingHttpResponse, HttpResponseBadRequest, Http404, JsonResponse
+from django.urls import reverse
 from django.db.models import Prefetch, Count, Max, Q
 from django.contrib import messages
 from datetime import datetime, date, time
+from copy import copy
+import json
 from django.contrib.auth.decorators import permission_required, login_required
+from django.views.decorators.http import require_POST
 from django.contrib.auth.models import Group
 from .models import *
 from .forms import *
+from django.utils.functional import SimpleLazyObject
+from .paginacion import paginar_keyset_perezoso, paginar_keyset
+from .cache_paginas import condicional
+from .filtros import *
+from .exportar import EXPORTACIONES, GENERADORES
+from .clasificacion import aplicar_partido, actualizar_partido
+from .autocompletar import indice_jugadores, indice_equipos
+from .busqueda import buscar_prefijos
+from .plantillas import aplicar_plantillas, PlantillaNoValida
+from .estadisticas import registrar_acta, ActaNoValida
 
 # Create your views here.
+@condicional("torneo")
 def index(request):
     """
     Página principal del proyecto.
@@ -54,6 +70,7 @@ def error_400(request, exception):
 # ----------------------------
 # URL1: Lista todos los jugadores
 # ----------------------------
+@condicional("jugador", "estadisticasjugador")
 def lista_jugadores(request):
     """
     Vista que lista todos los jugadores con sus estadísticas y equipos.
@@ -61,7 +78,7 @@ def lista_jugadores(request):
     """
     # QuerySet optimizado con OR (sin usar Q)
     jugadores = Jugador.objects.filter().select_related('estadisticas')
-    jugadores = (jugadores ).all().order_by('nombre')
+    jugadores = (jugadores ).all()
 
     # Obtener equipos de cada jugador usando prefetch_related en tabla intermedia
     jugadores = jugadores.prefetch_related(
@@ -81,14 +98,20 @@ def lista_jugadores(request):
     """
     #jugadores_sql = Jugador.objects.raw(sql)
 
+    # Paginacion por cursor (nombre, id)
+    # (perezosa: no se consulta si la lista esta en cache)
+    paginacion, jugadores = paginar_keyset_perezoso(request, jugadores, 'nombre')
+
     contexto = {
-        "jugadores": jugadores
+        "jugadores": jugadores,
+        "paginacion": paginacion
     }
     return render(request, "eventos_deportivos/jugadores/lista_jugadores.html", contexto)
 
 # ----------------------------
 # URL2: Detalle de un jugador
 # ----------------------------
+@condicional("jugador", "estadisticasjugador")
 def detalle_jugador(request, jugador_id):
     """
     Vista que muestra el detalle de un jugador específico,
@@ -123,6 +146,7 @@ def detalle_jugador(request, jugador_id):
 # ----------------------------
 # URL3: Detalle de un equipo
 # ----------------------------
+@condicional("equipo", "equipojugador", "jugador", "partido")
 def detalle_equipo(request, equipo_id):
     """
     Vista que muestra todos los datos de un equipo específico,
@@ -146,24 +170,26 @@ def detalle_equipo(request, equipo_id):
     """
     #jugadores_sql = EquipoJugador.objects.raw(sql, [equipo_id])
 
+    # Balance del equipo calculado en SQL con SUM(CASE ...) sobre los goles
+    resumen = SimpleLazyObject(lambda: Partido.objects.resumen_equipo(equipo))
+
     contexto = {
         "equipo": equipo,
-        "jugadores_equipo": jugadores_equipo
+        "jugadores_equipo": jugadores_equipo,
+        "resumen": resumen
     }
     return render(request, "eventos_deportivos/equipos/detalle_equipo.html", contexto)
 
 # ----------------------------
 # URL4: Lista de partidos
 # ----------------------------
+@condicional("partido", "equipo", "torneo")
 def lista_partidos(request):
     """
     Vista que muestra todos los partidos con equipos y torneo.
-    Incluye aggregate (conteo total de partidos y fecha última).
+    Paginada por cursor sobre (fecha, id).
     """
-    partidos = Partido.objects.select_related('equipo_local', 'equipo_visitante', 'torneo').order_by('fecha')
-
-    # Aggregate
-    stats = Partido.objects.aggregate(total_partidos=Count('id'), ultimo_partido=Max('fecha'))
+    partidos = Partido.objects.select_related('equipo_local', 'equipo_visitante', 'torneo')
 
     # Equivalente SQL usando raw()
     sql = """
@@ -179,15 +205,19 @@ def lista_partidos(request):
     """
     #partidos_sql = Partido.objects.raw(sql)
 
+    # Paginacion por cursor (fecha, id)
+    paginacion, partidos = paginar_keyset_perezoso(request, partidos, 'fecha')
+
     contexto = {
         "partidos": partidos,
-        "stats": stats
+        "paginacion": paginacion
     }
     return render(request, "eventos_deportivos/partidos/lista_partidos.html", contexto)
 
 # ----------------------------
 # URL5: Detalle de un partido
 # ----------------------------
+@condicional("partido", "equipo", "torneo", "arbitro")
 def detalle_partido(request, partido_id):
     """
     Vista que muestra los datos de un partido, incluyendo árbitros.
@@ -223,12 +253,13 @@ def detalle_partido(request, partido_id):
 # ----------------------------
 # URL6: Lista de equipos
 # ----------------------------
+@condicional("equipo", "estadio", "equipojugador")
 def lista_equipos(request):
     equipos = Equipo.objects.all()
     """
     Muestra todos los equipos, incluyendo equipos sin estadio (None).
     """
-    equipos = Equipo.objects.select_related('estadio_principal').prefetch_related('jugadores').order_by('nombre')
+    equipos = Equipo.objects.select_related('estadio_principal').prefetch_related('jugadores')
     
     # Equivalente SQL usando raw()
     sql = """
@@ -241,11 +272,15 @@ def lista_equipos(request):
     """
     #equipos_sql = Equipo.objects.raw(sql)
     
-    return render(request, "eventos_deportivos/equipos/lista_equipos.html", {'equipos':equipos})
+    # Paginacion por cursor (nombre, id)
+    paginacion, equipos = paginar_keyset_perezoso(request, equipos, 'nombre')
+    
+    return render(request, "eventos_deportivos/equipos/lista_equipos.html", {'equipos':equipos,'paginacion':paginacion})
 
 # ----------------------------
 # URL7: Detalle de torneos por nombre (r_path)
 # ----------------------------
+@condicional("torneo", "partido", "equipo", "clasificacion")
 def detalle_torneo(request, nombre_torneo):
     """
     Muestra todos los torneos que coincidan con el nombre.
@@ -268,30 +303,49 @@ def detalle_torneo(request, nombre_torneo):
     """
     #torneos_sql = Torneo.objects.raw(sql)
 
+    # Clasificacion materializada: una consulta sobre el indice (torneo, -puntos, ...)
+    # Perezosos: no se consulta nada si el detalle esta en cache.
+    # torneos se evalua una sola vez (la plantilla usa torneos.0 varias veces)
+    torneos = SimpleLazyObject(lambda consulta=torneos: list(consulta))
+
+    def clasificacion_torneo():
+        if not torneos:
+            return []
+        return Clasificacion.objects.filter(torneo=torneos[0]).select_related('equipo').order_by(
+            '-puntos', '-diferencia_goles', '-goles_favor'
+        )
+    clasificacion = SimpleLazyObject(clasificacion_torneo)
+
     contexto = {
-        "torneos": torneos
+        "torneos": torneos,
+        "clasificacion": clasificacion
     }
     return render(request, "eventos_deportivos/torneos/detalle_torneo.html", contexto)
 
 # ----------------------------
 # URL8: Lista de torneos
 # ----------------------------
+@condicional("torneo", "arbitro", "usuario")
 def lista_torneos(request):
     """
-    Lista todos los torneos con sus partidos y equipos.
+    Lista todos los torneos con su arbitro principal.
     """
-    torneos = Torneo.objects.prefetch_related(
-        Prefetch('partido_set', queryset=Partido.objects.select_related('equipo_local', 'equipo_visitante'))
-    ).all().order_by('fecha_inicio')
+    # La plantilla no muestra los partidos: no se cargan
+    torneos = Torneo.objects.select_related('arbitro_principal__usuario')
+
+    # Paginacion por cursor (fecha_inicio, id)
+    paginacion, torneos = paginar_keyset_perezoso(request, torneos, 'fecha_inicio')
 
     contexto = {
-        "torneos": torneos
+        "torneos": torneos,
+        "paginacion": paginacion
     }
     return render(request, "eventos_deportivos/torneos/lista_torneos.html", contexto)
 
 # ----------------------------
 # URL9: Detalle de árbitro en un torneo <input name="nombreBusqueda" class="fomr-control me-2" type="search" placeholder="Nombre" aria-label="Search"></input>
 # ----------------------------
+@condicional("arbitro", "partido", "equipo")
 def detalle_arbitro_torneo(request, arbitro_id, torneo_id):
     """
     Detalle de un árbitro y sus partidos en un torneo.
@@ -308,11 +362,12 @@ def detalle_arbitro_torneo(request, arbitro_id, torneo_id):
 # ----------------------------
 # URL10: Lista de Sponsors
 # ----------------------------
+@condicional("sponsor")
 def lista_sponsors(request):
     """
     Lista todos los sponsors, y usando ManyToMany para equipos.
     """
-    sponsors = Sponsor.objects.prefetch_related('equipos').order_by('nombre')
+    sponsors = Sponsor.objects.prefetch_related('equipos')
 
     # Equivalente SQL usando raw()
     sql = f"""
@@ -324,20 +379,26 @@ def lista_sponsors(request):
     """
     #sponsors_sql = Sponsor.objects.raw(sql)
 
+    # Paginacion por cursor (nombre, id)
+    paginacion, sponsors = paginar_keyset_perezoso(request, sponsors, 'nombre')
+
     contexto = {
-        "sponsors": sponsors
+        "sponsors": sponsors,
+        "paginacion": paginacion
     }
     return render(request, "eventos_deportivos/sponsors/lista_sponsors.html", contexto)
 
 # ----------------------------
 # URL: Lista de estadios
 # ----------------------------
+@condicional("estadio")
 def lista_estadios(request):
     """
     Muestra todos los estadios en la página.
     """
-    estadios = Estadio.objects.all().order_by('nombre')  # orden por nombre
-    return render(request, "eventos_deportivos/estadios/lista_estadios.html", {'estadios': estadios})
+    estadios = Estadio.objects.all()
+    paginacion, estadios = paginar_keyset_perezoso(request, estadios, 'nombre')  # orden por nombre
+    return render(request, "eventos_deportivos/estadios/lista_estadios.html", {'estadios': estadios, 'paginacion': paginacion})
 
 # ----------------------------
 # FORMULARIOS
@@ -354,21 +415,18 @@ def jugador_create_valid(formularioJ):
     # Comprueba si el formulario es valido
     if formularioJ.is_valid():
         try:
-            # Crear la estadística
-            estadisticas = EstadisticasJugador.objects.create(
-                partidos_jugados=formularioJ.cleaned_data['partidos_jugados'],
-                goles=formularioJ.cleaned_data['goles'],
-                asistencias=formularioJ.cleaned_data['asistencias'],
-                tarjetas=formularioJ.cleaned_data['tarjetas']
-            )
-            # Guarda el jugador en la base de datos
-            # Crear el jugador asignando la estadística
-            # Guardar el jugador y asignar estadísticas
-            jugador = formularioJ.save(commit=False)
-            jugador.estadisticas = estadisticas
-            jugador.save()
-            
-            jugador_creado = True
+            # Si el jugador esta repetido tampoco se guardan las estadisticas
+            with formularioJ.unicidad():
+                # Crear la estadística (a cero: la suman las actas de sus partidos)
+                estadisticas = EstadisticasJugador.objects.create()
+                # Guarda el jugador en la base de datos
+                # Crear el jugador asignando la estadística
+                # Guardar el jugador y asignar estadísticas
+                jugador = formularioJ.save(commit=False)
+                jugador.estadisticas = estadisticas
+                jugador.save()
+
+                jugador_creado = True
         except Exception as e:
             print("Error al guardar jugador: ", e)
     else:
@@ -390,6 +448,7 @@ def jugador_create(request):
     return render(request, 'eventos_deportivos/jugadores/jugador_create.html',{"formularioJ":formularioJ})
 
 # LEER
+@condicional("jugador", "estadisticasjugador", "torneo")
 def jugador_buscar(request):
     mensaje_busqueda = ""
     jugadores = Jugador.objects.none() # Por defecto vacio
@@ -403,27 +462,10 @@ def jugador_buscar(request):
     if(len(request.GET)>0):
         
         if formularioJ.is_valid():
-            nombreBusqueda=formularioJ.cleaned_data.get('nombreBusqueda')
-            apellidoBusqueda=formularioJ.cleaned_data.get('apellidoBusqueda')
-            posicionBusqueda=formularioJ.cleaned_data.get('posicionBusqueda')
+            mensaje_busqueda = texto_filtros_jugadores(formularioJ.cleaned_data)
             
-            # --- mensaje de filtros  ---
-            filtros_aplicados = []
-            if nombreBusqueda:
-                filtros_aplicados.append(f"Nombre contiene '{nombreBusqueda}'")
-            if apellidoBusqueda:
-                filtros_aplicados.append(f"Apellido contiene '{apellidoBusqueda}'")
-            filtros_aplicados.append(f"Posicion = '{posicionBusqueda}'")
-            mensaje_busqueda = " | ".join(filtros_aplicados)
-            
-            # --- Construccion del filtro ---
-            filtros = Q(posicion=posicionBusqueda) # Posicion obligatoria
-            if nombreBusqueda:
-                filtros &= Q(nombre__icontains=nombreBusqueda)
-            if apellidoBusqueda:
-                filtros &= Q(apellido__icontains=apellidoBusqueda)
-            
-            jugadores = Jugador.objects.filter(filtros).select_related("estadisticas")
+            # --- Construccion del filtro (indice de texto, ordenado por relevancia) ---
+            jugadores = filtrar_jugadores(Jugador.objects.select_related("estadisticas"), formularioJ.cleaned_data)
     
             return render(request, 'eventos_deportivos/jugadores/jugador_buscar.html', {"formularioJ":formularioJ,"texto_busqueda":mensaje_busqueda,"jugadores":jugadores})
     
@@ -436,7 +478,7 @@ def jugador_buscar(request):
             "formularioES":formularioES,
             "formularioSP":formularioSP,
             "formularioP":formularioP,
-            "formularioP":formularioT,
+            "formularioT":formularioT,
         }
     )
 
@@ -455,11 +497,12 @@ def jugador_editar(request,jugador_id):
     
     if (request.method=="POST"):
         if formularioJ.is_valid():
-            formularioJ.save()
             try:
-                formularioJ.save()
-                messages.success(request, 'Se ha editado el jugador'+formularioJ.cleaned_data.get('nombre')+" correctamente")
-                return redirect('lista_jugadores')
+                # Si el jugador queda repetido se vuelve al formulario con el error
+                with formularioJ.unicidad():
+                    formularioJ.save()
+                    messages.success(request, 'Se ha editado el jugador'+formularioJ.cleaned_data.get('nombre')+" correctamente")
+                    return redirect('lista_jugadores')
             except Exception as e:
                 print(e)
     return render(request, 'eventos_deportivos/jugadores/jugador_editar.html',{"formularioJ":formularioJ,"jugador":jugador})
@@ -470,7 +513,7 @@ def jugador_editar(request,jugador_id):
 def jugador_eliminar(request,jugador_id):
     jugador=Jugador.objects.get(id=jugador_id)
     try:
-        jugador.delete()
+        jugador.eliminar()
     except:
         pass
     return redirect('lista_jugadores')
@@ -488,16 +531,16 @@ def equipo_create_valid(formularioE):
     # Comprueba si el formulario es valido
     if formularioE.is_valid():
         try:
-            equipo = formularioE.save()
-            jugadores_seleccionados = formularioE.cleaned_data.get('jugadores',[])
-            for jugador in jugadores_seleccionados:
-                EquipoJugador.objects.create(
-                equipo=equipo,
-                jugador=jugador,
-                fecha_ingreso=date.today(),
-            )
-            
-            equipo_creado = True
+            with formularioE.unicidad():
+                equipo = formularioE.save()
+                # Toda la plantilla en un bulk_create, dentro de la misma transaccion
+                jugadores_seleccionados = formularioE.cleaned_data.get('jugadores',[])
+                aplicar_plantillas([
+                    {'jugador': jugador.id, 'equipo': equipo.id, 'fecha_ingreso': date.today()}
+                    for jugador in jugadores_seleccionados
+                ])
+
+                equipo_creado = True
         except Exception as e:
             print("Error al guardar equipo: ", e)
     else:
@@ -523,6 +566,7 @@ def equipo_create(request):
     return render(request, 'eventos_deportivos/equipos/equipo_create.html',{"formularioE":formularioE})
 
 # LEER
+@condicional("equipo", "estadio", "torneo")
 def equipo_buscar(request):
     mensaje_busqueda = ""
     equipos = Equipo.objects.none() # Por defecto vacio
@@ -536,29 +580,10 @@ def equipo_buscar(request):
     if(len(request.GET)>0):
         
         if formularioE.is_valid():
-            nombreBusqueda=formularioE.cleaned_data.get('nombreBusqueda')
-            ciudadBusqueda=formularioE.cleaned_data.get('ciudadBusqueda')
-            activoBusqueda=formularioE.cleaned_data.get('activoBusqueda')
-            
-            # --- mensaje de filtros  ---
-            filtros_aplicados = []
-            if nombreBusqueda:
-                filtros_aplicados.append(f"Nombre contiene '{nombreBusqueda}'")
-            if ciudadBusqueda:
-                filtros_aplicados.append(f"Ciudad contiene '{ciudadBusqueda}'")
-            filtros_aplicados.append(f"Activo= '{activoBusqueda}'")
-            mensaje_busqueda = " | ".join(filtros_aplicados)
+            mensaje_busqueda = texto_filtros_equipos(formularioE.cleaned_data)
             
-            # --- Construccion del filtro ---
-            filtros = Q(activo=activoBusqueda) # Posicion obligatoria
-            if nombreBusqueda:
-                filtros &= Q(nombre__icontains=nombreBusqueda)
-            if ciudadBusqueda:
-                filtros &= Q(ciudad__icontains=ciudadBusqueda)
-            if activoBusqueda is not None:
-                filtros &= Q(activo=activoBusqueda)
-                
-            equipos = Equipo.objects.filter(filtros).select_related("estadio_principal")
+            # --- Construccion del filtro (indice de texto, ordenado por relevancia) ---
+            equipos = filtrar_equipos(Equipo.objects.select_related("estadio_principal").prefetch_related("jugadores"), formularioE.cleaned_data)
     
             return render(request, 'eventos_deportivos/equipos/equipo_buscar.html', {"formularioE":formularioE,"texto_busqueda":mensaje_busqueda,"equipos":equipos})
     
@@ -590,11 +615,12 @@ def equipo_editar(request,equipo_id):
     
     if (request.method=="POST"):
         if formularioE.is_valid():
-            formularioE.save()
             try:
-                formularioE.save()
-                messages.success(request, 'Se ha editado el equipo'+formularioE.cleaned_data.get('nombre')+" correctamente")
-                return redirect('lista_equipos')
+                # Si el equipo queda repetido se vuelve al formulario con el error
+                with formularioE.unicidad():
+                    formularioE.save()
+                    messages.success(request, 'Se ha editado el equipo'+formularioE.cleaned_data.get('nombre')+" correctamente")
+                    return redirect('lista_equipos')
             except Exception as e:
                 print(e)
     return render(request, 'eventos_deportivos/equipos/equipo_editar.html',{"formularioE":formularioE,"equipo":equipo})
@@ -605,7 +631,7 @@ def equipo_editar(request,equipo_id):
 def equipo_eliminar(request,equipo_id):
     equipo=Equipo.objects.get(id=equipo_id)
     try:
-        equipo.delete()
+        equipo.eliminar()
     except:
         pass
     return redirect('lista_equipos')
@@ -622,8 +648,9 @@ def estadio_create_valid(formularioES):
     # Comprueba si el formulario es valido
     if formularioES.is_valid():
         try:
-            formularioES.save()
-            estadio_creado = True
+            with formularioES.unicidad():
+                formularioES.save()
+                estadio_creado = True
         except Exception as e:
             print("Error al guardar estadio: ", e)
     else:
@@ -645,6 +672,7 @@ def estadio_create(request):
     return render(request, 'eventos_deportivos/estadios/estadio_create.html',{"formularioES":formularioES})
 
 # LEER
+@condicional("estadio", "torneo")
 def estadio_buscar(request):
     mensaje_busqueda = ""
     estadios = Estadio.objects.none() # Por defecto vacio
@@ -658,29 +686,10 @@ def estadio_buscar(request):
     if(len(request.GET)>0):
         
         if formularioES.is_valid():
-            nombreBusqueda=formularioES.cleaned_data.get('nombreBusqueda')
-            capacidadBusqueda=formularioES.cleaned_data.get('capacidadBusqueda')
-            cubiertoBusqueda=formularioES.cleaned_data.get('cubiertoBusqueda')
-            
-            # --- mensaje de filtros  ---
-            filtros_aplicados = []
-            if nombreBusqueda:
-                filtros_aplicados.append(f"Nombre contiene '{nombreBusqueda}'")
-            if capacidadBusqueda:
-                filtros_aplicados.append(f"Capacidad contiene '{capacidadBusqueda}'")
-            filtros_aplicados.append(f"Cubierto= '{cubiertoBusqueda}'")
-            mensaje_busqueda = " | ".join(filtros_aplicados)
+            mensaje_busqueda = texto_filtros_estadios(formularioES.cleaned_data)
             
-            # --- Construccion del filtro ---
-            filtros = Q() # Posicion obligatoria
-            if nombreBusqueda:
-                filtros &= Q(nombre__icontains=nombreBusqueda)
-            if capacidadBusqueda:
-                filtros &= Q(capacidad__lte=capacidadBusqueda)
-            if cubiertoBusqueda:
-                filtros &= Q(cubierto=cubiertoBusqueda)
-                
-            estadios = Estadio.objects.filter(filtros)
+            # --- Construccion del filtro (indice de texto, ordenado por relevancia) ---
+            estadios = filtrar_estadios(Estadio.objects.all(), formularioES.cleaned_data)
     
             return render(request, 'eventos_deportivos/estadios/estadio_buscar.html', {"formularioES":formularioES,"texto_busqueda":mensaje_busqueda,"estadios":estadios})
 
@@ -712,11 +721,12 @@ def estadio_editar(request,estadio_id):
     
     if (request.method=="POST"):
         if formularioES.is_valid():
-            formularioES.save()
             try:
-                formularioES.save()
-                messages.success(request, 'Se ha editado el estadio'+formularioES.cleaned_data.get('nombre')+" correctamente")
-                return redirect('lista_estadios')
+                # Si el estadio queda repetido se vuelve al formulario con el error
+                with formularioES.unicidad():
+                    formularioES.save()
+                    messages.success(request, 'Se ha editado el estadio'+formularioES.cleaned_data.get('nombre')+" correctamente")
+                    return redirect('lista_estadios')
             except Exception as e:
                 print(e)
     return render(request, 'eventos_deportivos/estadios/estadio_editar.html',{"formularioES":formularioES,"estadio":estadio})
@@ -727,7 +737,7 @@ def estadio_editar(request,estadio_id):
 def estadio_eliminar(request,estadio_id):
     estadio=Estadio.objects.get(id=estadio_id)
     try:
-        estadio.delete()
+        estadio.eliminar()
     except:
         pass
     return redirect('lista_estadios')
@@ -744,8 +754,9 @@ def sponsor_create_valid(formularioSP):
     # Comprueba si el formulario es valido
     if formularioSP.is_valid():
         try:
-            formularioSP.save()
-            sponsor_creado = True
+            with formularioSP.unicidad():
+                formularioSP.save()
+                sponsor_creado = True
         except Exception as e:
             print("Error al guardar sponsor: ", e)
     else:
@@ -772,6 +783,7 @@ def sponsor_create(request):
     return render(request, 'eventos_deportivos/sponsors/sponsor_create.html',{"formularioSP":formularioSP})
 
 # LEER
+@condicional("sponsor", "torneo")
 def sponsor_buscar(request):
     mensaje_busqueda = ""
     sponsors = Sponsor.objects.none() # Por defecto vacio
@@ -785,30 +797,10 @@ def sponsor_buscar(request):
     if(len(request.GET)>0):
         
         if formularioSP.is_valid():
-            nombreBusqueda=formularioSP.cleaned_data.get('nombreBusqueda')
-            paisBusqueda=formularioSP.cleaned_data.get('paisBusqueda')
-            montoBusqueda=formularioSP.cleaned_data.get('montoBusqueda')
+            mensaje_busqueda = texto_filtros_sponsors(formularioSP.cleaned_data)
             
-            # --- mensaje de filtros  ---
-            filtros_aplicados = []
-            if nombreBusqueda:
-                filtros_aplicados.append(f"Nombre contiene '{nombreBusqueda}'")
-            if montoBusqueda is not None:
-                filtros_aplicados.append(f"Monto <= '{montoBusqueda}'")
-            if paisBusqueda:
-                filtros_aplicados.append(f"Pais contiene '{paisBusqueda}'")
-            mensaje_busqueda = " | ".join(filtros_aplicados)
-            
-            # --- Construccion del filtro ---
-            filtros = Q() # Posicion obligatoria
-            if nombreBusqueda:
-                filtros &= Q(nombre__icontains=nombreBusqueda)
-            if montoBusqueda is not None:
-                filtros &= Q(monto__lte=montoBusqueda)
-            if paisBusqueda:
-                filtros &= Q(pais__icontains=paisBusqueda)
-                
-            sponsors = Sponsor.objects.filter(filtros)
+            # --- Construccion del filtro (indice de texto, ordenado por relevancia) ---
+            sponsors = filtrar_sponsors(Sponsor.objects.prefetch_related("equipos"), formularioSP.cleaned_data)
     
             return render(request, 'eventos_deportivos/sponsors/sponsor_buscar.html', {"formularioSP":formularioSP,"texto_busqueda":mensaje_busqueda,"sponsors":sponsors})
 
@@ -821,7 +813,7 @@ def sponsor_buscar(request):
             "formularioES":formularioES,
             "formularioSP":formularioSP,
             "formularioP":formularioP,
-            "formulario":formularioT,
+            "formularioT":formularioT,
         }
     )
 
@@ -840,11 +832,12 @@ def  sponsor_editar(request,sponsor_id):
     
     if (request.method=="POST"):
         if formularioSP.is_valid():
-            formularioSP.save()
             try:
-                formularioSP.save()
-                messages.success(request, 'Se ha editado el sponsor'+formularioSP.cleaned_data.get('nombre')+" correctamente")
-                return redirect('lista_sponsors')
+                # Si el sponsor queda repetido se vuelve al formulario con el error
+                with formularioSP.unicidad():
+                    formularioSP.save()
+                    messages.success(request, 'Se ha editado el sponsor'+formularioSP.cleaned_data.get('nombre')+" correctamente")
+                    return redirect('lista_sponsors')
             except Exception as e:
                 print(e)
     return render(request, 'eventos_deportivos/sponsors/sponsor_editar.html',{"formularioSP":formularioSP,"sponsor":sponsor})
@@ -855,7 +848,7 @@ def  sponsor_editar(request,sponsor_id):
 def sponsor_eliminar(request,sponsor_id):
     sponsor=Sponsor.objects.get(id=sponsor_id)
     try:
-        sponsor.delete()
+        sponsor.eliminar()
     except:
         pass
     return redirect('lista_sponsors')
@@ -872,8 +865,10 @@ def partido_create_valid(formularioP):
     # Comprueba si el formulario es valido
     if formularioP.is_valid():
         try:
-            formularioP.save()
-            partido_creado = True
+            with formularioP.unicidad():
+                partido = formularioP.save()
+                aplicar_partido(partido)
+                partido_creado = True
         except Exception as e:
             print("Error al guardar partido: ", e)
     else:
@@ -903,6 +898,7 @@ def partido_create(request):
     return render(request, 'eventos_deportivos/partidos/partido_create.html',{"formularioP":formularioP})
 
 # LEER
+@condicional("partido", "equipo", "torneo")
 def partido_buscar(request):
     mensaje_busqueda = ""
     partidos = Partido.objects.all() # Por defecto vacio
@@ -916,30 +912,10 @@ def partido_buscar(request):
     if(len(request.GET)>0):
         
         if formularioP.is_valid():
-            hastaFechaBusqueda=formularioP.cleaned_data.get('hastaFechaBusqueda')
-            desdeFechaBusqueda=formularioP.cleaned_data.get('desdeFechaBusqueda')
-            torneoBusqueda=formularioP.cleaned_data.get('torneoBusqueda')
-            
-            # --- mensaje de filtros  ---
-            filtros_aplicados = []
-            if hastaFechaBusqueda:
-                filtros_aplicados.append(f"fecha hasta: '{hastaFechaBusqueda}'")
-            if desdeFechaBusqueda:
-                filtros_aplicados.append(f"fecha desde: '{desdeFechaBusqueda}'")
-            if torneoBusqueda:
-                filtros_aplicados.append(f"torneo: '{torneoBusqueda}'")
-            mensaje_busqueda = " | ".join(filtros_aplicados)
+            mensaje_busqueda = texto_filtros_partidos(formularioP.cleaned_data)
             
             # --- Construccion del filtro ---
-            filtros = Q() # Posicion obligatoria
-            if desdeFechaBusqueda:
-                filtros &= Q(fecha__gte=desdeFechaBusqueda)
-            if hastaFechaBusqueda:
-                filtros &= Q(fecha__lte=hastaFechaBusqueda)
-            if torneoBusqueda:
-                filtros &= Q(torneo=torneoBusqueda)
-                
-            partidos = Partido.objects.filter(filtros).select_related('equipo_local','equipo_visitante','torneo')
+            partidos = filtrar_partidos(Partido.objects.select_related('equipo_local','equipo_visitante','torneo'), formularioP.cleaned_data)
     
             return render(request, 'eventos_deportivos/partidos/partido_buscar.html', {"formularioP":formularioP,"texto_busqueda":mensaje_busqueda,"partidos":partidos})
     
@@ -961,6 +937,8 @@ def partido_buscar(request):
 @permission_required('eventos_deportivos.change_partido')
 def  partido_editar(request,partido_id):
     partido = Partido.objects.get(id=partido_id)
+    # Copia del partido antes de editarlo para actualizar la clasificacion
+    anterior = copy(partido)
     
     datosFormulario=None
     
@@ -971,15 +949,16 @@ def  partido_editar(request,partido_id):
     
     if (request.method=="POST"):
         if formularioP.is_valid():
-            formularioP.save()
             try:
-                formularioP.save()
-                # Obtener los objetos Equipo
-                equipo_local = formularioP.cleaned_data.get('equipo_local')
-                equipo_visitante = formularioP.cleaned_data.get('equipo_visitante')
-            
-                messages.success(request, f"Se a modificado el partido {equipo_local} VS {equipo_visitante} correctamente")
-                return redirect('lista_partidos')
+                with formularioP.unicidad():
+                    formularioP.save()
+                    actualizar_partido(anterior, partido)
+                    # Obtener los objetos Equipo
+                    equipo_local = formularioP.cleaned_data.get('equipo_local')
+                    equipo_visitante = formularioP.cleaned_data.get('equipo_visitante')
+
+                    messages.success(request, f"Se a modificado el partido {equipo_local} VS {equipo_visitante} correctamente")
+                    return redirect('lista_partidos')
             except Exception as e:
                 print(e)
     return render(request, 'eventos_deportivos/partidos/partido_editar.html',{"formularioP":formularioP,"partido":partido})
@@ -990,7 +969,8 @@ def  partido_editar(request,partido_id):
 def partido_eliminar(request,partido_id):
     partido=Partido.objects.get(id=partido_id)
     try:
-        partido.delete()
+        # eliminar() lo resta de la clasificacion y de los totales en la misma transaccion
+        partido.eliminar()
     except:
         pass
     return redirect('lista_partidos')
@@ -1007,8 +987,9 @@ def torneo_create_valid(formularioT):
     # Comprueba si el formulario es valido
     if formularioT.is_valid():
         try:
-            formularioT.save()
-            torneo_creado = True
+            with formularioT.unicidad():
+                formularioT.save()
+                torneo_creado = True
         except Exception as e:
             print("Error al guardar el torneo: ", e)
     else:
@@ -1036,13 +1017,14 @@ def torneo_create(request):
 
 # LEER
 # FILTRO EN BASE AL USUARIO CONECTADO
+@condicional("torneo", "arbitro")
 def torneo_buscar(request):
     """
     Vista para buscar y listar torneos.
     Muestra un formulario de búsqueda y los resultados filtrados.
     """
-    # Inicializar queryset completo
-    torneos = Torneo.objects.all()
+    # Inicializar queryset completo (con el arbitro que muestra la tabla)
+    torneos = Torneo.objects.select_related('arbitro_principal__usuario')
 
     # Inicializar formularios
     formularioJ = BusquedaJugadorForm(request.GET or None)
@@ -1063,30 +1045,10 @@ def torneo_buscar(request):
 
     # Procesar formulario de búsqueda
     if formularioT.is_valid():
-        paisBusqueda = formularioT.cleaned_data.get('paisBusqueda')
-        fechaBusqueda = formularioT.cleaned_data.get('fechaDesdeBusqueda')
-        nombreBusqueda = formularioT.cleaned_data.get('nombreBusqueda')
-
-        # Construcción del mensaje de filtros
-        filtros_aplicados = []
-        if paisBusqueda:
-            filtros_aplicados.append(f"País = '{paisBusqueda}'")
-        if fechaBusqueda:
-            filtros_aplicados.append(f"Fecha desde = '{fechaBusqueda}'")
-        if nombreBusqueda:
-            filtros_aplicados.append(f"Nombre = '{nombreBusqueda}'")
-        mensaje_busqueda = " | ".join(filtros_aplicados)
+        mensaje_busqueda = texto_filtros_torneos(formularioT.cleaned_data)
 
         # Aplicar filtros sobre el queryset existente
-        filtros = Q()
-        if paisBusqueda:
-            filtros &= Q(pais__icontains=paisBusqueda)
-        if fechaBusqueda:
-            filtros &= Q(fecha_inicio__gte=fechaBusqueda)
-        if nombreBusqueda:
-            filtros &= Q(nombre__icontains=nombreBusqueda)
-
-        torneos = torneos.filter(filtros)
+        torneos = filtrar_torneos(torneos, formularioT.cleaned_data)
 
         return render(
             request,
@@ -1127,11 +1089,12 @@ def  torneo_editar(request,torneo_id):
     
     if (request.method=="POST"):
         if formularioT.is_valid():
-            formularioT.save()
             try:
-                formularioT.save()
-                messages.success(request, 'Se ha editado el torneo'+formularioT.cleaned_data.get('nombre')+" correctamente")
-                return redirect('lista_torneos')
+                # Si el torneo queda repetido se vuelve al formulario con el error
+                with formularioT.unicidad():
+                    formularioT.save()
+                    messages.success(request, 'Se ha editado el torneo'+formularioT.cleaned_data.get('nombre')+" correctamente")
+                    return redirect('lista_torneos')
             except Exception as e:
                 print(e)
     return render(request, 'eventos_deportivos/torneos/torneo_editar.html',{"formularioT":formularioT,"torneo":torneo})
@@ -1142,11 +1105,138 @@ def  torneo_editar(request,torneo_id):
 def torneo_eliminar(request,torneo_id):
     torneo=Torneo.objects.get(id=torneo_id)
     try:
-        torneo.delete()
+        torneo.eliminar()
     except:
         pass
     return redirect('lista_torneos')
 
+# ----------------------------
+# Exportaciones CSV / NDJSON
+# ----------------------------
+@condicional(lambda entidad, **kwargs: EXPORTACIONES.get(entidad, {}).get('modelos'))
+def exportar(request, entidad, formato):
+    """
+    Descarga una entidad completa en CSV o NDJSON.
+    La respuesta se genera en streaming sobre QuerySet.iterator(), asi la
+    memoria no crece con el numero de filas. Acepta los mismos parametros
+    GET que el formulario *_buscar de la entidad.
+    """
+    exportacion = EXPORTACIONES.get(entidad)
+    if exportacion is None:
+        raise Http404("Entidad no exportable")
+
+    queryset = exportacion['queryset']()
+    if len(request.GET) > 0 and exportacion['formulario'] is not None:
+        formulario = exportacion['formulario'](request.GET)
+        if not formulario.is_valid():
+            return HttpResponseBadRequest(formulario.errors.as_json(), content_type="application/json")
+        queryset = exportacion['filtro'](queryset, formulario.cleaned_data)
+
+    generador, tipo = GENERADORES[formato]
+    respuesta = StreamingHttpResponse(generador(queryset, exportacion['columnas']), content_type=tipo)
+    respuesta['Content-Disposition'] = f'attachment; filename="{entidad}.{formato}"'
+    return respuesta
+
+# ----------------------------
+# Autocompletar (API JSON)
+# ----------------------------
+# Numero de sugerencias por defecto y maximo
+AUTOCOMPLETAR_LIMITE = 10
+AUTOCOMPLETAR_MAXIMO = 50
+
+def autocompletar(request, indice, nombre_url):
+    # Devuelve las primeras sugerencias del indice en memoria que empiezan por ?q=
+    try:
+        limite = min(int(request.GET.get('limite', AUTOCOMPLETAR_LIMITE)), AUTOCOMPLETAR_MAXIMO)
+    except ValueError:
+        limite = AUTOCOMPLETAR_LIMITE
+    resultados = indice.buscar(request.GET.get('q', ''), limite)
+    return JsonResponse({
+        "resultados": [
+            {"id": pk, "texto": texto, "url": reverse(nombre_url, args=[pk])}
+            for pk, texto in resultados
+        ]
+    })
+
+@condicional("jugador")
+def autocompletar_jugadores(request):
+    return autocompletar(request, indice_jugadores, 'detalle_jugador')
+
+@condicional("equipo")
+def autocompletar_equipos(request):
+    return autocompletar(request, indice_equipos, 'detalle_equipo')
+
+# Opciones de los selects perezosos (widgets.py): busqueda por prefijo
+# en la base de datos, paginada por cursor
+OPCIONES_PAGINA = 20
+
+def opciones(request, queryset, columnas):
+    pagina = paginar_keyset(request, buscar_prefijos(queryset, columnas, request.GET.get('q', '')),
+                            'nombre', OPCIONES_PAGINA)
+    return JsonResponse({
+        "resultados": [{"id": objeto.pk, "texto": str(objeto)} for objeto in pagina['objetos']],
+        "siguiente": pagina['cursor_siguiente'],
+    })
+
+@condicional("jugador")
+def opciones_jugadores(request):
+    return opciones(request, Jugador.objects.all(), ['nombre', 'apellido'])
+
+@condicional("torneo")
+def opciones_torneos(request):
+    return opciones(request, Torneo.objects.all(), ['nombre', 'pais'])
+
+# ----------------------------
+# Plantillas en bloque (API JSON)
+# POST {"operaciones": [{"jugador": id, "equipo": id, "fecha_ingreso":
+# "AAAA-MM-DD", "capitan": false, "traspaso": false}, ...]}
+# Todo el lote en una transaccion (plantillas.py) o nada si hay errores
+# ----------------------------
+PLANTILLAS_MAXIMO = 10000
+
+@login_required
+@permission_required('eventos_deportivos.change_equipo')
+@require_POST
+def plantillas_bloque(request):
+    try:
+        operaciones = json.loads(request.body)['operaciones']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"errores": [{"error": 'Se espera un JSON {"operaciones": [...]}'}]}, status=400)
+    if not isinstance(operaciones, list) or len(operaciones) > PLANTILLAS_MAXIMO:
+        return JsonResponse({"errores": [{"error": f"operaciones debe ser una lista de como mucho {PLANTILLAS_MAXIMO}"}]},
+                            status=400)
+    try:
+        resultado = aplicar_plantillas(operaciones)
+    except PlantillaNoValida as error:
+        return JsonResponse({"errores": error.errores}, status=400)
+    return JsonResponse(resultado)
+
+# ----------------------------
+# Acta de un partido (API JSON)
+# POST {"eventos": [{"jugador": id, "tipo": "alineacion" | "gol" |
+# "asistencia" | "tarjeta", "minuto": 23}, ...]}
+# Sustituye el acta anterior y actualiza las estadisticas (estadisticas.py)
+# ----------------------------
+ACTA_MAXIMO = 500
+
+@login_required
+@permission_required('eventos_deportivos.change_partido')
+@require_POST
+def partido_acta(request, partido_id):
+    partido = get_object_or_404(Partido, id=partido_id)
+    try:
+        eventos = json.loads(request.body)['eventos']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"errores": [{"error": 'Se espera un JSON {"eventos": [...]}'}]}, status=400)
+    if not isinstance(eventos, list) or len(eventos) > ACTA_MAXIMO:
+        return JsonResponse({"errores": [{"error": f"eventos debe ser una lista de como mucho {ACTA_MAXIMO}"}]},
+                            status=400)
+    try:
+        resultado = registrar_acta(partido, eventos)
+    except ActaNoValida as error:
+        return JsonResponse({"errores": error.errores}, status=400)
+    return JsonResponse(resultado)
+
 # ------------------------------------
 # Autenticacion, Sesiones y Permisos 
 # ------------------------------------
@@ -0,0 +1,321 @@
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, aget_object_or_404
+from django.db.models import Prefetch
+from . import views
+from .models import *
+from .forms import *
+from .paginacion import apaginar_keyset
+from .cache_paginas import condicional, fragmentos_guardados
+from .filtros import *
+
+# ----------------------------
+# Vistas de lectura async (ASGI)
+# Versiones async de las listas, detalles y busquedas de views.py. Sus
+# consultas usan el ORM async (aget, async for, aaggregate), asi el bucle
+# de eventos sigue atendiendo otras conexiones mientras esperan. urls.py
+# las usa si VISTAS_ASYNC esta activo (asgi.py lo activa); con WSGI se
+# siguen usando las vistas sincronas.
+# ----------------------------
+
+
+async def renderizar(request, plantilla, contexto):
+    # render() es sincrono y la plantilla puede consultar la sesion, los
+    # permisos o los ModelChoiceField: se genera en el hilo de la peticion
+    return await sync_to_async(render)(request, plantilla, contexto)
+
+
+async def desde_cache(request, plantilla, vista, **kwargs):
+    """
+    Si los fragmentos {% cachear %} de la plantilla ya estan en cache, la
+    vista sincrona no consulta nada (sus datos son perezosos): se ejecuta
+    en un hilo y se devuelve su respuesta. Si no, devuelve None.
+    """
+    if not fragmentos_guardados(request, plantilla):
+        return None
+    return await sync_to_async(vista.__wrapped__)(request, **kwargs)
+
+
+async def alistar(queryset):
+    return [objeto async for objeto in queryset]
+
+
+async def validar(formulario):
+    # Los ModelChoiceField consultan la base de datos al validar
+    return await sync_to_async(formulario.is_valid)()
+
+
+def formularios_index(request):
+    return {
+        "formularioJ": BusquedaJugadorForm(request.GET or None),
+        "formularioE": BusquedaEquipoForm(request.GET or None),
+        "formularioES": BusquedaEstadioForm(request.GET or None),
+        "formularioSP": BusquedaSponsorForm(request.GET or None),
+        "formularioP": BusquedaPartidoForm(request.GET or None),
+        "formularioT": BusquedaTorneoForm(request.GET or None),
+    }
+
+
+# ----------------------------
+# Listas
+# ----------------------------
+@condicional("jugador", "estadisticasjugador")
+async def lista_jugadores(request):
+    plantilla = "eventos_deportivos/jugadores/lista_jugadores.html"
+    respuesta = await desde_cache(request, plantilla, views.lista_jugadores)
+    if respuesta is not None:
+        return respuesta
+
+    jugadores = Jugador.objects.select_related('estadisticas').prefetch_related(
+        Prefetch('equipojugador_set', queryset=EquipoJugador.objects.select_related('equipo'))
+    )
+    paginacion = await apaginar_keyset(request, jugadores, 'nombre')
+    return await renderizar(request, plantilla, {"jugadores": paginacion['objetos'], "paginacion": paginacion})
+
+
+@condicional("equipo", "estadio", "equipojugador")
+async def lista_equipos(request):
+    plantilla = "eventos_deportivos/equipos/lista_equipos.html"
+    respuesta = await desde_cache(request, plantilla, views.lista_equipos)
+    if respuesta is not None:
+        return respuesta
+
+    equipos = Equipo.objects.select_related('estadio_principal').prefetch_related('jugadores')
+    paginacion = await apaginar_keyset(request, equipos, 'nombre')
+    return await renderizar(request, plantilla, {"equipos": paginacion['objetos'], "paginacion": paginacion})
+
+
+@condicional("partido", "equipo", "torneo")
+async def lista_partidos(request):
+    plantilla = "eventos_deportivos/partidos/lista_partidos.html"
+    respuesta = await desde_cache(request, plantilla, views.lista_partidos)
+    if respuesta is not None:
+        return respuesta
+
+    partidos = Partido.objects.select_related('equipo_local', 'equipo_visitante', 'torneo')
+    paginacion = await apaginar_keyset(request, partidos, 'fecha')
+    return await renderizar(request, plantilla, {"partidos": paginacion['objetos'], "paginacion": paginacion})
+
+
+@condicional("torneo", "arbitro", "usuario")
+async def lista_torneos(request):
+    plantilla = "eventos_deportivos/torneos/lista_torneos.html"
+    respuesta = await desde_cache(request, plantilla, views.lista_torneos)
+    if respuesta is not None:
+        return respuesta
+
+    torneos = Torneo.objects.select_related('arbitro_principal__usuario')
+    paginacion = await apaginar_keyset(request, torneos, 'fecha_inicio')
+    return await renderizar(request, plantilla, {"torneos": paginacion['objetos'], "paginacion": paginacion})
+
+
+@condicional("sponsor")
+async def lista_sponsors(request):
+    plantilla = "eventos_deportivos/sponsors/lista_sponsors.html"
+    respuesta = await desde_cache(request, plantilla, views.lista_sponsors)
+    if respuesta is not None:
+        return respuesta
+
+    paginacion = await apaginar_keyset(request, Sponsor.objects.prefetch_related('equipos'), 'nombre')
+    return await renderizar(request, plantilla, {"sponsors": paginacion['objetos'], "paginacion": paginacion})
+
+
+@condicional("estadio")
+async def lista_estadios(request):
+    plantilla = "eventos_deportivos/estadios/lista_estadios.html"
+    respuesta = await desde_cache(request, plantilla, views.lista_estadios)
+    if respuesta is not None:
+        return respuesta
+
+    paginacion = await apaginar_keyset(request, Estadio.objects.all(), 'nombre')
+    return await renderizar(request, plantilla, {"estadios": paginacion['objetos'], "paginacion": paginacion})
+
+
+# ----------------------------
+# Detalles
+# ----------------------------
+@condicional("jugador", "estadisticasjugador")
+async def detalle_jugador(request, jugador_id):
+    plantilla = "eventos_deportivos/jugadores/detalle_jugador.html"
+    respuesta = await desde_cache(request, plantilla, views.detalle_jugador, jugador_id=jugador_id)
+    if respuesta is not None:
+        return respuesta
+
+    jugador = await aget_object_or_404(Jugador.objects.select_related('estadisticas'), pk=jugador_id)
+    return await renderizar(request, plantilla, {"jugador": jugador})
+
+
+@condicional("equipo", "equipojugador", "jugador", "partido")
+async def detalle_equipo(request, equipo_id):
+    plantilla = "eventos_deportivos/equipos/detalle_equipo.html"
+    respuesta = await desde_cache(request, plantilla, views.detalle_equipo, equipo_id=equipo_id)
+    if respuesta is not None:
+        return respuesta
+
+    equipo = await aget_object_or_404(Equipo.objects.select_related('estadio_principal'), pk=equipo_id)
+    jugadores_equipo = await alistar(
+        EquipoJugador.objects.filter(equipo=equipo).select_related('jugador').order_by('fecha_ingreso')
+    )
+    resumen = await Partido.objects.aresumen_equipo(equipo)
+    return await renderizar(request, plantilla, {
+        "equipo": equipo,
+        "jugadores_equipo": jugadores_equipo,
+        "resumen": resumen,
+    })
+
+
+@condicional("partido", "equipo", "torneo", "arbitro")
+async def detalle_partido(request, partido_id):
+    plantilla = "eventos_deportivos/partidos/detalle_partido.html"
+    respuesta = await desde_cache(request, plantilla, views.detalle_partido, partido_id=partido_id)
+    if respuesta is not None:
+        return respuesta
+
+    partido = await aget_object_or_404(
+        Partido.objects.select_related('equipo_local', 'equipo_visitante', 'torneo'),
+        pk=partido_id
+    )
+    arbitros = await alistar(Arbitro.objects.filter(partidos=partido))
+    return await renderizar(request, plantilla, {"partido": partido, "arbitros": arbitros})
+
+
+@condicional("torneo", "partido", "equipo", "clasificacion")
+async def detalle_torneo(request, nombre_torneo):
+    plantilla = "eventos_deportivos/torneos/detalle_torneo.html"
+    respuesta = await desde_cache(request, plantilla, views.detalle_torneo, nombre_torneo=nombre_torneo)
+    if respuesta is not None:
+        return respuesta
+
+    torneos = await alistar(Torneo.objects.filter(nombre=nombre_torneo).order_by('fecha_inicio').prefetch_related(
+        Prefetch('partido_set', queryset=Partido.objects.select_related('equipo_local', 'equipo_visitante'))
+    ))
+    clasificacion = []
+    if torneos:
+        clasificacion = await alistar(
+            Clasificacion.objects.filter(torneo=torneos[0]).select_related('equipo').order_by(
+                '-puntos', '-diferencia_goles', '-goles_favor'
+            )
+        )
+    return await renderizar(request, plantilla, {"torneos": torneos, "clasificacion": clasificacion})
+
+
+@condicional("arbitro", "partido", "equipo")
+async def detalle_arbitro_torneo(request, arbitro_id, torneo_id):
+    plantilla = "eventos_deportivos/detalle_arbitro_torneo.html"
+    respuesta = await desde_cache(request, plantilla, views.detalle_arbitro_torneo,
+                                  arbitro_id=arbitro_id, torneo_id=torneo_id)
+    if respuesta is not None:
+        return respuesta
+
+    arbitro = await aget_object_or_404(Arbitro, pk=arbitro_id)
+    partidos = await alistar(
+        arbitro.partidos.filter(torneo_id=torneo_id).select_related('equipo_local', 'equipo_visitante', 'torneo').order_by('fecha')
+    )
+    return await renderizar(request, plantilla, {"arbitro": arbitro, "partidos": partidos})
+
+
+# ----------------------------
+# Busquedas
+# Los filtros de texto se aplican en un hilo: la primera vez comprueban en
+# la base de datos si existe el indice FTS5 (busqueda.py)
+# ----------------------------
+@condicional("jugador", "estadisticasjugador", "torneo")
+async def jugador_buscar(request):
+    formularios = formularios_index(request)
+    formularioJ = formularios["formularioJ"]
+    if len(request.GET) > 0 and await validar(formularioJ):
+        jugadores = await sync_to_async(filtrar_jugadores)(
+            Jugador.objects.select_related("estadisticas"), formularioJ.cleaned_data
+        )
+        return await renderizar(request, 'eventos_deportivos/jugadores/jugador_buscar.html', {
+            "formularioJ": formularioJ,
+            "texto_busqueda": texto_filtros_jugadores(formularioJ.cleaned_data),
+            "jugadores": await alistar(jugadores),
+        })
+    return await renderizar(request, "eventos_deportivos/index.html", formularios)
+
+
+@condicional("equipo", "estadio", "torneo")
+async def equipo_buscar(request):
+    formularios = formularios_index(request)
+    formularioE = formularios["formularioE"]
+    if len(request.GET) > 0 and await validar(formularioE):
+        equipos = await sync_to_async(filtrar_equipos)(
+            Equipo.objects.select_related("estadio_principal").prefetch_related("jugadores"), formularioE.cleaned_data
+        )
+        return await renderizar(request, 'eventos_deportivos/equipos/equipo_buscar.html', {
+            "formularioE": formularioE,
+            "texto_busqueda": texto_filtros_equipos(formularioE.cleaned_data),
+            "equipos": await alistar(equipos),
+        })
+    return await renderizar(request, "eventos_deportivos/index.html", formularios)
+
+
+@condicional("estadio", "torneo")
+async def estadio_buscar(request):
+    formularios = formularios_index(request)
+    formularioES = formularios["formularioES"]
+    if len(request.GET) > 0 and await validar(formularioES):
+        estadios = await sync_to_async(filtrar_estadios)(Estadio.objects.all(), formularioES.cleaned_data)
+        return await renderizar(request, 'eventos_deportivos/estadios/estadio_buscar.html', {
+            "formularioES": formularioES,
+            "texto_busqueda": texto_filtros_estadios(formularioES.cleaned_data),
+            "estadios": await alistar(estadios),
+        })
+    return await renderizar(request, "eventos_deportivos/index.html", formularios)
+
+
+@condicional("sponsor", "torneo")
+async def sponsor_buscar(request):
+    formularios = formularios_index(request)
+    formularioSP = formularios["formularioSP"]
+    if len(request.GET) > 0 and await validar(formularioSP):
+        sponsors = await sync_to_async(filtrar_sponsors)(
+            Sponsor.objects.prefetch_related("equipos"), formularioSP.cleaned_data
+        )
+        return await renderizar(request, 'eventos_deportivos/sponsors/sponsor_buscar.html', {
+            "formularioSP": formularioSP,
+            "texto_busqueda": texto_filtros_sponsors(formularioSP.cleaned_data),
+            "sponsors": await alistar(sponsors),
+        })
+    return await renderizar(request, "eventos_deportivos/index.html", formularios)
+
+
+@condicional("partido", "equipo", "torneo")
+async def partido_buscar(request):
+    formularios = formularios_index(request)
+    formularioP = formularios["formularioP"]
+    if len(request.GET) > 0 and await validar(formularioP):
+        partidos = filtrar_partidos(
+            Partido.objects.select_related('equipo_local', 'equipo_visitante', 'torneo'), formularioP.cleaned_data
+        )
+        return await renderizar(request, 'eventos_deportivos/partidos/partido_buscar.html', {
+            "formularioP": formularioP,
+            "texto_busqueda": texto_filtros_partidos(formularioP.cleaned_data),
+            "partidos": await alistar(partidos),
+        })
+    return await renderizar(request, "eventos_deportivos/index.html", formularios)
+
+
+@condicional("torneo", "arbitro")
+async def torneo_buscar(request):
+    formularios = formularios_index(request)
+    formularioT = formularios["formularioT"]
+    torneos = Torneo.objects.select_related('arbitro_principal__usuario')
+
+    # Filtrado base segun el usuario (condicional ya lo ha cargado con sus grupos)
+    usuario = request.user
+    if usuario.is_authenticated and usuario.es_arbitro():
+        try:
+            arbitro = await Arbitro.objects.aget(usuario=usuario)
+            torneos = torneos.filter(arbitro_principal=arbitro)
+        except Arbitro.DoesNotExist:
+            torneos = Torneo.objects.none()
+
+    if await validar(formularioT):
+        torneos = await sync_to_async(filtrar_torneos)(torneos, formularioT.cleaned_data)
+        return await renderizar(request, 'eventos_deportivos/torneos/torneo_buscar.html', {
+            "formularioT": formularioT,
+            "texto_busqueda": texto_filtros_torneos(formularioT.cleaned_data),
+            "torneos": await alistar(torneos),
+        })
+    return await renderizar(request, "eventos_deportivos/index.html", formularios)
@@ -0,0 +1,57 @@
+from django import forms
+from django.core.exceptions import ValidationError
+
+# ----------------------------
+# Selects perezosos para ModelChoiceField con muchas filas
+# Solo se pintan las opciones elegidas; el resto se buscan desde el
+# navegador en el endpoint JSON de data-opciones (app.js), por paginas.
+# Asi el HTML y el tiempo de render no dependen del tamaño de la tabla.
+# ----------------------------
+
+
+class OpcionesPerezosas:
+
+    def __init__(self, url, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-opciones'] = str(self.url)
+        return context
+
+    def use_required_attribute(self, initial):
+        # Select lo calcula leyendo la primera opcion del queryset
+        return forms.Widget.use_required_attribute(self, initial)
+
+    def optgroups(self, name, value, attrs=None):
+        iterador = self.choices
+        campo = iterador.field
+        opciones = []
+        if campo.empty_label is not None and not self.allow_multiple_selected:
+            opciones.append(('', campo.empty_label, not any(value)))
+
+        # Solo las filas elegidas: una consulta por pk
+        valores = [v for v in value if v not in campo.empty_values]
+        if valores:
+            clave = campo.to_field_name or 'pk'
+            try:
+                elegidos = list(iterador.queryset.filter(**{f'{clave}__in': valores}))
+            except (ValueError, TypeError, ValidationError):
+                elegidos = []
+            for objeto in elegidos:
+                valor, etiqueta = iterador.choice(objeto)
+                opciones.append((valor, etiqueta, True))
+
+        return [
+            (None, [self.create_option(name, valor, etiqueta, elegido, indice, attrs=attrs)], indice)
+            for indice, (valor, etiqueta, elegido) in enumerate(opciones)
+        ]
+
+
+class SelectPerezoso(OpcionesPerezosas, forms.Select):
+    pass
+
+
+class SelectMultiplePerezoso(OpcionesPerezosas, forms.SelectMultiple):
+    pass
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
+# Con ASGI las vistas de lectura son async (VISTAS_ASYNC=off para usar las sincronas)
+os.environ.setdefault('VISTAS_ASYNC', 'on')
 
 application = get_asgi_application()